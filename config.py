@@ -23,12 +23,82 @@ NUTRITION_API_KEY = os.getenv("NUTRITION_API_KEY")
 if not NUTRITION_API_KEY:
     print("⚠️ ВНИМАНИЕ: NUTRITION_API_KEY не найден. КБЖУ через CalorieNinjas работать не будет.")
 
+# Настройки Gemini
+GEMINI_MAX_CONCURRENT_REQUESTS = int(os.getenv("GEMINI_MAX_CONCURRENT_REQUESTS", "4"))  # на один ключ
+GEMINI_KEY_RPM_LIMIT = int(os.getenv("GEMINI_KEY_RPM_LIMIT", "10"))  # запросов в минуту на ключ, 0 — без лимита
+GEMINI_KEY_COOLDOWN = float(os.getenv("GEMINI_KEY_COOLDOWN", "60"))  # пауза ключа после 429, секунды
+GEMINI_KEY_FORBIDDEN_COOLDOWN = float(os.getenv("GEMINI_KEY_FORBIDDEN_COOLDOWN", "600"))  # после 403/биллинга
+GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "60"))  # секунды
+GEMINI_ANALYZE_TIMEOUT = float(os.getenv("GEMINI_ANALYZE_TIMEOUT", "120"))  # длинные отчёты
+
+# Адреса внешних API (можно переопределить, например, на локальный stub-сервер)
+CALORIENINJAS_API_URL = os.getenv("CALORIENINJAS_API_URL", "https://api.calorieninjas.com/v1/nutrition")
+OPENFOODFACTS_API_URL = os.getenv("OPENFOODFACTS_API_URL", "https://world.openfoodfacts.org/api/v0/product")
+MYMEMORY_API_URL = os.getenv("MYMEMORY_API_URL", "https://api.mymemory.translated.net/get")
+
+# Общий HTTP-клиент для внешних API
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))  # секунды на запрос
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = 0.5  # базовая задержка повтора, секунды
+HTTP_POOL_LIMIT = 100  # всего соединений в пуле
+HTTP_PER_HOST_LIMIT = 10  # одновременных запросов на хост по умолчанию
+HTTP_KEEPALIVE_TIMEOUT = 30  # секунды
+HTTP_HOST_LIMITS = {
+    # Бесплатный публичный API — не долбим его параллельно
+    "api.mymemory.translated.net": 3,
+}
+
+# Кэш продуктов по штрих-коду (Open Food Facts)
+PRODUCT_CACHE_TTL_HOURS = 24 * 30  # найденные продукты обновляем раз в месяц
+PRODUCT_CACHE_NEGATIVE_TTL_HOURS = 24  # «не найден» перепроверяем через сутки
+PRODUCT_CACHE_MEMORY_SIZE = 2000  # записей в in-process LRU
+
+# Кэш переводов MyMemory
+TRANSLATION_CACHE_MEMORY_SIZE = 5000  # записей в in-process LRU
+TRANSLATION_BATCH_MAX_BYTES = 450  # лимит MyMemory на q — 500 байт
+TRANSLATION_PERSIST_MAX_LENGTH = 255  # длинные фразы в БД не сохраняем
+
+# Кэш оценок КБЖУ от Gemini по тексту
+KBJU_ESTIMATE_CACHE_MAX_ENTRIES = int(os.getenv("KBJU_ESTIMATE_CACHE_MAX_ENTRIES", "20000"))
+
+# Кэш анализа фото по file_unique_id / перцептивному хэшу
+IMAGE_CACHE_MEMORY_SIZE = 500  # записей в in-process LRU
+
+# Рассылки всем пользователям (общий лимит Telegram ~30 сообщений в секунду)
+BROADCAST_RATE_PER_SECOND = float(os.getenv("BROADCAST_RATE_PER_SECOND", "25"))
+BROADCAST_BURST = 25  # сколько сообщений можно отправить подряд без паузы
+BROADCAST_CONCURRENCY = 10  # одновременных запросов send_message
+BROADCAST_PAGE_SIZE = 200  # пользователей на страницу; курсор сохраняется после каждой
+BROADCAST_MAX_RETRIES = 3  # повторов после TelegramRetryAfter / сетевой ошибки
+BROADCAST_RESUME_MAX_AGE_HOURS = 3  # незавершённые рассылки старше — не продолжаем
+
+# Журнал уведомлений (notification_outbox)
+NOTIFICATION_CLAIM_TIMEOUT_MINUTES = 5  # «забранное», но не отправленное уведомление можно забрать снова
+NOTIFICATION_OUTBOX_RETENTION_DAYS = 7
+
+# Часовой пояс пользователя по умолчанию (если не выбран в настройках)
+DEFAULT_TIMEZONE = "Europe/Moscow"
+
+# Напоминания о добавках: насколько поздно ещё досылать пропущенный слот
+SUPPLEMENT_REMINDER_MAX_LATENESS_MINUTES = 5
+
 # Keep-alive сервер
 KEEPALIVE_PORT = 10000
 
 # Настройки БД
 DB_POOL_PRE_PING = True
 DB_POOL_RECYCLE = 1800  # 30 минут
+# PostgreSQL: пул соединений и лимит времени запроса
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # ожидание свободного соединения, секунды
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 — без лимита
+# SQLite: PRAGMA на каждое новое соединение
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # читатели не ждут писателя
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # в WAL безопасно и без fsync на каждый commit
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # ждать блокировку, а не падать
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024)))  # байт
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16000"))  # кэш страниц на соединение
 
 # Названия месяцев (русский)
 MONTH_NAMES = [
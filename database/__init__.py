@@ -14,6 +14,14 @@ from .models import (
     WaterEntry,
     WellbeingEntry,
     ActivityAnalysisEntry,
+    DailyUserSummary,
+    BroadcastCursor,
+    NotificationOutbox,
+    ProductCache,
+    Translation,
+    KbjuEstimateCache,
+    IngredientNutrition,
+    ImageAnalysisCache,
 )
 
 __all__ = [
@@ -34,4 +42,12 @@ __all__ = [
     "WaterEntry",
     "WellbeingEntry",
     "ActivityAnalysisEntry",
+    "DailyUserSummary",
+    "BroadcastCursor",
+    "NotificationOutbox",
+    "ProductCache",
+    "Translation",
+    "KbjuEstimateCache",
+    "IngredientNutrition",
+    "ImageAnalysisCache",
 ]
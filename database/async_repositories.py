@@ -0,0 +1,67 @@
+"""
+Асинхронные версии репозиториев для обработчиков.
+
+Сигнатуры методов те же, что у sync-репозиториев, но их нужно await-ить:
+    totals = await AsyncMealRepository.get_daily_totals(user_id, day)
+"""
+from database.async_session import AsyncRepository
+from database.repositories import (
+    MealRepository,
+    WorkoutRepository,
+    WeightRepository,
+    WaterRepository,
+    SupplementRepository,
+    ProcedureRepository,
+    WellbeingRepository,
+    ActivityAnalysisRepository,
+    CustomWorkoutExerciseRepository,
+    ProductCacheRepository,
+    TranslationRepository,
+    KbjuEstimateCacheRepository,
+    ImageAnalysisCacheRepository,
+    CalendarRepository,
+    DashboardRepository,
+    BroadcastRepository,
+    NotificationOutboxRepository,
+    UserRepository,
+)
+
+AsyncMealRepository = AsyncRepository(MealRepository)
+AsyncWorkoutRepository = AsyncRepository(WorkoutRepository)
+AsyncWeightRepository = AsyncRepository(WeightRepository)
+AsyncWaterRepository = AsyncRepository(WaterRepository)
+AsyncSupplementRepository = AsyncRepository(SupplementRepository)
+AsyncProcedureRepository = AsyncRepository(ProcedureRepository)
+AsyncWellbeingRepository = AsyncRepository(WellbeingRepository)
+AsyncActivityAnalysisRepository = AsyncRepository(ActivityAnalysisRepository)
+AsyncCustomWorkoutExerciseRepository = AsyncRepository(CustomWorkoutExerciseRepository)
+AsyncProductCacheRepository = AsyncRepository(ProductCacheRepository)
+AsyncTranslationRepository = AsyncRepository(TranslationRepository)
+AsyncKbjuEstimateCacheRepository = AsyncRepository(KbjuEstimateCacheRepository)
+AsyncImageAnalysisCacheRepository = AsyncRepository(ImageAnalysisCacheRepository)
+AsyncCalendarRepository = AsyncRepository(CalendarRepository)
+AsyncDashboardRepository = AsyncRepository(DashboardRepository)
+AsyncBroadcastRepository = AsyncRepository(BroadcastRepository)
+AsyncNotificationOutboxRepository = AsyncRepository(NotificationOutboxRepository)
+AsyncUserRepository = AsyncRepository(UserRepository)
+
+__all__ = [
+    "AsyncMealRepository",
+    "AsyncWorkoutRepository",
+    "AsyncWeightRepository",
+    "AsyncWaterRepository",
+    "AsyncSupplementRepository",
+    "AsyncProcedureRepository",
+    "AsyncWellbeingRepository",
+    "AsyncActivityAnalysisRepository",
+    "AsyncCustomWorkoutExerciseRepository",
+    "AsyncProductCacheRepository",
+    "AsyncTranslationRepository",
+    "AsyncKbjuEstimateCacheRepository",
+    "AsyncImageAnalysisCacheRepository",
+    "AsyncCalendarRepository",
+    "AsyncDashboardRepository",
+    "AsyncBroadcastRepository",
+    "AsyncNotificationOutboxRepository",
+    "AsyncUserRepository",
+]
@@ -0,0 +1,99 @@
+"""
+Асинхронный доступ к БД для обработчиков aiogram.
+
+Движок — create_async_engine (aiosqlite для SQLite, asyncpg для PostgreSQL).
+Синхронные репозитории не дублируются: run_in_async_session выполняет их
+методы через AsyncSession.run_sync, а get_db_session внутри такого вызова
+отдаёт сессию AsyncSession. Запросы идут через асинхронный драйвер и не
+блокируют event loop, а скрипты продолжают пользоваться sync-версиями.
+"""
+import logging
+from typing import Any, Callable
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config import DATABASE_URL
+from database.engine_profile import configure_engine, engine_options
+from database.session import bound_session
+
+logger = logging.getLogger(__name__)
+
+# Синхронный драйвер в DATABASE_URL → асинхронный
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def make_async_url(url: str) -> str:
+    """sqlite:///bot.db → sqlite+aiosqlite:///bot.db, postgresql://… → postgresql+asyncpg://…"""
+    scheme, sep, rest = url.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme, scheme)
+    if driver == "postgresql+asyncpg":
+        # asyncpg не понимает libpq-параметр sslmode, у него это ssl
+        rest = rest.replace("sslmode=", "ssl=")
+    return f"{driver}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = make_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+async_pool_metrics = configure_engine(async_engine.sync_engine, "async")
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+
+def _call_bound(sync_session, fn: Callable, args: tuple, kwargs: dict) -> Any:
+    with bound_session(sync_session):
+        return fn(*args, **kwargs)
+
+
+async def run_in_async_session(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Выполняет синхронную функцию, работающую через get_db_session, на async-движке.
+
+    Все get_db_session() внутри fn получают одну сессию; она коммитится после
+    успешного выполнения и откатывается при исключении.
+    """
+    async with AsyncSessionLocal() as session:
+        try:
+            result = await session.run_sync(_call_bound, fn, args, kwargs)
+            await session.commit()
+            return result
+        except Exception:
+            await session.rollback()
+            raise
+
+
+class AsyncRepository:
+    """
+    Асинхронная обёртка над репозиторием со статическими методами.
+
+    AsyncRepository(MealRepository).get_daily_totals(user_id, day) — то же,
+    что MealRepository.get_daily_totals, но awaitable и на async-движке.
+    """
+
+    def __init__(self, repository: type):
+        self._repository = repository
+
+    def __getattr__(self, name: str):
+        method = getattr(self._repository, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await run_in_async_session(method, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    def __repr__(self) -> str:
+        return f"AsyncRepository({self._repository.__name__})"
+
+
+async def dispose_async_engine() -> None:
+    await async_engine.dispose()
@@ -0,0 +1,158 @@
+"""
+Поддержание дневных сводок пользователя (таблица daily_user_summary).
+
+refresh_daily_summary вызывается репозиториями внутри той же сессии, что и
+запись приёма пищи, воды или тренировки: сводка дня пересчитывается из
+исходных строк (по индексу (user_id, date)) и коммитится вместе с изменением.
+Пересчёт дня, а не прибавление разницы, не накапливает расхождений, если
+запись меняли несколько раз или удаляли.
+
+rebuild_daily_summaries пересобирает сводки пользователя целиком — для
+заполнения таблицы на существующей БД и ручной починки
+(scripts/rebuild_daily_summary.py).
+"""
+import logging
+from datetime import date, datetime
+from typing import Iterable
+
+from sqlalchemy import func, select, union
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database.models import DailyUserSummary, Meal, WaterEntry, Workout
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = (
+    "calories",
+    "protein",
+    "fat",
+    "carbs",
+    "meals_count",
+    "water_ml",
+    "water_count",
+    "workouts_count",
+)
+
+_UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+def _empty_summary() -> dict:
+    return {field: 0 for field in SUMMARY_FIELDS}
+
+
+def _aggregate_queries(session: Session, user_id: str):
+    """Запросы SUM/COUNT по дням для трёх источников сводки."""
+    meals = session.query(
+        Meal.date,
+        func.coalesce(func.sum(Meal.calories), 0),
+        func.coalesce(func.sum(Meal.protein), 0),
+        func.coalesce(func.sum(Meal.fat), 0),
+        func.coalesce(func.sum(Meal.carbs), 0),
+        func.count(Meal.id),
+    ).filter(Meal.user_id == user_id)
+    water = session.query(
+        WaterEntry.date,
+        func.coalesce(func.sum(WaterEntry.amount), 0),
+        func.count(WaterEntry.id),
+    ).filter(WaterEntry.user_id == user_id)
+    # Калории тренировок не суммируются: у большинства записей они не сохранены
+    # и оцениваются по весу на дату (utils.workout_utils.calculate_workouts_calories)
+    workouts = session.query(
+        Workout.date,
+        func.count(Workout.id),
+    ).filter(Workout.user_id == user_id)
+    return meals, water, workouts
+
+
+def _collect(meal_rows: Iterable, water_rows: Iterable, workout_rows: Iterable) -> dict[date, dict]:
+    summaries: dict[date, dict] = {}
+    for day, calories, protein, fat, carbs, count in meal_rows:
+        summaries.setdefault(day, _empty_summary()).update(
+            calories=float(calories),
+            protein=float(protein),
+            fat=float(fat),
+            carbs=float(carbs),
+            meals_count=count,
+        )
+    for day, amount, count in water_rows:
+        summaries.setdefault(day, _empty_summary()).update(water_ml=float(amount), water_count=count)
+    for day, count in workout_rows:
+        summaries.setdefault(day, _empty_summary()).update(workouts_count=count)
+    return summaries
+
+
+def _upsert(session: Session, user_id: str, day: date, values: dict) -> None:
+    insert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        row = session.query(DailyUserSummary).filter_by(user_id=user_id, date=day).first()
+        if row is None:
+            row = DailyUserSummary(user_id=user_id, date=day)
+            session.add(row)
+        for field, value in values.items():
+            setattr(row, field, value)
+        row.updated_at = datetime.utcnow()
+        return
+
+    stmt = insert(DailyUserSummary).values(
+        user_id=user_id, date=day, updated_at=datetime.utcnow(), **values
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "date"],
+        set_={field: stmt.excluded[field] for field in (*SUMMARY_FIELDS, "updated_at")},
+    )
+    session.execute(stmt)
+
+
+def refresh_daily_summary(session: Session, user_id: str, day: date) -> None:
+    """
+    Пересчитывает сводку пользователя за день в текущей транзакции.
+
+    Вызывать после изменения строк (до commit). День без записей удаляется
+    из таблицы, чтобы сводки существовали только для дней с данными.
+    """
+    user_id = str(user_id)
+    session.flush()
+    meals, water, workouts = _aggregate_queries(session, user_id)
+    summary = _collect(
+        meals.filter(Meal.date == day).group_by(Meal.date).all(),
+        water.filter(WaterEntry.date == day).group_by(WaterEntry.date).all(),
+        workouts.filter(Workout.date == day).group_by(Workout.date).all(),
+    ).get(day)
+
+    if summary is None:
+        session.query(DailyUserSummary).filter_by(user_id=user_id, date=day).delete()
+    else:
+        _upsert(session, user_id, day, summary)
+
+
+def rebuild_daily_summaries(session: Session, user_id: str) -> int:
+    """Пересобирает все сводки пользователя из исходных строк. Возвращает число дней."""
+    user_id = str(user_id)
+    meals, water, workouts = _aggregate_queries(session, user_id)
+    summaries = _collect(
+        meals.group_by(Meal.date).all(),
+        water.group_by(WaterEntry.date).all(),
+        workouts.group_by(Workout.date).all(),
+    )
+    summaries.pop(None, None)
+
+    session.query(DailyUserSummary).filter_by(user_id=user_id).delete()
+    session.bulk_insert_mappings(
+        DailyUserSummary,
+        [
+            {"user_id": user_id, "date": day, "updated_at": datetime.utcnow(), **values}
+            for day, values in summaries.items()
+        ],
+    )
+    return len(summaries)
+
+
+def get_summary_user_ids(session: Session) -> list[str]:
+    """Пользователи, у которых есть приёмы пищи, вода или тренировки."""
+    query = union(select(Meal.user_id), select(WaterEntry.user_id), select(Workout.user_id))
+    return [row[0] for row in session.execute(query)]
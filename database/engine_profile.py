@@ -0,0 +1,163 @@
+"""
+Профиль движков БД: параметры пула, PRAGMA для SQLite и метрики пула.
+
+Используется и sync-движком (database.session), и async-движком
+(database.async_session), чтобы оба работали с базой одинаково.
+
+SQLite: WAL позволяет читать, пока идёт запись, synchronous=NORMAL убирает
+fsync на каждый commit, busy_timeout заставляет ждать блокировку писателя
+вместо «database is locked». PostgreSQL: размер пула, переполнение и
+statement_timeout, чтобы зависший запрос не держал соединение бесконечно.
+"""
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.database in (None, "", ":memory:")
+
+
+def engine_options(database_url: str) -> dict[str, Any]:
+    """Аргументы create_engine / create_async_engine для этого URL."""
+    url = make_url(database_url)
+    options: dict[str, Any] = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+    if url.get_backend_name() == "postgresql":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            if url.get_driver_name() == "asyncpg":
+                options["connect_args"] = {
+                    "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+                }
+            else:
+                options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def _sqlite_pragmas(url) -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}",
+        # Отрицательное значение — размер в КиБ, а не в страницах
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}",
+    ]
+    if not _is_memory_sqlite(url):
+        # У базы в памяти нет файла: WAL и mmap к ней неприменимы
+        pragmas.insert(0, f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        pragmas.append(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    return pragmas
+
+
+class PoolMetrics:
+    """
+    Счётчики пула соединений по событиям connect/checkout/checkin.
+
+    Показывают, сколько соединений занято сейчас и в пике и как долго их
+    держат: если in_use упирается в размер пула или hold растёт, запросы
+    ждут друг друга.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.total_hold_seconds = 0.0
+        self.max_hold_seconds = 0.0
+        self._pool = None
+
+    def attach(self, engine: Engine) -> None:
+        self._pool = engine.pool
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.monotonic()
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is None:
+            return
+        held = time.monotonic() - started
+        with self._lock:
+            self.checkins += 1
+            self.in_use -= 1
+            self.total_hold_seconds += held
+            self.max_hold_seconds = max(self.max_hold_seconds, held)
+
+    def stats(self) -> dict:
+        """Снимок счётчиков и состояния пула."""
+        with self._lock:
+            return {
+                "engine": self.name,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "avg_hold_ms": (self.total_hold_seconds / self.checkins * 1000) if self.checkins else 0.0,
+                "max_hold_ms": self.max_hold_seconds * 1000,
+                "pool": self._pool.status() if self._pool is not None else None,
+            }
+
+
+def configure_engine(engine: Engine, name: str) -> PoolMetrics:
+    """
+    Навешивает на engine PRAGMA для SQLite и метрики пула.
+
+    Для async-движка передавайте async_engine.sync_engine.
+    """
+    if engine.dialect.name == "sqlite":
+        pragmas = _sqlite_pragmas(engine.url)
+
+        @event.listens_for(engine, "connect")
+        def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+    metrics = PoolMetrics(name)
+    metrics.attach(engine)
+    return metrics
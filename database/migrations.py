@@ -0,0 +1,169 @@
+"""
+Версионные миграции схемы.
+
+Таблицы целиком создаёт Base.metadata.create_all; здесь — изменения уже
+существующих таблиц (новые столбцы, индексы). Каждая миграция выполняется
+один раз, номер последней применённой хранится в таблице schema_version.
+Миграции должны быть идемпотентны: на свежей БД create_all уже создал всё нужное.
+"""
+import logging
+from typing import Callable, NamedTuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from database.models import Base
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _add_column_if_missing(conn: Connection, table: str, column: str, ddl_type: str) -> None:
+    columns = {col["name"] for col in inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+        logger.info(f"Добавлен столбец {table}.{column}")
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: tuple[str, ...]) -> None:
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+
+# Таблицы, которые читаются по пользователю и дню/диапазону дат
+USER_DATE_TABLES = (
+    "workouts",
+    "weights",
+    "measurements",
+    "meals",
+    "procedures",
+    "water_entries",
+    "wellbeing_entries",
+    "activity_analysis_entries",
+)
+
+
+def _add_user_date_indexes(conn: Connection) -> None:
+    for table in USER_DATE_TABLES:
+        _create_index(conn, f"ix_{table}_user_date", table, ("user_id", "date"))
+
+
+def _backfill_daily_summaries(conn: Connection) -> None:
+    # Импорт здесь: database.daily_summary тянет модели, а миграции грузятся из database.session
+    from sqlalchemy.orm import Session
+    from database.daily_summary import get_summary_user_ids, rebuild_daily_summaries
+
+    with Session(bind=conn) as session:
+        users = get_summary_user_ids(session)
+        days = sum(rebuild_daily_summaries(session, user_id) for user_id in users)
+        session.flush()
+    logger.info(f"Заполнено дневных сводок: {days} (пользователей: {len(users)})")
+
+
+def _add_weight_value_kg(conn: Connection) -> None:
+    from utils.validators import parse_weight
+
+    _add_column_if_missing(conn, "weights", "value_kg", "FLOAT")
+    rows = conn.execute(text("SELECT id, value FROM weights WHERE value_kg IS NULL")).all()
+    updates = [
+        {"id": row_id, "value_kg": value_kg}
+        for row_id, raw in rows
+        if (value_kg := parse_weight(str(raw))) is not None
+    ]
+    if updates:
+        conn.execute(text("UPDATE weights SET value_kg = :value_kg WHERE id = :id"), updates)
+    logger.info(f"weights.value_kg заполнен для {len(updates)} из {len(rows)} записей")
+
+
+def _add_timezone_columns(conn: Connection) -> None:
+    _add_column_if_missing(conn, "users", "timezone", "VARCHAR")
+    _add_column_if_missing(conn, "broadcast_cursors", "timezone", "VARCHAR")
+
+
+def _add_meal_created_at(conn: Connection) -> None:
+    # У старых записей время неизвестно (NULL) — они не считаются записанными в окне напоминания
+    _add_column_if_missing(conn, "meals", "created_at", "TIMESTAMP")
+    _create_index(conn, "ix_meals_user_created_at", "meals", ("user_id", "created_at"))
+    _add_column_if_missing(conn, "broadcast_cursors", "meal_window_start", "TIMESTAMP")
+    _add_column_if_missing(conn, "broadcast_cursors", "meal_window_end", "TIMESTAMP")
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        1,
+        "supplement_entries.amount",
+        lambda conn: _add_column_if_missing(conn, "supplement_entries", "amount", "FLOAT"),
+    ),
+    Migration(
+        2,
+        "workouts.calories",
+        lambda conn: _add_column_if_missing(conn, "workouts", "calories", "FLOAT"),
+    ),
+    Migration(3, "составные индексы (user_id, date)", _add_user_date_indexes),
+    Migration(4, "заполнение daily_user_summary", _backfill_daily_summaries),
+    Migration(5, "weights.value_kg (числовой вес)", _add_weight_value_kg),
+    Migration(
+        6,
+        "индекс supplement_entries (user_id, timestamp)",
+        lambda conn: _create_index(
+            conn, "ix_supplement_entries_user_timestamp", "supplement_entries", ("user_id", "timestamp")
+        ),
+    ),
+    Migration(7, "часовой пояс пользователя и рассылки", _add_timezone_columns),
+    Migration(8, "meals.created_at и окно напоминания в broadcast_cursors", _add_meal_created_at),
+]
+
+
+def get_schema_version(conn: Connection) -> int:
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    version = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    return version or 0
+
+
+def run_migrations(engine: Engine) -> int:
+    """Применяет недостающие миграции по порядку. Возвращает итоговую версию схемы."""
+    with engine.begin() as conn:
+        current = get_schema_version(conn)
+
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        # Каждая миграция — в своей транзакции вместе с записью версии
+        with engine.begin() as conn:
+            migration.apply(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version) VALUES (:version)"),
+                {"version": migration.version},
+            )
+        current = migration.version
+        logger.info(f"Применена миграция {migration.version}: {migration.description}")
+    return current
+
+
+def find_missing_indexes(engine: Engine) -> list[str]:
+    """Возвращает индексы, объявленные в моделях, которых нет в БД."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables or not table.indexes:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(
+            f"{table.name}.{index.name}" for index in table.indexes if index.name not in existing
+        )
+    return missing
+
+
+def check_indexes(engine: Engine) -> bool:
+    """Проверка при старте: все индексы из моделей созданы. False — чего-то не хватает."""
+    missing = find_missing_indexes(engine)
+    if missing:
+        logger.error(f"❌ В БД отсутствуют индексы: {', '.join(missing)}")
+        return False
+    logger.info("Индексы БД на месте")
+    return True
@@ -9,6 +9,8 @@ from sqlalchemy import (
     DateTime,
     Text,
     Boolean,
+    Index,
+    UniqueConstraint,
 )
 from datetime import date, datetime
 
@@ -20,11 +22,15 @@ class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
     user_id = Column(String, unique=True, nullable=False)
+    timezone = Column(String, nullable=True)  # IANA, например Asia/Yekaterinburg; None — DEFAULT_TIMEZONE
 
 
 class Workout(Base):
     """Модель тренировки."""
     __tablename__ = "workouts"
+    __table_args__ = (
+        Index("ix_workouts_user_date", "user_id", "date"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False)
     exercise = Column(String, nullable=False)
@@ -47,15 +53,22 @@ class CustomWorkoutExercise(Base):
 class Weight(Base):
     """Модель веса."""
     __tablename__ = "weights"
+    __table_args__ = (
+        Index("ix_weights_user_date", "user_id", "date"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False)
-    value = Column(String, nullable=False)
+    value = Column(String, nullable=False)  # как ввёл пользователь (для отображения)
+    value_kg = Column(Float, nullable=True)  # то же число для расчётов и агрегатов в SQL
     date = Column(Date, default=date.today)
 
 
 class Measurement(Base):
     """Модель замеров тела."""
     __tablename__ = "measurements"
+    __table_args__ = (
+        Index("ix_measurements_user_date", "user_id", "date"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, index=True)
     chest = Column(Float, nullable=True)
@@ -69,6 +82,10 @@ class Measurement(Base):
 class Meal(Base):
     """Модель приёма пищи."""
     __tablename__ = "meals"
+    __table_args__ = (
+        Index("ix_meals_user_date", "user_id", "date"),
+        Index("ix_meals_user_created_at", "user_id", "created_at"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False)
     description = Column(String, nullable=True)
@@ -80,6 +97,7 @@ class Meal(Base):
     fat = Column(Float, default=0)
     carbs = Column(Float, default=0)
     date = Column(Date, default=date.today)
+    created_at = Column(DateTime, nullable=True, default=datetime.utcnow)  # когда записан (UTC)
 
 
 class KbjuSettings(Base):
@@ -111,6 +129,9 @@ class Supplement(Base):
 class SupplementEntry(Base):
     """Модель записи приёма добавки."""
     __tablename__ = "supplement_entries"
+    __table_args__ = (
+        Index("ix_supplement_entries_user_timestamp", "user_id", "timestamp"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False, index=True)
     supplement_id = Column(Integer, nullable=False)
@@ -121,6 +142,9 @@ class SupplementEntry(Base):
 class Procedure(Base):
     """Модель процедуры."""
     __tablename__ = "procedures"
+    __table_args__ = (
+        Index("ix_procedures_user_date", "user_id", "date"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False, index=True)
     name = Column(String, nullable=False)
@@ -131,6 +155,9 @@ class Procedure(Base):
 class WaterEntry(Base):
     """Модель записи воды."""
     __tablename__ = "water_entries"
+    __table_args__ = (
+        Index("ix_water_entries_user_date", "user_id", "date"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False, index=True)
     amount = Column(Float, nullable=False)  # количество воды в мл
@@ -141,6 +168,9 @@ class WaterEntry(Base):
 class WellbeingEntry(Base):
     """Модель отметки самочувствия."""
     __tablename__ = "wellbeing_entries"
+    __table_args__ = (
+        Index("ix_wellbeing_entries_user_date", "user_id", "date"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False, index=True)
     entry_type = Column(String, nullable=False)
@@ -155,6 +185,9 @@ class WellbeingEntry(Base):
 class ActivityAnalysisEntry(Base):
     """Модель сохранённого ИИ-анализа деятельности."""
     __tablename__ = "activity_analysis_entries"
+    __table_args__ = (
+        Index("ix_activity_analysis_entries_user_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False, index=True)
@@ -162,3 +195,152 @@ class ActivityAnalysisEntry(Base):
     date = Column(Date, default=date.today)
     source = Column(String, nullable=False, default="manual")
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DailyUserSummary(Base):
+    """
+    Дневная сводка пользователя: суммы КБЖУ и воды, число тренировок за день.
+
+    Пересчитывается в той же транзакции, что и запись/изменение/удаление
+    приёма пищи, воды или тренировки (database.daily_summary).
+    """
+    __tablename__ = "daily_user_summary"
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_daily_user_summary_user_date"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    calories = Column(Float, nullable=False, default=0)
+    protein = Column(Float, nullable=False, default=0)
+    fat = Column(Float, nullable=False, default=0)
+    carbs = Column(Float, nullable=False, default=0)
+    meals_count = Column(Integer, nullable=False, default=0)
+    water_ml = Column(Float, nullable=False, default=0)
+    water_count = Column(Integer, nullable=False, default=0)
+    workouts_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class BroadcastCursor(Base):
+    """
+    Прогресс рассылки по всем пользователям (services.broadcast).
+
+    Пользователи обходятся по возрастанию user_id, last_user_id — последний
+    обработанный. После перезапуска незавершённая рассылка продолжается с него.
+    """
+    __tablename__ = "broadcast_cursors"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String, nullable=False, unique=True)  # например meal:завтрак:2024-05-01:Europe/Moscow
+    text = Column(Text, nullable=False)
+    timezone = Column(String, nullable=True)  # рассылка только пользователям этого пояса; None — всем
+    # Напоминание о приёме пищи: пропускать тех, кто записал еду в [meal_window_start, meal_window_end] (UTC)
+    meal_window_start = Column(DateTime, nullable=True)
+    meal_window_end = Column(DateTime, nullable=True)
+    last_user_id = Column(String, nullable=True)
+    sent_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class NotificationOutbox(Base):
+    """
+    Журнал отправки уведомлений: одна строка на (пользователь, вид, слот).
+
+    Строку вставляет тот обработчик, который «забрал» уведомление; уникальный
+    ключ не даёт другому воркеру или повторному запуску отправить его ещё раз.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        UniqueConstraint("user_id", "kind", "slot", name="uq_notification_outbox_user_kind_slot"),
+        Index("ix_notification_outbox_claimed_at", "claimed_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # meal, supplement
+    slot = Column(String, nullable=False)  # например завтрак:2024-05-01 или 2024-05-01T09:00#12
+    status = Column(String, nullable=False, default="pending")  # pending, sent, failed
+    claim_token = Column(String, nullable=False)
+    claimed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+
+class ProductCache(Base):
+    """Кэш продуктов Open Food Facts по штрих-коду (включая «не найден»)."""
+    __tablename__ = "product_cache"
+
+    id = Column(Integer, primary_key=True)
+    barcode = Column(String, nullable=False, unique=True, index=True)
+    found = Column(Boolean, nullable=False, default=True)
+    product_json = Column(Text, nullable=True)  # нормализованный результат NutritionService
+    fetched_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class Translation(Base):
+    """Словарь уже переведённых текстов (названия продуктов, запросы)."""
+    __tablename__ = "translations"
+    __table_args__ = (
+        UniqueConstraint("source_lang", "target_lang", "source_text", name="uq_translations_pair_text"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    source_lang = Column(String(8), nullable=False)
+    target_lang = Column(String(8), nullable=False)
+    source_text = Column(String, nullable=False)  # нормализованный (lower/strip) исходный текст
+    translated_text = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class KbjuEstimateCache(Base):
+    """Кэш оценок КБЖУ от Gemini по нормализованному описанию еды."""
+    __tablename__ = "kbju_estimate_cache"
+
+    id = Column(Integer, primary_key=True)
+    text_hash = Column(String(64), nullable=False, unique=True, index=True)  # sha256 нормализованного текста
+    normalized_text = Column(Text, nullable=False)
+    result_json = Column(Text, nullable=False)  # ответ в формате GeminiService.estimate_kbju
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class IngredientNutrition(Base):
+    """Справочник КБЖУ продуктов на 100 г, собранный из ответов Gemini и API питания."""
+    __tablename__ = "ingredient_nutrition"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True, index=True)  # normalize_ingredient_name
+    kcal_100g = Column(Float, nullable=False)
+    protein_100g = Column(Float, nullable=False, default=0)
+    fat_100g = Column(Float, nullable=False, default=0)
+    carbs_100g = Column(Float, nullable=False, default=0)
+    source = Column(String(32), nullable=False)  # gemini / calorieninjas / openfoodfacts
+    priority = Column(Integer, nullable=False, default=0)  # более надёжный источник перезаписывает менее надёжный
+    samples = Column(Integer, nullable=False, default=1)  # сколько оценок усреднено
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ImageAnalysisCache(Base):
+    """Кэш результатов анализа фото (еда, этикетка, штрих-код) по file_unique_id и dHash."""
+    __tablename__ = "image_analysis_cache"
+    __table_args__ = (
+        UniqueConstraint("kind", "file_unique_id", name="uq_image_analysis_kind_file"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(16), nullable=False)  # photo / label / barcode
+    file_unique_id = Column(String, nullable=False, index=True)
+    phash = Column(String(16), nullable=True)  # dHash в hex, если доступен Pillow
+    # 16-битные части хэша для индексного поиска похожих изображений
+    phash_band0 = Column(Integer, nullable=True, index=True)
+    phash_band1 = Column(Integer, nullable=True, index=True)
+    phash_band2 = Column(Integer, nullable=True, index=True)
+    phash_band3 = Column(Integer, nullable=True, index=True)
+    result_json = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
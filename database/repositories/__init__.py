@@ -8,6 +8,17 @@ from .procedure_repository import ProcedureRepository
 from .wellbeing_repository import WellbeingRepository
 from .activity_analysis_repository import ActivityAnalysisRepository
 from .custom_workout_exercise_repository import CustomWorkoutExerciseRepository
+from .product_cache_repository import ProductCacheRepository
+from .translation_repository import TranslationRepository
+from .kbju_estimate_cache_repository import KbjuEstimateCacheRepository
+from .ingredient_nutrition_repository import IngredientNutritionRepository
+from .image_analysis_cache_repository import ImageAnalysisCacheRepository
+from .calendar_repository import CalendarRepository
+from .daily_summary_repository import DailySummaryRepository
+from .dashboard_repository import DashboardRepository, DashboardSnapshot
+from .broadcast_repository import BroadcastRepository
+from .notification_outbox_repository import NotificationOutboxRepository
+from .user_repository import UserRepository
 
 __all__ = [
     "MealRepository",
@@ -19,4 +30,16 @@ __all__ = [
     "WellbeingRepository",
     "ActivityAnalysisRepository",
     "CustomWorkoutExerciseRepository",
+    "ProductCacheRepository",
+    "TranslationRepository",
+    "KbjuEstimateCacheRepository",
+    "IngredientNutritionRepository",
+    "ImageAnalysisCacheRepository",
+    "CalendarRepository",
+    "DailySummaryRepository",
+    "DashboardRepository",
+    "DashboardSnapshot",
+    "BroadcastRepository",
+    "NotificationOutboxRepository",
+    "UserRepository",
 ]
@@ -62,22 +62,3 @@ class ActivityAnalysisRepository:
             session.delete(entry)
             session.commit()
             return True
-
-    @staticmethod
-    def get_month_days(user_id: str, year: int, month: int) -> set[int]:
-        """Возвращает дни месяца, где есть анализы."""
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1)
-        else:
-            end_date = date(year, month + 1, 1)
-
-        with get_db_session() as session:
-            rows = (
-                session.query(ActivityAnalysisEntry.date)
-                .filter(ActivityAnalysisEntry.user_id == str(user_id))
-                .filter(ActivityAnalysisEntry.date >= start_date)
-                .filter(ActivityAnalysisEntry.date < end_date)
-                .all()
-            )
-            return {row[0].day for row in rows}
@@ -0,0 +1,111 @@
+"""Репозиторий рассылок: постраничный обход пользователей и курсоры прогресса."""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import or_, select
+
+from config import DEFAULT_TIMEZONE
+from database.models import BroadcastCursor, Meal, User
+from database.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastRepository:
+    """Пользователи для рассылки и сохранённый прогресс рассылок."""
+
+    @staticmethod
+    def get_user_ids_page(
+        after_user_id: Optional[str],
+        limit: int,
+        timezone: Optional[str] = None,
+        meal_window_start: Optional[datetime] = None,
+        meal_window_end: Optional[datetime] = None,
+    ) -> list[str]:
+        """
+        Следующая страница user_id по возрастанию (keyset-пагинация).
+
+        Уникальный индекс users.user_id позволяет не держать в памяти всех
+        пользователей и не зависеть от OFFSET при появлении новых. timezone —
+        только пользователи этого пояса (без пояса — это DEFAULT_TIMEZONE).
+        meal_window_start/meal_window_end — исключить тех, кто уже записал приём
+        пищи в этом окне (UTC): NOT EXISTS по индексу meals (user_id, created_at)
+        в том же запросе, без выгрузки приёмов пищи в Python.
+        """
+        with get_db_session() as session:
+            query = session.query(User.user_id)
+            if after_user_id is not None:
+                query = query.filter(User.user_id > after_user_id)
+            if timezone == DEFAULT_TIMEZONE:
+                query = query.filter(or_(User.timezone == timezone, User.timezone.is_(None)))
+            elif timezone is not None:
+                query = query.filter(User.timezone == timezone)
+            if meal_window_start is not None and meal_window_end is not None:
+                logged_meal = select(Meal.id).where(
+                    Meal.user_id == User.user_id,
+                    Meal.created_at >= meal_window_start,
+                    Meal.created_at <= meal_window_end,
+                )
+                query = query.filter(~logged_meal.exists())
+            rows = query.order_by(User.user_id).limit(limit).all()
+            return [row[0] for row in rows]
+
+    @staticmethod
+    def start(
+        key: str,
+        text: str,
+        timezone: Optional[str] = None,
+        meal_window_start: Optional[datetime] = None,
+        meal_window_end: Optional[datetime] = None,
+    ) -> BroadcastCursor:
+        """Возвращает курсор рассылки key, создавая его при первом запуске."""
+        with get_db_session() as session:
+            cursor = session.query(BroadcastCursor).filter_by(key=key).first()
+            if cursor is None:
+                cursor = BroadcastCursor(
+                    key=key,
+                    text=text,
+                    timezone=timezone,
+                    meal_window_start=meal_window_start,
+                    meal_window_end=meal_window_end,
+                    started_at=datetime.utcnow(),
+                )
+                session.add(cursor)
+                session.commit()
+                session.refresh(cursor)
+            return cursor
+
+    @staticmethod
+    def advance(key: str, last_user_id: str, sent: int, failed: int) -> None:
+        """Сдвигает курсор после обработанной страницы."""
+        with get_db_session() as session:
+            session.query(BroadcastCursor).filter_by(key=key).update({
+                BroadcastCursor.last_user_id: last_user_id,
+                BroadcastCursor.sent_count: BroadcastCursor.sent_count + sent,
+                BroadcastCursor.failed_count: BroadcastCursor.failed_count + failed,
+            })
+            session.commit()
+
+    @staticmethod
+    def finish(key: str) -> None:
+        """Отмечает рассылку завершённой."""
+        with get_db_session() as session:
+            session.query(BroadcastCursor).filter_by(key=key).update({
+                BroadcastCursor.finished_at: datetime.utcnow(),
+            })
+            session.commit()
+
+    @staticmethod
+    def get_unfinished(started_after: datetime) -> list[BroadcastCursor]:
+        """Незавершённые рассылки, начатые после started_after (для продолжения после рестарта)."""
+        with get_db_session() as session:
+            return (
+                session.query(BroadcastCursor)
+                .filter(
+                    BroadcastCursor.finished_at.is_(None),
+                    BroadcastCursor.started_at >= started_after,
+                )
+                .order_by(BroadcastCursor.started_at)
+                .all()
+            )
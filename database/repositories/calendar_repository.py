@@ -0,0 +1,101 @@
+"""Репозиторий для отметок дней в календарях."""
+import calendar
+import logging
+from datetime import date, datetime, time, timedelta
+
+from database.session import get_db_session
+from database.models import (
+    Workout,
+    Meal,
+    Weight,
+    Measurement,
+    Procedure,
+    WaterEntry,
+    WellbeingEntry,
+    ActivityAnalysisEntry,
+    Supplement,
+    SupplementEntry,
+)
+
+logger = logging.getLogger(__name__)
+
+# Тип календаря → модель со столбцами user_id и date (индекс ix_<table>_user_date)
+MONTH_DAY_MODELS = {
+    "workout": Workout,
+    "meal": Meal,
+    "weight": Weight,
+    "measurement": Measurement,
+    "procedure": Procedure,
+    "water": WaterEntry,
+    "wellbeing": WellbeingEntry,
+    "activity_analysis": ActivityAnalysisEntry,
+}
+
+CALENDAR_KINDS = (*MONTH_DAY_MODELS, "supplement")
+
+
+def month_bounds(year: int, month: int) -> tuple[date, date]:
+    """Первый и последний день месяца."""
+    _, days_in_month = calendar.monthrange(year, month)
+    return date(year, month, 1), date(year, month, days_in_month)
+
+
+class CalendarRepository:
+    """Репозиторий для отметок дней в календарях."""
+
+    @staticmethod
+    def get_month_days(kind: str, user_id: str, year: int, month: int) -> set[int]:
+        """
+        Возвращает дни месяца, в которые у пользователя есть записи типа kind.
+
+        Один запрос SELECT DISTINCT date по индексу (user_id, date) вместо
+        загрузки целых строк или запроса на каждый день месяца.
+        """
+        first_day, last_day = month_bounds(year, month)
+
+        if kind == "supplement":
+            return CalendarRepository._get_month_supplement_days(user_id, first_day, last_day)
+
+        model = MONTH_DAY_MODELS.get(kind)
+        if model is None:
+            raise ValueError(f"Неизвестный тип календаря: {kind}")
+
+        with get_db_session() as session:
+            rows = (
+                session.query(model.date)
+                .filter(
+                    model.user_id == str(user_id),
+                    model.date >= first_day,
+                    model.date <= last_day,
+                )
+                .distinct()
+                .all()
+            )
+            return {row[0].day for row in rows}
+
+    @staticmethod
+    def _get_month_supplement_days(user_id: str, first_day: date, last_day: date) -> set[int]:
+        """
+        Дни с отметками приёма добавок.
+
+        У записей только timestamp, поэтому выбираются отметки времени за месяц
+        (без строк добавок и их истории), а день берётся в Python. Учитываются
+        только записи существующих добавок пользователя — как в get_entries_for_period.
+        """
+        start = datetime.combine(first_day, time.min)
+        end = datetime.combine(last_day + timedelta(days=1), time.min)
+
+        with get_db_session() as session:
+            rows = (
+                session.query(SupplementEntry.timestamp)
+                .join(Supplement, Supplement.id == SupplementEntry.supplement_id)
+                .filter(
+                    SupplementEntry.user_id == str(user_id),
+                    Supplement.user_id == str(user_id),
+                    SupplementEntry.timestamp >= start,
+                    SupplementEntry.timestamp < end,
+                )
+                .distinct()
+                .all()
+            )
+            return {row[0].day for row in rows}
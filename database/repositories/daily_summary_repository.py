@@ -0,0 +1,40 @@
+"""Репозиторий дневных сводок пользователя."""
+import logging
+from datetime import date
+from typing import Optional
+
+from database.daily_summary import get_summary_user_ids, rebuild_daily_summaries
+from database.models import DailyUserSummary
+from database.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class DailySummaryRepository:
+    """Чтение и пересборка таблицы daily_user_summary (одна строка на день)."""
+
+    @staticmethod
+    def get_for_day(user_id: str, target_date: date) -> Optional[DailyUserSummary]:
+        """Сводка за день или None, если за день нет записей."""
+        with get_db_session() as session:
+            return (
+                session.query(DailyUserSummary)
+                .filter(DailyUserSummary.user_id == str(user_id))
+                .filter(DailyUserSummary.date == target_date)
+                .first()
+            )
+
+    @staticmethod
+    def rebuild(user_id: str) -> int:
+        """Пересобирает сводки пользователя из исходных записей. Возвращает число дней."""
+        with get_db_session() as session:
+            days = rebuild_daily_summaries(session, user_id)
+            session.commit()
+            logger.info(f"Rebuilt {days} daily summaries for user {user_id}")
+            return days
+
+    @staticmethod
+    def get_user_ids() -> list[str]:
+        """Пользователи, для которых есть данные для сводок."""
+        with get_db_session() as session:
+            return get_summary_user_ids(session)
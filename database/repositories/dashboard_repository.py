@@ -0,0 +1,61 @@
+"""Репозиторий данных главного экрана."""
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from database.models import DailyUserSummary, KbjuSettings, Measurement, Workout
+from database.session import bound_session, get_db_session
+from database.repositories.daily_summary_repository import DailySummaryRepository
+from database.repositories.meal_repository import MealRepository
+from database.repositories.weight_repository import WeightRepository
+from database.repositories.workout_repository import WorkoutRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DashboardSnapshot:
+    """Всё, что нужно главному меню и /start за один день."""
+
+    user_id: str
+    day: date
+    kbju_settings: Optional[KbjuSettings] = None
+    summary: Optional[DailyUserSummary] = None
+    workouts: list[Workout] = field(default_factory=list)
+    last_weight: Optional[float] = None
+    last_measurement: Optional[Measurement] = None
+
+    @property
+    def has_meals(self) -> bool:
+        return bool(self.summary and self.summary.meals_count)
+
+    @property
+    def water_ml(self) -> float:
+        return self.summary.water_ml if self.summary else 0.0
+
+
+class DashboardRepository:
+    """Загрузка DashboardSnapshot одной сессией."""
+
+    @staticmethod
+    def get_snapshot(user_id: str, day: Optional[date] = None) -> DashboardSnapshot:
+        """
+        Загружает данные главного экрана: норму КБЖУ, сводку дня, тренировки,
+        последний вес и замеры — пять запросов в одной сессии.
+
+        Методы репозиториев внутри получают ту же сессию через bound_session;
+        под run_in_async_session это сессия async-движка.
+        """
+        day = day or date.today()
+        with get_db_session() as session, bound_session(session):
+            last_measurements = WeightRepository.get_measurements(user_id, limit=1)
+            return DashboardSnapshot(
+                user_id=user_id,
+                day=day,
+                kbju_settings=MealRepository.get_kbju_settings(user_id),
+                summary=DailySummaryRepository.get_for_day(user_id, day),
+                workouts=WorkoutRepository.get_workouts_for_day(user_id, day),
+                last_weight=WeightRepository.get_last_weight(user_id),
+                last_measurement=last_measurements[0] if last_measurements else None,
+            )
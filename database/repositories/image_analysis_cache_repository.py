@@ -0,0 +1,93 @@
+"""Репозиторий кэша анализа изображений."""
+import json
+import logging
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import or_
+
+from database.models import ImageAnalysisCache
+from database.session import get_db_session
+from utils.image_hash import hamming_distance, hash_bands
+
+logger = logging.getLogger(__name__)
+
+
+def _touch(entry: ImageAnalysisCache) -> Any:
+    entry.hits = (entry.hits or 0) + 1
+    entry.last_used_at = datetime.utcnow()
+    return json.loads(entry.result_json)
+
+
+class ImageAnalysisCacheRepository:
+    """Репозиторий кэша результатов Gemini по изображениям."""
+
+    @staticmethod
+    def get_by_file_id(kind: str, file_unique_id: str) -> Optional[Any]:
+        """Возвращает сохранённый результат или None."""
+        with get_db_session() as session:
+            entry = (
+                session.query(ImageAnalysisCache)
+                .filter(ImageAnalysisCache.kind == kind)
+                .filter(ImageAnalysisCache.file_unique_id == file_unique_id)
+                .first()
+            )
+            if not entry:
+                return None
+            result = _touch(entry)
+            session.commit()
+            return result
+
+    @staticmethod
+    def find_similar(kind: str, phash: int, max_distance: int) -> Optional[Any]:
+        """
+        Ищет результат для изображения с похожим dHash (расстояние ≤ max_distance < 4).
+
+        Кандидаты выбираются по точному совпадению хотя бы одной 16-битной части хэша.
+        """
+        bands = hash_bands(phash)
+        with get_db_session() as session:
+            candidates = (
+                session.query(ImageAnalysisCache)
+                .filter(ImageAnalysisCache.kind == kind)
+                .filter(or_(
+                    ImageAnalysisCache.phash_band0 == bands[0],
+                    ImageAnalysisCache.phash_band1 == bands[1],
+                    ImageAnalysisCache.phash_band2 == bands[2],
+                    ImageAnalysisCache.phash_band3 == bands[3],
+                ))
+                .all()
+            )
+            best: Optional[ImageAnalysisCache] = None
+            best_distance = max_distance + 1
+            for entry in candidates:
+                distance = hamming_distance(phash, int(entry.phash, 16))
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+            if best is None:
+                return None
+            logger.debug(f"Similar image found for {kind}: distance {best_distance}")
+            result = _touch(best)
+            session.commit()
+            return result
+
+    @staticmethod
+    def save(kind: str, file_unique_id: str, phash: Optional[int], result: Any) -> None:
+        """Сохраняет результат анализа (перезаписывает запись с тем же file_unique_id)."""
+        with get_db_session() as session:
+            entry = (
+                session.query(ImageAnalysisCache)
+                .filter(ImageAnalysisCache.kind == kind)
+                .filter(ImageAnalysisCache.file_unique_id == file_unique_id)
+                .first()
+            )
+            if not entry:
+                entry = ImageAnalysisCache(kind=kind, file_unique_id=file_unique_id, hits=0)
+                session.add(entry)
+            if phash is not None:
+                bands = hash_bands(phash)
+                entry.phash = f"{phash:016x}"
+                entry.phash_band0, entry.phash_band1, entry.phash_band2, entry.phash_band3 = bands
+            entry.result_json = json.dumps(result, ensure_ascii=False)
+            entry.last_used_at = datetime.utcnow()
+            session.commit()
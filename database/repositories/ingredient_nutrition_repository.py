@@ -0,0 +1,86 @@
+"""Репозиторий справочника КБЖУ продуктов на 100 г."""
+import logging
+from datetime import datetime
+from typing import Iterable
+
+from database.models import IngredientNutrition
+from database.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+NUTRIENT_FIELDS = ("kcal", "protein", "fat", "carbs")
+
+
+class IngredientNutritionRepository:
+    """Репозиторий справочника продуктов (ключ — нормализованное название)."""
+
+    @staticmethod
+    def get_many(names: Iterable[str]) -> dict[str, dict]:
+        """Возвращает {название: {"kcal", "protein", "fat", "carbs"}} на 100 г для известных продуктов."""
+        names = list(set(names))
+        if not names:
+            return {}
+        with get_db_session() as session:
+            rows = (
+                session.query(IngredientNutrition)
+                .filter(IngredientNutrition.name.in_(names))
+                .all()
+            )
+            return {
+                row.name: {
+                    "kcal": row.kcal_100g,
+                    "protein": row.protein_100g,
+                    "fat": row.fat_100g,
+                    "carbs": row.carbs_100g,
+                }
+                for row in rows
+            }
+
+    @staticmethod
+    def upsert_many(entries: dict[str, dict], source: str, priority: int) -> None:
+        """
+        Сохраняет значения на 100 г.
+
+        Запись из более надёжного источника (priority выше) заменяет существующую,
+        из менее надёжного — игнорируется, из такого же — усредняется.
+        """
+        if not entries:
+            return
+        with get_db_session() as session:
+            existing = {
+                row.name: row
+                for row in session.query(IngredientNutrition)
+                .filter(IngredientNutrition.name.in_(list(entries)))
+                .all()
+            }
+            for name, per_100g in entries.items():
+                row = existing.get(name)
+                if row is None:
+                    session.add(IngredientNutrition(
+                        name=name,
+                        kcal_100g=per_100g["kcal"],
+                        protein_100g=per_100g["protein"],
+                        fat_100g=per_100g["fat"],
+                        carbs_100g=per_100g["carbs"],
+                        source=source,
+                        priority=priority,
+                        samples=1,
+                    ))
+                elif priority > row.priority:
+                    row.kcal_100g = per_100g["kcal"]
+                    row.protein_100g = per_100g["protein"]
+                    row.fat_100g = per_100g["fat"]
+                    row.carbs_100g = per_100g["carbs"]
+                    row.source = source
+                    row.priority = priority
+                    row.samples = 1
+                elif priority == row.priority:
+                    samples = row.samples or 1
+                    for field in NUTRIENT_FIELDS:
+                        column = f"{field}_100g"
+                        current = getattr(row, column) or 0.0
+                        setattr(row, column, (current * samples + per_100g[field]) / (samples + 1))
+                    row.samples = samples + 1
+                    row.updated_at = datetime.utcnow()
+            session.commit()
+            logger.debug(f"Upserted {len(entries)} ingredients from {source}")
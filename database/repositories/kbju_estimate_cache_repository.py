@@ -0,0 +1,69 @@
+"""Репозиторий кэша оценок КБЖУ."""
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from database.models import KbjuEstimateCache
+from database.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class KbjuEstimateCacheRepository:
+    """Репозиторий кэша оценок КБЖУ по нормализованному тексту."""
+
+    @staticmethod
+    def get_and_touch(text_hash: str) -> Optional[dict]:
+        """Возвращает сохранённую оценку и отмечает обращение (для LRU-вытеснения)."""
+        with get_db_session() as session:
+            entry = (
+                session.query(KbjuEstimateCache)
+                .filter(KbjuEstimateCache.text_hash == text_hash)
+                .first()
+            )
+            if not entry:
+                return None
+            entry.hits = (entry.hits or 0) + 1
+            entry.last_used_at = datetime.utcnow()
+            session.commit()
+            return json.loads(entry.result_json)
+
+    @staticmethod
+    def save(text_hash: str, normalized_text: str, result: dict) -> None:
+        """Сохраняет оценку (или обновляет существующую)."""
+        with get_db_session() as session:
+            entry = (
+                session.query(KbjuEstimateCache)
+                .filter(KbjuEstimateCache.text_hash == text_hash)
+                .first()
+            )
+            if not entry:
+                entry = KbjuEstimateCache(text_hash=text_hash, hits=0)
+                session.add(entry)
+            entry.normalized_text = normalized_text
+            entry.result_json = json.dumps(result, ensure_ascii=False)
+            entry.last_used_at = datetime.utcnow()
+            session.commit()
+
+    @staticmethod
+    def evict_least_recently_used(max_entries: int) -> int:
+        """Удаляет самые давно использованные записи сверх max_entries. Возвращает число удалённых."""
+        with get_db_session() as session:
+            total = session.query(KbjuEstimateCache).count()
+            excess = total - max_entries
+            if excess <= 0:
+                return 0
+            stale_ids = [
+                row.id
+                for row in session.query(KbjuEstimateCache.id)
+                .order_by(KbjuEstimateCache.last_used_at.asc())
+                .limit(excess)
+                .all()
+            ]
+            session.query(KbjuEstimateCache).filter(
+                KbjuEstimateCache.id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+            session.commit()
+            logger.info(f"Evicted {len(stale_ids)} KBJU estimate cache entries")
+            return len(stale_ids)
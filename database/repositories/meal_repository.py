@@ -4,6 +4,7 @@ from datetime import date
 from typing import Optional
 from sqlalchemy import func
 from database.session import get_db_session
+from database.daily_summary import refresh_daily_summary
 from database.models import Meal, KbjuSettings
 
 logger = logging.getLogger(__name__)
@@ -40,6 +41,7 @@ class MealRepository:
                 api_details=api_details,
             )
             session.add(meal)
+            refresh_daily_summary(session, user_id, entry_date)
             session.commit()
             session.refresh(meal)
             logger.info(f"Saved meal {meal.id} for user {user_id}")
@@ -83,6 +85,42 @@ class MealRepository:
                 "carbohydrates_total_g": float(result.carbs) if result.carbs else 0.0,  # Для совместимости
             }
     
+    @staticmethod
+    def get_daily_totals_for_period(user_id: str, start_date: date, end_date: date) -> dict[date, dict]:
+        """
+        Получает суммарные КБЖУ по дням за период одним запросом (GROUP BY date).
+
+        Возвращает {дата: {"calories", "protein", "fat", "carbs", "meals"}} только
+        для дней, где есть приёмы пищи; "meals" — количество записей за день.
+        """
+        with get_db_session() as session:
+            rows = (
+                session.query(
+                    Meal.date,
+                    func.sum(Meal.calories).label("calories"),
+                    func.sum(Meal.protein).label("protein"),
+                    func.sum(Meal.fat).label("fat"),
+                    func.sum(Meal.carbs).label("carbs"),
+                    func.count(Meal.id).label("meals"),
+                )
+                .filter(Meal.user_id == user_id)
+                .filter(Meal.date >= start_date)
+                .filter(Meal.date <= end_date)
+                .group_by(Meal.date)
+                .order_by(Meal.date)
+                .all()
+            )
+            return {
+                row.date: {
+                    "calories": float(row.calories or 0),
+                    "protein": float(row.protein or 0),
+                    "fat": float(row.fat or 0),
+                    "carbs": float(row.carbs or 0),
+                    "meals": row.meals,
+                }
+                for row in rows
+            }
+    
     @staticmethod
     def delete_meal(meal_id: int, user_id: str) -> bool:
         """Удаляет приём пищи."""
@@ -95,6 +133,7 @@ class MealRepository:
             )
             if meal:
                 session.delete(meal)
+                refresh_daily_summary(session, user_id, meal.date)
                 session.commit()
                 logger.info(f"Deleted meal {meal_id} for user {user_id}")
                 return True
@@ -152,6 +191,7 @@ class MealRepository:
                     meal.products_json = products_json
                 if api_details:
                     meal.api_details = api_details
+                refresh_daily_summary(session, user_id, meal.date)
                 session.commit()
                 logger.info(f"Updated meal {meal_id} for user {user_id}")
                 return True
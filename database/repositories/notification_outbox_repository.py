@@ -0,0 +1,113 @@
+"""Репозиторий журнала уведомлений (notification_outbox)."""
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from config import NOTIFICATION_CLAIM_TIMEOUT_MINUTES
+from database.models import NotificationOutbox
+from database.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+class NotificationOutboxRepository:
+    """Захват уведомлений перед отправкой и отметка результата."""
+
+    @staticmethod
+    def claim(kind: str, items: Iterable[tuple[str, str]]) -> list[tuple[str, str]]:
+        """
+        Забирает уведомления (user_id, slot) вида kind для отправки.
+
+        Возвращает только те пары, которые достались этому вызову: уже
+        отправленные или забранные другим воркером пропускаются. Вставка идёт
+        через INSERT … ON CONFLICT DO NOTHING, поэтому параллельные воркеры
+        не получат одну строку дважды. Забранные, но не отправленные дольше
+        NOTIFICATION_CLAIM_TIMEOUT_MINUTES (воркер упал) забираются заново.
+        """
+        items = list(dict.fromkeys((str(user_id), slot) for user_id, slot in items))
+        if not items:
+            return []
+
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        rows = [
+            {"user_id": user_id, "kind": kind, "slot": slot, "status": "pending",
+             "claim_token": token, "claimed_at": now}
+            for user_id, slot in items
+        ]
+        keys = tuple_(NotificationOutbox.user_id, NotificationOutbox.slot).in_(items)
+
+        with get_db_session() as session:
+            insert = _INSERTS.get(session.get_bind().dialect.name)
+            if insert is not None:
+                session.execute(insert(NotificationOutbox).values(rows).on_conflict_do_nothing())
+            else:
+                existing = {
+                    (row.user_id, row.slot)
+                    for row in session.query(NotificationOutbox.user_id, NotificationOutbox.slot)
+                    .filter(NotificationOutbox.kind == kind, keys)
+                }
+                session.bulk_insert_mappings(
+                    NotificationOutbox,
+                    [row for row in rows if (row["user_id"], row["slot"]) not in existing],
+                )
+
+            stale_before = now - timedelta(minutes=NOTIFICATION_CLAIM_TIMEOUT_MINUTES)
+            session.query(NotificationOutbox).filter(
+                NotificationOutbox.kind == kind,
+                keys,
+                NotificationOutbox.status == "pending",
+                NotificationOutbox.claimed_at < stale_before,
+            ).update(
+                {NotificationOutbox.claim_token: token, NotificationOutbox.claimed_at: now},
+                synchronize_session=False,
+            )
+
+            claimed = {
+                (row.user_id, row.slot)
+                for row in session.query(NotificationOutbox.user_id, NotificationOutbox.slot)
+                .filter(NotificationOutbox.kind == kind, NotificationOutbox.claim_token == token)
+            }
+            session.commit()
+        return [item for item in items if item in claimed]
+
+    @staticmethod
+    def mark(kind: str, items: Iterable[tuple[str, str]], sent: bool) -> None:
+        """Отмечает забранные уведомления отправленными (sent=True) или неудачными."""
+        items = [(str(user_id), slot) for user_id, slot in items]
+        if not items:
+            return
+        with get_db_session() as session:
+            session.query(NotificationOutbox).filter(
+                NotificationOutbox.kind == kind,
+                tuple_(NotificationOutbox.user_id, NotificationOutbox.slot).in_(items),
+            ).update(
+                {
+                    NotificationOutbox.status: "sent" if sent else "failed",
+                    NotificationOutbox.sent_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+            session.commit()
+
+    @staticmethod
+    def purge_older_than(days: int) -> int:
+        """Удаляет записи журнала старше days дней. Возвращает число удалённых."""
+        with get_db_session() as session:
+            deleted = session.query(NotificationOutbox).filter(
+                NotificationOutbox.claimed_at < datetime.utcnow() - timedelta(days=days)
+            ).delete(synchronize_session=False)
+            session.commit()
+        if deleted:
+            logger.info(f"Удалено записей журнала уведомлений: {deleted}")
+        return deleted
@@ -1,8 +1,8 @@
 """Репозиторий для работы с процедурами."""
 import logging
-import calendar
 from datetime import date
-from typing import Optional, List, Set
+from typing import Optional, List, Dict
+from sqlalchemy import func
 from database.session import get_db_session
 from database.models import Procedure
 
@@ -24,23 +24,21 @@ class ProcedureRepository:
             )
     
     @staticmethod
-    def get_month_procedure_days(user_id: str, year: int, month: int) -> Set[int]:
-        """Получает дни месяца, в которые были процедуры."""
-        first_day = date(year, month, 1)
-        _, days_in_month = calendar.monthrange(year, month)
-        last_day = date(year, month, days_in_month)
-        
+    def get_daily_counts_for_period(user_id: str, start_date: date, end_date: date) -> Dict[date, int]:
+        """Получает количество процедур по дням за период одним запросом (GROUP BY date)."""
         with get_db_session() as session:
-            procedures = (
-                session.query(Procedure.date)
+            rows = (
+                session.query(Procedure.date, func.count(Procedure.id))
                 .filter(
                     Procedure.user_id == user_id,
-                    Procedure.date >= first_day,
-                    Procedure.date <= last_day,
+                    Procedure.date >= start_date,
+                    Procedure.date <= end_date,
                 )
+                .group_by(Procedure.date)
+                .order_by(Procedure.date)
                 .all()
             )
-            return {p.date.day for p in procedures}
+            return {entry_date: count for entry_date, count in rows}
     
     @staticmethod
     def save_procedure(user_id: str, name: str, entry_date: date, notes: Optional[str] = None) -> Optional[int]:
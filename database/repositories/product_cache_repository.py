@@ -0,0 +1,42 @@
+"""Репозиторий кэша продуктов по штрих-коду."""
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from database.models import ProductCache
+from database.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class ProductCacheRepository:
+    """Репозиторий кэша продуктов Open Food Facts."""
+
+    @staticmethod
+    def get_entry(barcode: str) -> Optional[ProductCache]:
+        """Возвращает запись кэша по штрих-коду (свежесть проверяет вызывающий код)."""
+        with get_db_session() as session:
+            return (
+                session.query(ProductCache)
+                .filter(ProductCache.barcode == barcode)
+                .first()
+            )
+
+    @staticmethod
+    def save_entry(barcode: str, product: Optional[dict]) -> None:
+        """Сохраняет продукт в кэш; product=None означает «не найден»."""
+        with get_db_session() as session:
+            entry = (
+                session.query(ProductCache)
+                .filter(ProductCache.barcode == barcode)
+                .first()
+            )
+            if not entry:
+                entry = ProductCache(barcode=barcode)
+                session.add(entry)
+            entry.found = product is not None
+            entry.product_json = json.dumps(product, ensure_ascii=False) if product is not None else None
+            entry.fetched_at = datetime.utcnow()
+            session.commit()
+            logger.debug(f"Cached product {barcode} (found={entry.found})")
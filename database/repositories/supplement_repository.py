@@ -1,20 +1,74 @@
 """Репозиторий для работы с добавками."""
 import json
 import logging
-from datetime import date, datetime
-from typing import Optional, List, Dict
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Optional, List, Dict
 from database.session import get_db_session
-from database.models import Supplement, SupplementEntry
+from database.models import Supplement, SupplementEntry, User
 
 logger = logging.getLogger(__name__)
 
+# Слушатель изменений расписания: (supplement_id, добавка или None, если удалена)
+SupplementChangeListener = Callable[[int, Optional[Dict]], None]
+
 
 class SupplementRepository:
     """Репозиторий для работы с добавками."""
     
+    _change_listeners: List[SupplementChangeListener] = []
+    
+    @staticmethod
+    def add_change_listener(listener: SupplementChangeListener) -> None:
+        """Подписывает на сохранение и удаление добавок (например, индекс напоминаний)."""
+        SupplementRepository._change_listeners.append(listener)
+    
+    @staticmethod
+    def notify_change(supplement_id: int, supplement: Optional[Dict]) -> None:
+        """Сообщает слушателям об изменении добавки. Вызывать после commit."""
+        for listener in SupplementRepository._change_listeners:
+            try:
+                listener(supplement_id, supplement)
+            except Exception as e:
+                logger.error(f"Error in supplement change listener: {e}", exc_info=True)
+    
+    @staticmethod
+    def _to_dict(sup: Supplement, history: Optional[List[Dict]] = None) -> Dict:
+        """Добавка в формате, который используют обработчики."""
+        notifications_enabled = True
+        try:
+            if hasattr(sup, 'notifications_enabled'):
+                notifications_enabled = sup.notifications_enabled
+        except (AttributeError, KeyError):
+            notifications_enabled = True
+        
+        result = {
+            "id": sup.id,
+            "name": sup.name,
+            "times": json.loads(sup.times_json or "[]"),
+            "days": json.loads(sup.days_json or "[]"),
+            "duration": sup.duration or "постоянно",
+            "ready": True,
+            "notifications_enabled": notifications_enabled,
+        }
+        if history is not None:
+            result["history"] = history
+        return result
+    
+    @staticmethod
+    def _entry_to_dict(entry: SupplementEntry) -> Dict:
+        return {
+            "id": entry.id,
+            "timestamp": entry.timestamp,
+            "amount": entry.amount,
+        }
+    
     @staticmethod
     def get_supplements(user_id: str) -> List[Dict]:
-        """Получает все добавки пользователя с их историей."""
+        """
+        Получает все добавки пользователя с их полной историей.
+
+        Для списков и выбора добавки используйте get_supplement_list — без истории.
+        """
         with get_db_session() as session:
             supplements = session.query(Supplement).filter_by(user_id=user_id).all()
             ids = [sup.id for sup in supplements]
@@ -31,33 +85,65 @@ class SupplementRepository:
                     .all()
                 )
                 for entry in all_entries:
-                    entries_map.setdefault(entry.supplement_id, []).append({
-                        "id": entry.id,
-                        "timestamp": entry.timestamp,
-                        "amount": entry.amount,
-                    })
-            
-            result: List[Dict] = []
-            for sup in supplements:
-                notifications_enabled = True
-                try:
-                    if hasattr(sup, 'notifications_enabled'):
-                        notifications_enabled = sup.notifications_enabled
-                except (AttributeError, KeyError):
-                    notifications_enabled = True
-                
-                result.append({
-                    "id": sup.id,
-                    "name": sup.name,
-                    "times": json.loads(sup.times_json or "[]"),
-                    "days": json.loads(sup.days_json or "[]"),
-                    "duration": sup.duration or "постоянно",
-                    "history": entries_map.get(sup.id, []).copy(),
-                    "ready": True,
-                    "notifications_enabled": notifications_enabled,
-                })
+                    entries_map.setdefault(entry.supplement_id, []).append(
+                        SupplementRepository._entry_to_dict(entry)
+                    )
             
-            return result
+            return [
+                SupplementRepository._to_dict(sup, entries_map.get(sup.id, []).copy())
+                for sup in supplements
+            ]
+    
+    @staticmethod
+    def get_supplement_list(user_id: str) -> List[Dict]:
+        """Получает добавки пользователя без истории приёмов (один запрос)."""
+        with get_db_session() as session:
+            supplements = (
+                session.query(Supplement)
+                .filter_by(user_id=user_id)
+                .order_by(Supplement.id.asc())
+                .all()
+            )
+            return [SupplementRepository._to_dict(sup) for sup in supplements]
+    
+    @staticmethod
+    def get_supplement_history(user_id: str, supplement_id: int) -> List[Dict]:
+        """Получает историю приёмов одной добавки."""
+        with get_db_session() as session:
+            entries = (
+                session.query(SupplementEntry)
+                .filter(
+                    SupplementEntry.user_id == user_id,
+                    SupplementEntry.supplement_id == supplement_id,
+                )
+                .order_by(SupplementEntry.timestamp.asc())
+                .all()
+            )
+            return [SupplementRepository._entry_to_dict(entry) for entry in entries]
+    
+    @staticmethod
+    def get_notification_schedule(user_id: Optional[str] = None) -> List[Dict]:
+        """
+        Добавки с включёнными напоминаниями — для индекса расписания.
+
+        В каждой добавке есть timezone пользователя (None — пояс по умолчанию).
+        """
+        with get_db_session() as session:
+            query = (
+                session.query(Supplement, User.timezone)
+                .outerjoin(User, User.user_id == Supplement.user_id)
+                .filter(Supplement.notifications_enabled.is_(True))
+            )
+            if user_id is not None:
+                query = query.filter(Supplement.user_id == user_id)
+            return [
+                SupplementRepository._to_schedule_dict(sup, timezone)
+                for sup, timezone in query.all()
+            ]
+    
+    @staticmethod
+    def _to_schedule_dict(sup: Supplement, timezone: Optional[str]) -> Dict:
+        return {"user_id": sup.user_id, "timezone": timezone, **SupplementRepository._to_dict(sup)}
     
     @staticmethod
     def save_supplement(user_id: str, payload: Dict, supplement_id: Optional[int] = None) -> Optional[int]:
@@ -80,6 +166,8 @@ class SupplementRepository:
             session.add(sup)
             session.commit()
             session.refresh(sup)
+            timezone = session.query(User.timezone).filter(User.user_id == user_id).scalar()
+            SupplementRepository.notify_change(sup.id, SupplementRepository._to_schedule_dict(sup, timezone))
             return sup.id
     
     @staticmethod
@@ -90,8 +178,10 @@ class SupplementRepository:
                 session.query(SupplementEntry).filter_by(
                     user_id=user_id, supplement_id=supplement_id
                 ).delete()
-                session.query(Supplement).filter_by(id=supplement_id, user_id=user_id).delete()
+                deleted = session.query(Supplement).filter_by(id=supplement_id, user_id=user_id).delete()
                 session.commit()
+                if deleted:
+                    SupplementRepository.notify_change(supplement_id, None)
                 return True
             except Exception as e:
                 logger.error(f"Error deleting supplement: {e}", exc_info=True)
@@ -126,41 +216,69 @@ class SupplementRepository:
                 session.rollback()
                 return False
     
+    @staticmethod
+    def get_entries_for_period(user_id: str, start_date: date, end_date: date) -> List[Dict]:
+        """
+        Получает записи приёма добавок за период (включительно) одним запросом
+        по индексу (user_id, timestamp). Только записи существующих добавок.
+        """
+        start = datetime.combine(start_date, time.min)
+        end = datetime.combine(end_date + timedelta(days=1), time.min)
+        
+        with get_db_session() as session:
+            rows = (
+                session.query(SupplementEntry, Supplement.name)
+                .join(Supplement, Supplement.id == SupplementEntry.supplement_id)
+                .filter(
+                    SupplementEntry.user_id == user_id,
+                    Supplement.user_id == user_id,
+                    SupplementEntry.timestamp >= start,
+                    SupplementEntry.timestamp < end,
+                )
+                .order_by(SupplementEntry.timestamp.asc(), SupplementEntry.id.asc())
+                .all()
+            )
+            return [
+                {
+                    **SupplementRepository._entry_to_dict(entry),
+                    "supplement_id": entry.supplement_id,
+                    "supplement_name": name or "Добавка",
+                }
+                for entry, name in rows
+            ]
+    
     @staticmethod
     def get_entries_for_day(user_id: str, target_date: date) -> List[Dict]:
         """Получает записи приёма добавок за день."""
-        supplements = SupplementRepository.get_supplements(user_id)
         result = []
-        
-        for sup_idx, sup in enumerate(supplements):
-            for entry_idx, entry in enumerate(sup.get("history", [])):
-                entry_date = entry["timestamp"].date() if isinstance(entry["timestamp"], datetime) else entry["timestamp"]
-                if entry_date == target_date:
-                    time_text = entry["timestamp"].strftime("%H:%M") if isinstance(entry["timestamp"], datetime) else ""
-                    amount_text = f" ({entry['amount']})" if entry.get("amount") else ""
-                    result.append({
-                        "supplement_name": sup.get("name", "Добавка"),
-                        "supplement_index": sup_idx,
-                        "entry_index": entry_idx,
-                        "entry_id": entry["id"],
-                        "time_text": time_text,
-                        "amount": entry.get("amount"),
-                        "amount_text": amount_text,
-                    })
-        
+        for entry in SupplementRepository.get_entries_for_period(user_id, target_date, target_date):
+            amount_text = f" ({entry['amount']})" if entry.get("amount") else ""
+            result.append({
+                "supplement_name": entry["supplement_name"],
+                "supplement_id": entry["supplement_id"],
+                "entry_id": entry["id"],
+                "timestamp": entry["timestamp"],
+                "time_text": entry["timestamp"].strftime("%H:%M"),
+                "amount": entry.get("amount"),
+                "amount_text": amount_text,
+            })
         return result
     
     @staticmethod
-    def get_history_days(user_id: str, year: int, month: int) -> set:
-        """Получает дни месяца, в которые были записи приёма добавок."""
-        supplements = SupplementRepository.get_supplements(user_id)
-        days = set()
-        
-        for sup in supplements:
-            for entry in sup.get("history", []):
-                timestamp = entry["timestamp"]
-                if isinstance(timestamp, datetime):
-                    if timestamp.year == year and timestamp.month == month:
-                        days.add(timestamp.day)
-        
-        return days
+    def get_entry(user_id: str, entry_id: int) -> Optional[Dict]:
+        """Получает запись приёма с названием добавки."""
+        with get_db_session() as session:
+            row = (
+                session.query(SupplementEntry, Supplement.name)
+                .join(Supplement, Supplement.id == SupplementEntry.supplement_id)
+                .filter(SupplementEntry.id == entry_id, SupplementEntry.user_id == user_id)
+                .first()
+            )
+            if not row:
+                return None
+            entry, name = row
+            return {
+                **SupplementRepository._entry_to_dict(entry),
+                "supplement_id": entry.supplement_id,
+                "supplement_name": name or "Добавка",
+            }
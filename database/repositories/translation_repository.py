@@ -0,0 +1,54 @@
+"""Репозиторий словаря переводов."""
+import logging
+from typing import Iterable
+
+from database.models import Translation
+from database.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationRepository:
+    """Репозиторий сохранённых переводов."""
+
+    @staticmethod
+    def get_translations(source_lang: str, target_lang: str, texts: Iterable[str]) -> dict[str, str]:
+        """Возвращает {исходный текст: перевод} для уже известных текстов."""
+        texts = list(set(texts))
+        if not texts:
+            return {}
+        with get_db_session() as session:
+            rows = (
+                session.query(Translation.source_text, Translation.translated_text)
+                .filter(Translation.source_lang == source_lang)
+                .filter(Translation.target_lang == target_lang)
+                .filter(Translation.source_text.in_(texts))
+                .all()
+            )
+            return {row.source_text: row.translated_text for row in rows}
+
+    @staticmethod
+    def save_translations(source_lang: str, target_lang: str, translations: dict[str, str]) -> None:
+        """Добавляет новые переводы, пропуская уже сохранённые."""
+        if not translations:
+            return
+        with get_db_session() as session:
+            existing = {
+                row.source_text
+                for row in session.query(Translation.source_text)
+                .filter(Translation.source_lang == source_lang)
+                .filter(Translation.target_lang == target_lang)
+                .filter(Translation.source_text.in_(list(translations)))
+                .all()
+            }
+            for source_text, translated_text in translations.items():
+                if source_text in existing:
+                    continue
+                session.add(Translation(
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    source_text=source_text,
+                    translated_text=translated_text,
+                ))
+            session.commit()
+            logger.debug(f"Saved {len(translations) - len(existing)} translations {source_lang}->{target_lang}")
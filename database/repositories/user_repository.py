@@ -0,0 +1,48 @@
+"""Репозиторий для работы с пользователями."""
+import logging
+from typing import Optional
+
+from config import DEFAULT_TIMEZONE
+from database.models import User
+from database.session import get_db_session
+from database.repositories.supplement_repository import SupplementRepository
+
+logger = logging.getLogger(__name__)
+
+
+class UserRepository:
+    """Репозиторий для работы с пользователями."""
+
+    @staticmethod
+    def get_timezone(user_id: str) -> Optional[str]:
+        """Часовой пояс пользователя или None, если не выбран."""
+        with get_db_session() as session:
+            return session.query(User.timezone).filter(User.user_id == str(user_id)).scalar()
+
+    @staticmethod
+    def set_timezone(user_id: str, timezone: str) -> None:
+        """
+        Сохраняет часовой пояс пользователя.
+
+        Время напоминаний о добавках задано в местном времени, поэтому после
+        смены пояса их слоты в индексе расписания пересчитываются.
+        """
+        with get_db_session() as session:
+            updated = (
+                session.query(User)
+                .filter(User.user_id == str(user_id))
+                .update({User.timezone: timezone})
+            )
+            if not updated:
+                session.add(User(user_id=str(user_id), timezone=timezone))
+            session.commit()
+
+        for supplement in SupplementRepository.get_notification_schedule(user_id):
+            SupplementRepository.notify_change(supplement["id"], supplement)
+
+    @staticmethod
+    def get_timezones() -> list[str]:
+        """Часовые пояса, в которых есть пользователи (не выбранный — DEFAULT_TIMEZONE)."""
+        with get_db_session() as session:
+            rows = session.query(User.timezone).distinct().all()
+            return sorted({row[0] or DEFAULT_TIMEZONE for row in rows})
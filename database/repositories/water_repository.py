@@ -1,10 +1,10 @@
 """Репозиторий для работы с водой."""
 import logging
-import calendar
 from datetime import date, datetime
 from typing import Optional
 from sqlalchemy import func
 from database.session import get_db_session
+from database.daily_summary import refresh_daily_summary
 from database.models import WaterEntry
 
 logger = logging.getLogger(__name__)
@@ -29,6 +29,7 @@ class WaterRepository:
                 timestamp=timestamp or datetime.utcnow(),
             )
             session.add(entry)
+            refresh_daily_summary(session, user_id, entry_date)
             session.commit()
             session.refresh(entry)
             logger.info(f"Saved water entry {entry.id} for user {user_id}")
@@ -46,6 +47,21 @@ class WaterRepository:
             )
             return float(result) if result else 0.0
     
+    @staticmethod
+    def get_daily_totals_for_period(user_id: str, start_date: date, end_date: date) -> dict[date, float]:
+        """Получает количество воды по дням за период одним запросом (GROUP BY date)."""
+        with get_db_session() as session:
+            rows = (
+                session.query(WaterEntry.date, func.sum(WaterEntry.amount))
+                .filter(WaterEntry.user_id == user_id)
+                .filter(WaterEntry.date >= start_date)
+                .filter(WaterEntry.date <= end_date)
+                .group_by(WaterEntry.date)
+                .order_by(WaterEntry.date)
+                .all()
+            )
+            return {entry_date: float(total) for entry_date, total in rows if total}
+    
     @staticmethod
     def get_entries_for_day(user_id: str, target_date: date) -> list[WaterEntry]:
         """Получает записи воды за день."""
@@ -70,25 +86,6 @@ class WaterRepository:
                 .all()
             )
 
-    @staticmethod
-    def get_month_water_days(user_id: str, year: int, month: int) -> set[int]:
-        """Получает дни месяца, в которые была вода."""
-        first_day = date(year, month, 1)
-        _, days_in_month = calendar.monthrange(year, month)
-        last_day = date(year, month, days_in_month)
-
-        with get_db_session() as session:
-            entries = (
-                session.query(WaterEntry.date)
-                .filter(
-                    WaterEntry.user_id == user_id,
-                    WaterEntry.date >= first_day,
-                    WaterEntry.date <= last_day,
-                )
-                .all()
-            )
-            return {entry.date.day for entry in entries}
-    
     @staticmethod
     def delete_entry(entry_id: int, user_id: str) -> bool:
         """Удаляет запись воды."""
@@ -101,6 +98,7 @@ class WaterRepository:
             )
             if entry:
                 session.delete(entry)
+                refresh_daily_summary(session, user_id, entry.date)
                 session.commit()
                 logger.info(f"Deleted water entry {entry_id} for user {user_id}")
                 return True
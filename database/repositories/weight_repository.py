@@ -1,10 +1,12 @@
 """Репозиторий для работы с весом и замерами."""
 import logging
-import calendar
+from bisect import bisect_right
 from datetime import date, timedelta
-from typing import Optional, Set
+from typing import Iterable, Optional
+from sqlalchemy import func
 from database.session import get_db_session
 from database.models import Weight, Measurement
+from utils.validators import parse_weight
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,7 @@ class WeightRepository:
             weight = Weight(
                 user_id=user_id,
                 value=value,
+                value_kg=parse_weight(str(value)),
                 date=entry_date,
             )
             session.add(weight)
@@ -40,20 +43,6 @@ class WeightRepository:
                 query = query.limit(limit)
             return query.all()
     
-    @staticmethod
-    def get_weights_for_date_range(user_id: str, start_date: Optional[date], end_date: Optional[date]) -> list[Weight]:
-        """Получает веса за указанный период."""
-        with get_db_session() as session:
-            query = (
-                session.query(Weight)
-                .filter(Weight.user_id == user_id)
-            )
-            if start_date:
-                query = query.filter(Weight.date >= start_date)
-            if end_date:
-                query = query.filter(Weight.date <= end_date)
-            return query.order_by(Weight.date.desc(), Weight.id.desc()).all()
-    
     @staticmethod
     def get_weights_for_period(user_id: str, period: str) -> list[dict]:
         """Получает веса за период."""
@@ -69,40 +58,127 @@ class WeightRepository:
             start_date = date(2000, 1, 1)
         
         with get_db_session() as session:
-            weights = (
-                session.query(Weight)
+            rows = (
+                session.query(Weight.date, Weight.value_kg)
                 .filter(Weight.user_id == user_id)
                 .filter(Weight.date >= start_date)
+                .filter(Weight.value_kg.isnot(None))
                 .order_by(Weight.date.asc())
                 .all()
             )
         
-        result = []
-        for w in weights:
-            try:
-                value = float(str(w.value).replace(",", "."))
-                result.append({"date": w.date, "value": value})
-            except (ValueError, TypeError):
-                continue
-        
-        return result
+        return [{"date": entry_date, "value": value} for entry_date, value in rows]
     
     @staticmethod
     def get_last_weight(user_id: str) -> Optional[float]:
         """Получает последний вес пользователя в кг."""
         with get_db_session() as session:
-            weight = (
-                session.query(Weight)
+            return (
+                session.query(Weight.value_kg)
                 .filter(Weight.user_id == user_id)
-                .order_by(Weight.date.desc())
-                .first()
+                .filter(Weight.value_kg.isnot(None))
+                .order_by(Weight.date.desc(), Weight.id.desc())
+                .limit(1)
+                .scalar()
             )
-            if weight:
-                try:
-                    return float(str(weight.value).replace(",", "."))
-                except (ValueError, TypeError):
-                    return None
+    
+    @staticmethod
+    def get_weights_as_of(user_id: str, dates: Iterable[date]) -> dict[date, float]:
+        """
+        Вес пользователя на каждую из дат одним запросом.
+
+        Для даты берётся последняя запись не позже неё; для дат раньше первой
+        записи — первая известная. Дат нет в результате, если вес не записан вовсе.
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return {}
+
+        with get_db_session() as session:
+            query = (
+                session.query(Weight.date, Weight.value_kg)
+                .filter(Weight.user_id == user_id)
+                .filter(Weight.value_kg.isnot(None))
+                .order_by(Weight.date.asc(), Weight.id.asc())
+            )
+            history = query.filter(Weight.date <= dates[-1]).all() or query.limit(1).all()
+
+        if not history:
+            return {}
+
+        history_dates = [day for day, _ in history]
+        result = {}
+        for target in dates:
+            index = max(bisect_right(history_dates, target) - 1, 0)
+            result[target] = history[index][1]
+        return result
+    
+    @staticmethod
+    def get_weight_stats(
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Optional[dict]:
+        """
+        Минимальный, максимальный и средний вес за период (или за всё время)
+        одним агрегатным запросом. None, если записей нет.
+        """
+        with get_db_session() as session:
+            query = (
+                session.query(
+                    func.min(Weight.value_kg),
+                    func.max(Weight.value_kg),
+                    func.avg(Weight.value_kg),
+                    func.count(Weight.value_kg),
+                )
+                .filter(Weight.user_id == user_id)
+            )
+            if start_date:
+                query = query.filter(Weight.date >= start_date)
+            if end_date:
+                query = query.filter(Weight.date <= end_date)
+            min_kg, max_kg, avg_kg, count = query.one()
+
+        if not count:
             return None
+        return {"min": min_kg, "max": max_kg, "avg": float(avg_kg), "count": count}
+
+    @staticmethod
+    def get_moving_average(
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        window: int = 7,
+    ) -> list[dict]:
+        """
+        Скользящее среднее веса по последним window записям (оконная функция в SQL).
+
+        Окно считается по всей истории, поэтому первые точки периода учитывают
+        и записи до start_date. Возвращает [{"date", "value", "avg"}] по возрастанию даты.
+        """
+        with get_db_session() as session:
+            moving_avg = func.avg(Weight.value_kg).over(
+                order_by=(Weight.date, Weight.id),
+                rows=(-(window - 1), 0),
+            )
+            history = (
+                session.query(
+                    Weight.date.label("date"),
+                    Weight.value_kg.label("value"),
+                    moving_avg.label("avg"),
+                )
+                .filter(Weight.user_id == user_id)
+                .filter(Weight.value_kg.isnot(None))
+                .filter(Weight.date <= end_date)
+                .subquery()
+            )
+            rows = (
+                session.query(history.c.date, history.c.value, history.c.avg)
+                .filter(history.c.date >= start_date)
+                .order_by(history.c.date)
+                .all()
+            )
+        return [{"date": day, "value": value, "avg": float(avg)} for day, value, avg in rows]
     
     @staticmethod
     def update_weight(weight_id: int, user_id: str, value: str) -> bool:
@@ -116,6 +192,7 @@ class WeightRepository:
             )
             if weight:
                 weight.value = value
+                weight.value_kg = parse_weight(str(value))
                 session.commit()
                 logger.info(f"Updated weight {weight_id} for user {user_id}")
                 return True
@@ -223,25 +300,6 @@ class WeightRepository:
                 .first()
             )
     
-    @staticmethod
-    def get_month_weight_days(user_id: str, year: int, month: int) -> Set[int]:
-        """Получает дни месяца, в которые был записан вес."""
-        first_day = date(year, month, 1)
-        _, days_in_month = calendar.monthrange(year, month)
-        last_day = date(year, month, days_in_month)
-        
-        with get_db_session() as session:
-            weights = (
-                session.query(Weight.date)
-                .filter(
-                    Weight.user_id == user_id,
-                    Weight.date >= first_day,
-                    Weight.date <= last_day,
-                )
-                .all()
-            )
-            return {w.date.day for w in weights}
-
     @staticmethod
     def get_measurement_for_date(user_id: str, target_date: date) -> Optional[Measurement]:
         """Получает замеры за конкретный день."""
@@ -252,22 +310,3 @@ class WeightRepository:
                 .order_by(Measurement.id.desc())
                 .first()
             )
-
-    @staticmethod
-    def get_month_measurement_days(user_id: str, year: int, month: int) -> Set[int]:
-        """Получает дни месяца, в которые были замеры."""
-        first_day = date(year, month, 1)
-        _, days_in_month = calendar.monthrange(year, month)
-        last_day = date(year, month, days_in_month)
-
-        with get_db_session() as session:
-            measurements = (
-                session.query(Measurement.date)
-                .filter(
-                    Measurement.user_id == user_id,
-                    Measurement.date >= first_day,
-                    Measurement.date <= last_day,
-                )
-                .all()
-            )
-            return {m.date.day for m in measurements}
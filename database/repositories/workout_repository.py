@@ -3,6 +3,7 @@ import logging
 from datetime import date
 from typing import Optional
 from database.session import get_db_session
+from database.daily_summary import refresh_daily_summary
 from database.models import Workout
 
 logger = logging.getLogger(__name__)
@@ -31,6 +32,7 @@ class WorkoutRepository:
                 calories=calories,
             )
             session.add(workout)
+            refresh_daily_summary(session, user_id, entry_date)
             session.commit()
             session.refresh(workout)
             logger.info(f"Saved workout {workout.id} for user {user_id}")
@@ -60,6 +62,7 @@ class WorkoutRepository:
             )
             if workout:
                 session.delete(workout)
+                refresh_daily_summary(session, user_id, workout.date)
                 session.commit()
                 logger.info(f"Deleted workout {workout_id} for user {user_id}")
                 return True
@@ -102,6 +105,7 @@ class WorkoutRepository:
             if workout:
                 workout.count = count
                 workout.calories = calories
+                refresh_daily_summary(session, user_id, workout.date)
                 session.commit()
                 logger.info(f"Updated workout {workout_id} for user {user_id}: count={count}, calories={calories}")
                 return True
@@ -1,54 +1,38 @@
 """Управление сессиями базы данных."""
 from contextlib import contextmanager
-from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL, DB_POOL_PRE_PING, DB_POOL_RECYCLE
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from config import DATABASE_URL
+from database.engine_profile import configure_engine, engine_options
 from database.models import Base
+from database.migrations import run_migrations, check_indexes
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Создаём engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=DB_POOL_PRE_PING,
-    pool_recycle=DB_POOL_RECYCLE,
-)
+# Создаём engine (параметры пула и PRAGMA — database.engine_profile)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+pool_metrics = configure_engine(engine, "sync")
 
 # Создаём фабрику сессий с expire_on_commit=False
 # чтобы объекты оставались доступными после коммита
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
 
+# Сессия, выданная снаружи (AsyncSession.run_sync в database.async_session):
+# пока она установлена, get_db_session отдаёт её вместо новой sync-сессии
+_bound_session: ContextVar[Optional[Session]] = ContextVar("bound_session", default=None)
+
 
 def init_db():
-    """Инициализация базы данных: создание таблиц и миграции."""
+    """Инициализация базы данных: создание таблиц, миграции и проверка индексов."""
     # Создаём все таблицы
     Base.metadata.create_all(engine)
-    logger.info("База данных инициализирована")
     
-    # Простая миграция для добавления столбцов
-    with engine.connect() as conn:
-        inspector = inspect(conn)
-        
-        # supplement_entries.amount
-        try:
-            columns = {col["name"] for col in inspector.get_columns("supplement_entries")}
-            if "amount" not in columns:
-                conn.execute(text("ALTER TABLE supplement_entries ADD COLUMN amount FLOAT"))
-                conn.commit()
-                logger.info("Добавлен столбец supplement_entries.amount")
-        except Exception as e:
-            logger.warning(f"Ошибка при проверке supplement_entries.amount: {e}")
-        
-        # workouts.calories
-        try:
-            workout_columns = {col["name"] for col in inspector.get_columns("workouts")}
-            if "calories" not in workout_columns:
-                conn.execute(text("ALTER TABLE workouts ADD COLUMN calories FLOAT"))
-                conn.commit()
-                logger.info("Добавлен столбец workouts.calories")
-        except Exception as e:
-            logger.warning(f"Ошибка при проверке workouts.calories: {e}")
+    version = run_migrations(engine)
+    check_indexes(engine)
+    logger.info(f"База данных инициализирована (версия схемы {version})")
 
 
 @contextmanager
@@ -61,6 +45,12 @@ def get_db_session():
             user = session.query(User).first()
             session.commit()
     """
+    bound = _bound_session.get()
+    if bound is not None:
+        # Транзакцией управляет владелец сессии (run_in_async_session)
+        yield bound
+        return
+    
     session = SessionLocal()
     try:
         yield session
@@ -71,3 +61,12 @@ def get_db_session():
     finally:
         session.close()
 
+
+@contextmanager
+def bound_session(session: Session):
+    """Делает session текущей для всех get_db_session() внутри блока."""
+    token = _bound_session.set(session)
+    try:
+        yield session
+    finally:
+        _bound_session.reset(token)
@@ -13,7 +13,16 @@ from utils.calendar_utils import (
     build_activity_analysis_calendar_keyboard,
     build_activity_analysis_day_actions_keyboard,
 )
-from database.repositories.activity_analysis_repository import ActivityAnalysisRepository
+from database.async_repositories import (
+    AsyncActivityAnalysisRepository,
+    AsyncMealRepository,
+    AsyncProcedureRepository,
+    AsyncSupplementRepository,
+    AsyncWaterRepository,
+    AsyncWeightRepository,
+    AsyncWellbeingRepository,
+    AsyncWorkoutRepository,
+)
 from states.user_states import ActivityAnalysisStates
 from services.gemini_service import gemini_service
 
@@ -78,28 +87,28 @@ def _extract_analysis_short_summary(analysis_text: str, max_len: int = 220) -> s
 
 async def generate_activity_analysis(user_id: str, start_date: date, end_date: date, period_name: str) -> str:
     """Генерирует анализ активности за указанный период через Gemini."""
-    from database.repositories import (
-        WorkoutRepository, MealRepository, WeightRepository,
-        WaterRepository, SupplementRepository, ProcedureRepository,
-        WellbeingRepository
-    )
-    from utils.workout_utils import calculate_workout_calories
+    from utils.workout_utils import calculate_workouts_calories, workout_dates_without_calories
     from utils.formatters import format_count_with_unit, get_kbju_goal_label
     
     days_count = (end_date - start_date).days + 1
     
     # 🔹 Тренировки за период
-    workouts = WorkoutRepository.get_workouts_for_period(user_id, start_date, end_date)
+    workouts = await AsyncWorkoutRepository.get_workouts_for_period(user_id, start_date, end_date)
+    today_workouts = [w for w in workouts if w.date == end_date]
+    
+    # Вес на дату каждой тренировки без сохранённых калорий — одним запросом
+    weights_by_date = await AsyncWeightRepository.get_weights_as_of(
+        user_id, workout_dates_without_calories(workouts)
+    )
     
     workouts_by_ex = {}
     total_workout_calories = 0.0
     workout_days = set()
     
-    for w in workouts:
+    for w, cals in zip(workouts, calculate_workouts_calories(user_id, workouts, weights_by_date)):
         key = (w.exercise, w.variant)
         entry = workouts_by_ex.setdefault(key, {"count": 0, "calories": 0.0})
         entry["count"] += w.count
-        cals = w.calories or calculate_workout_calories(user_id, w.exercise, w.variant, w.count)
         entry["calories"] += cals
         total_workout_calories += cals
         workout_days.add(w.date)
@@ -126,16 +135,14 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
         workout_summary = f"За {period_name.lower()} тренировки не записаны."
 
     # Структурированный input для блока "Тренировки"
-    today_workouts = WorkoutRepository.get_workouts_for_day(user_id, end_date)
     today_workouts_by_type = {}
     today_steps = 0
     today_workout_kcal = 0.0
     today_strength_volume_score = 0
 
-    for w in today_workouts:
+    for w, cals in zip(today_workouts, calculate_workouts_calories(user_id, today_workouts, weights_by_date)):
         w_type = _normalize_workout_type(w.exercise, w.variant)
         unit = "steps" if w_type == "steps" else "reps"
-        cals = w.calories or calculate_workout_calories(user_id, w.exercise, w.variant, w.count)
         today_workout_kcal += cals
 
         if w_type == "steps":
@@ -150,7 +157,7 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
 
     # История за последние 7 дней (включая выбранную дату)
     hist_start = end_date - timedelta(days=6)
-    history_workouts = WorkoutRepository.get_workouts_for_period(user_id, hist_start, end_date)
+    history_workouts = await AsyncWorkoutRepository.get_workouts_for_period(user_id, hist_start, end_date)
     day_steps = {}
     day_strength_score = {}
     for w in history_workouts:
@@ -168,7 +175,7 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
     yesterday_key = (end_date - timedelta(days=1)).isoformat()
     yesterday_strength = day_strength_score.get(yesterday_key)
 
-    settings = MealRepository.get_kbju_settings(user_id)
+    settings = await AsyncMealRepository.get_kbju_settings(user_id)
     user_goal = settings.goal if settings else None
 
     workout_ai_input = {
@@ -189,24 +196,16 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
         "user_goal": user_goal,
     }
     
-    # 🔹 КБЖУ за период
-    meals = []
-    meal_days = set()
-    current_date = start_date
-    while current_date <= end_date:
-        day_meals = MealRepository.get_meals_for_date(user_id, current_date)
-        if day_meals:
-            meals.extend(day_meals)
-            meal_days.add(current_date)
-        current_date += timedelta(days=1)
+    # 🔹 КБЖУ за период (суммы по дням одним запросом)
+    meal_totals_by_day = await AsyncMealRepository.get_daily_totals_for_period(user_id, start_date, end_date)
+    meal_days = set(meal_totals_by_day)
     
-    total_calories = sum(m.calories or 0 for m in meals)
-    total_protein = sum(m.protein or 0 for m in meals)
-    total_fat = sum(m.fat or 0 for m in meals)
-    total_carbs = sum(m.carbs or 0 for m in meals)
+    total_calories = sum(day["calories"] for day in meal_totals_by_day.values())
+    total_protein = sum(day["protein"] for day in meal_totals_by_day.values())
+    total_fat = sum(day["fat"] for day in meal_totals_by_day.values())
+    total_carbs = sum(day["carbs"] for day in meal_totals_by_day.values())
     
-    # 🔹 Цель / норма КБЖУ и проценты выполнения
-    settings = MealRepository.get_kbju_settings(user_id)
+    # 🔹 Цель / норма КБЖУ и проценты выполнения (settings загружены выше)
     if settings:
         goal_label = get_kbju_goal_label(settings.goal)
         goal_calories = settings.calories * days_count
@@ -265,15 +264,9 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
                 weekday_stats = "\nСтатистика по дням недели:\n" + "\n".join(weekday_lines)
     
     # 🔹 Вода за период
-    total_water = 0.0
-    water_days = set()
-    current_date = start_date
-    while current_date <= end_date:
-        day_water = WaterRepository.get_daily_total(user_id, current_date)
-        if day_water > 0:
-            total_water += day_water
-            water_days.add(current_date)
-        current_date += timedelta(days=1)
+    water_by_day = await AsyncWaterRepository.get_daily_totals_for_period(user_id, start_date, end_date)
+    total_water = sum(water_by_day.values())
+    water_days = set(water_by_day)
     
     avg_water = total_water / len(water_days) if water_days else 0
     water_summary = ""
@@ -285,40 +278,26 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
         )
     
     # 🔹 Добавки за период
-    supplements = SupplementRepository.get_supplements(user_id)
+    supplement_entries = await AsyncSupplementRepository.get_entries_for_period(user_id, start_date, end_date)
     supplement_summary = ""
-    if supplements:
-        supplement_entries_count = 0
-        supplement_names = []
-        for sup in supplements:
-            for entry in sup.get("history", []):
-                entry_date = entry["timestamp"].date() if hasattr(entry["timestamp"], "date") else entry["timestamp"]
-                if start_date <= entry_date <= end_date:
-                    supplement_entries_count += 1
-                    if sup["name"] not in supplement_names:
-                        supplement_names.append(sup["name"])
-        
-        if supplement_entries_count > 0:
-            supplement_summary = (
-                f"\nДобавки: {supplement_entries_count} приёмов, "
-                f"активных добавок: {len(supplement_names)} ({', '.join(supplement_names[:3])}"
-                f"{'...' if len(supplement_names) > 3 else ''})."
-            )
+    if supplement_entries:
+        supplement_names = list(dict.fromkeys(entry["supplement_name"] for entry in supplement_entries))
+        supplement_summary = (
+            f"\nДобавки: {len(supplement_entries)} приёмов, "
+            f"активных добавок: {len(supplement_names)} ({', '.join(supplement_names[:3])}"
+            f"{'...' if len(supplement_names) > 3 else ''})."
+        )
     
     # 🔹 Процедуры за период
-    procedure_count = 0
-    current_date = start_date
-    while current_date <= end_date:
-        day_procedures = ProcedureRepository.get_procedures_for_day(user_id, current_date)
-        procedure_count += len(day_procedures)
-        current_date += timedelta(days=1)
+    procedures_by_day = await AsyncProcedureRepository.get_daily_counts_for_period(user_id, start_date, end_date)
+    procedure_count = sum(procedures_by_day.values())
     
     procedure_summary = ""
     if procedure_count > 0:
         procedure_summary = f"\nПроцедуры: {procedure_count} записей за период."
 
     # 🔹 Самочувствие за период
-    wellbeing_entries = WellbeingRepository.get_entries_for_period(user_id, start_date, end_date)
+    wellbeing_entries = await AsyncWellbeingRepository.get_entries_for_period(user_id, start_date, end_date)
     wellbeing_summary = ""
     if wellbeing_entries:
         quick_entries = [entry for entry in wellbeing_entries if entry.entry_type == "quick"]
@@ -358,40 +337,43 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
     else:
         wellbeing_summary = "\nСамочувствие: записей за период нет."
     
-    # 🔹 Вес и история веса
-    weights = WeightRepository.get_weights_for_date_range(user_id, start_date, end_date)
+    # 🔹 Вес и история веса (агрегаты и скользящее среднее считаются в SQL)
+    period_weight_stats = await AsyncWeightRepository.get_weight_stats(user_id, start_date, end_date)
 
     # Для коротких периодов (например, анализа за день) всё равно берём минимум неделю,
     # чтобы ИИ видел динамику и мог оценить прогресс за последние дни.
     weight_trend_start = min(start_date, end_date - timedelta(days=6))
-    trend_weights = WeightRepository.get_weights_for_date_range(user_id, weight_trend_start, end_date)
-
-    if trend_weights:
-        current_weight = trend_weights[0]
-        if len(trend_weights) > 1:
-            first_weight = trend_weights[-1]
-            current_weight_value = float(str(current_weight.value).replace(",", "."))
-            first_weight_value = float(str(first_weight.value).replace(",", "."))
-            change = current_weight_value - first_weight_value
-            change_percent = (change / first_weight_value * 100) if first_weight_value > 0 else 0
+    trend_points = await AsyncWeightRepository.get_moving_average(user_id, weight_trend_start, end_date)
+
+    if trend_points:
+        current_point = trend_points[-1]
+        first_point = trend_points[0]
+        if len(trend_points) > 1:
+            change = current_point["value"] - first_point["value"]
+            change_percent = (change / first_point["value"] * 100) if first_point["value"] > 0 else 0
             change_text = f" ({'+' if change >= 0 else ''}{change:.1f} кг, {change_percent:+.1f}%)"
         else:
             change_text = ""
 
         history_lines = [
-            f"{w.date.strftime('%d.%m')}: {w.value} кг"
-            for w in trend_weights[:10]
+            f"{point['date'].strftime('%d.%m')}: {point['value']:.1f} кг (среднее {point['avg']:.1f})"
+            for point in reversed(trend_points[-10:])
         ]
         trend_window = (
             f"{weight_trend_start.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}"
         )
-        period_note = ""
-        if not weights:
+        if period_weight_stats:
+            period_note = (
+                f" За {period_name.lower()}: мин {period_weight_stats['min']:.1f} кг, "
+                f"макс {period_weight_stats['max']:.1f} кг, среднее {period_weight_stats['avg']:.1f} кг."
+            )
+        else:
             period_note = f" За {period_name.lower()} новых измерений не было."
 
         weight_summary = (
-            f"Текущий вес: {current_weight.value} кг (от {current_weight.date.strftime('%d.%m.%Y')}){change_text}. "
-            f"Динамика веса за период {trend_window}: " + "; ".join(history_lines) + "."
+            f"Текущий вес: {current_point['value']:.1f} кг (от {current_point['date'].strftime('%d.%m.%Y')}){change_text}. "
+            f"Динамика веса за период {trend_window} (со скользящим средним за 7 записей): "
+            + "; ".join(history_lines) + "."
             f"{period_note}"
         )
     else:
@@ -403,15 +385,11 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
         prev_start = start_date - timedelta(days=days_count)
         prev_end = start_date - timedelta(days=1)
         
-        prev_workouts = WorkoutRepository.get_workouts_for_period(user_id, prev_start, prev_end)
+        prev_workouts = await AsyncWorkoutRepository.get_workouts_for_period(user_id, prev_start, prev_end)
         prev_workout_days = len(set(w.date for w in prev_workouts))
         
-        prev_meals = []
-        prev_date = prev_start
-        while prev_date <= prev_end:
-            prev_meals.extend(MealRepository.get_meals_for_date(user_id, prev_date))
-            prev_date += timedelta(days=1)
-        prev_calories = sum(m.calories or 0 for m in prev_meals)
+        prev_meal_totals = await AsyncMealRepository.get_daily_totals_for_period(user_id, prev_start, prev_end)
+        prev_calories = sum(day["calories"] for day in prev_meal_totals.values())
         
         if prev_workout_days > 0 or prev_calories > 0:
             workout_change = workout_days_count - prev_workout_days
@@ -506,7 +484,7 @@ async def generate_activity_analysis(user_id: str, start_date: date, end_date: d
 Рекомендации делай в стиле кнопки "🤖 Рекомендации", учитывай её принципы, но не вставляй текст или списки из неё дословно.
 """
     
-    result = gemini_service.analyze(prompt)
+    result = await gemini_service.analyze_async(prompt)
     
     # Заменяем markdown звездочки на HTML-теги для жирного шрифта
     # Заменяем **текст** на <b>текст</b>
@@ -548,7 +526,7 @@ async def show_activity_analysis_calendar_view(
     today = date.today()
     year = year or today.year
     month = month or today.month
-    keyboard = build_activity_analysis_calendar_keyboard(user_id, year, month)
+    keyboard = await build_activity_analysis_calendar_keyboard(user_id, year, month)
     await message.answer(
         "🗓 Календарь ИИ-анализа",
         reply_markup=keyboard,
@@ -596,7 +574,7 @@ async def add_activity_analysis_from_calendar(callback: CallbackQuery, state: FS
 
     user_id = str(callback.from_user.id)
     analysis = await generate_activity_analysis(user_id, target_date, target_date, "за день")
-    ActivityAnalysisRepository.create_entry(user_id, analysis, target_date, source="generated")
+    await AsyncActivityAnalysisRepository.create_entry(user_id, analysis, target_date, source="generated")
 
     await callback.message.answer("✅ Анализ сохранён в календаре.")
     await show_activity_analysis_day(callback.message, user_id, target_date)
@@ -611,7 +589,7 @@ async def delete_activity_analysis(callback: CallbackQuery):
     entry_id = int(parts[2])
     user_id = str(callback.from_user.id)
 
-    success = ActivityAnalysisRepository.delete_entry(entry_id, user_id)
+    success = await AsyncActivityAnalysisRepository.delete_entry(entry_id, user_id)
     if success:
         await callback.message.answer("✅ Анализ удалён")
     else:
@@ -621,7 +599,7 @@ async def delete_activity_analysis(callback: CallbackQuery):
 
 async def show_activity_analysis_day(message: Message, user_id: str, target_date: date):
     """Показывает сохранённые анализы за конкретный день."""
-    entries = ActivityAnalysisRepository.get_entries_for_date(user_id, target_date)
+    entries = await AsyncActivityAnalysisRepository.get_entries_for_date(user_id, target_date)
 
     if not entries:
         await message.answer(
@@ -660,7 +638,7 @@ async def save_manual_activity_analysis(message: Message, state: FSMContext):
 
     entry_date = date.fromisoformat(entry_date_raw)
     user_id = str(message.from_user.id)
-    ActivityAnalysisRepository.create_entry(user_id, text, entry_date, source="manual")
+    await AsyncActivityAnalysisRepository.create_entry(user_id, text, entry_date, source="manual")
     await state.clear()
     await message.answer("✅ Анализ сохранён в календаре.")
     await show_activity_analysis_day(message, user_id, entry_date)
@@ -673,7 +651,7 @@ async def analyze_activity_day(message: Message):
     today = date.today()
     await message.answer("⏳ Подожди немного, бот анализирует твой день...")
     analysis = await generate_activity_analysis(user_id, today, today, "за день")
-    ActivityAnalysisRepository.create_entry(user_id, analysis, today, source="generated")
+    await AsyncActivityAnalysisRepository.create_entry(user_id, analysis, today, source="generated")
     push_menu_stack(message.bot, activity_analysis_menu)
     await message.answer(analysis, parse_mode="HTML", reply_markup=activity_analysis_menu)
 
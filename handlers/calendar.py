@@ -26,7 +26,7 @@ async def show_calendar(message: Message, user_id: str, year: Optional[int] = No
     today = date.today()
     year = year or today.year
     month = month or today.month
-    keyboard = build_workout_calendar_keyboard(user_id, year, month)
+    keyboard = await build_workout_calendar_keyboard(user_id, year, month)
     await message.answer(
         "📆 Выбери день, чтобы посмотреть, изменить или удалить тренировку:",
         reply_markup=keyboard,
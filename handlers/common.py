@@ -75,6 +75,7 @@ def _build_recommendations_text() -> str:
 async def go_main_menu(message: Message, state: FSMContext):
     """Обработчик кнопки 'Главное меню'."""
     from datetime import date
+    from database.async_repositories import AsyncDashboardRepository
     from utils.progress_formatters import (
         format_progress_block,
         format_water_progress_block,
@@ -87,10 +88,11 @@ async def go_main_menu(message: Message, state: FSMContext):
     # Очищаем FSM состояние
     await state.clear()
     
-    # Формируем сообщение с прогрессом
-    progress_text = format_progress_block(user_id)
-    water_progress_text = format_water_progress_block(user_id)
-    workouts_text = format_today_workouts_block(user_id, include_date=False)
+    # Формируем сообщение с прогрессом: все данные экрана — одной сессией
+    snapshot = await AsyncDashboardRepository.get_snapshot(user_id)
+    progress_text = format_progress_block(user_id, snapshot)
+    water_progress_text = format_water_progress_block(user_id, snapshot)
+    workouts_text = format_today_workouts_block(user_id, include_date=False, snapshot=snapshot)
     recommendations_link = await _build_recommendations_link(message)
 
     today_line = f"📅 <b>{date.today().strftime('%d.%m.%Y')}</b>"
@@ -13,7 +13,7 @@ from utils.keyboards import (
     push_menu_stack,
 )
 from services.kbju_calculator import calculate_kbju_from_test
-from database.repositories import MealRepository
+from database.async_repositories import AsyncMealRepository
 from utils.formatters import format_kbju_goal_text, format_current_kbju_goal
 
 logger = logging.getLogger(__name__)
@@ -28,7 +28,7 @@ async def show_kbju_goal(message: Message, state: FSMContext):
     logger.info(f"User {user_id} opened KBJU goal settings")
 
     await state.clear()
-    settings = MealRepository.get_kbju_settings(user_id)
+    settings = await AsyncMealRepository.get_kbju_settings(user_id)
 
     if settings:
         text = format_current_kbju_goal(settings)
@@ -198,7 +198,7 @@ async def handle_kbju_test_goal(message: Message, state: FSMContext):
     calories, protein, fat, carbs, goal_label = calculate_kbju_from_test(data)
     
     # Сохраняем настройки
-    MealRepository.save_kbju_settings(
+    await AsyncMealRepository.save_kbju_settings(
         user_id=user_id,
         calories=calories,
         protein=protein,
@@ -284,7 +284,7 @@ async def handle_manual_carbs(message: Message, state: FSMContext):
     protein = data.get("protein")
     fat = data.get("fat")
 
-    MealRepository.save_kbju_settings(
+    await AsyncMealRepository.save_kbju_settings(
         user_id=user_id,
         calories=calories,
         protein=protein,
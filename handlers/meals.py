@@ -17,10 +17,16 @@ from utils.keyboards import (
     kbju_edit_type_menu,
     push_menu_stack,
 )
-from database.repositories import MealRepository
+from database.async_repositories import AsyncDashboardRepository, AsyncMealRepository
+from database.async_session import run_in_async_session
 from services.nutrition_service import nutrition_service
-from services.gemini_service import gemini_service
-from utils.validators import parse_date
+from services.gemini_service import gemini_service, select_photo_size
+from services.kbju_estimator import kbju_estimator
+from services.ingredient_service import ingredient_service
+from services.image_analysis_cache import image_analysis_cache
+from services.translation_service import translation_service
+from utils.validators import parse_date, safe_float
+from utils.food_text import split_food_items
 from utils.telegram_text import split_telegram_message
 from datetime import datetime
 
@@ -35,28 +41,6 @@ def reset_user_state(message: Message, *, keep_supplements: bool = False):
     pass
 
 
-def translate_text(text: str, source_lang: str = "ru", target_lang: str = "en") -> str:
-    """Переводит текст через публичное API MyMemory."""
-    if not text:
-        return text
-    
-    try:
-        import requests
-        url = "https://api.mymemory.translated.net/get"
-        params = {"q": text, "langpair": f"{source_lang}|{target_lang}"}
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        translated = (
-            data.get("responseData", {}).get("translatedText")
-            or data.get("matches", [{}])[0].get("translation")
-        )
-        return translated or text
-    except Exception as e:
-        logger.warning(f"Translation error: {e}")
-        return text
-
-
 @router.message(lambda m: m.text == "🍱 КБЖУ")
 async def calories(message: Message, state: FSMContext):
     """Показывает меню КБЖУ."""
@@ -66,7 +50,8 @@ async def calories(message: Message, state: FSMContext):
     
     # Показываем прогресс КБЖУ
     from utils.progress_formatters import format_progress_block
-    progress_text = format_progress_block(user_id)
+    snapshot = await AsyncDashboardRepository.get_snapshot(user_id)
+    progress_text = format_progress_block(user_id, snapshot)
     
     push_menu_stack(message.bot, kbju_menu)
     await message.answer(
@@ -141,7 +126,7 @@ async def show_kbju_goal(message: Message, state: FSMContext):
     logger.info(f"User {user_id} opened KBJU goal settings")
 
     await state.clear()
-    settings = MealRepository.get_kbju_settings(user_id)
+    settings = await AsyncMealRepository.get_kbju_settings(user_id)
 
     if settings:
         text = format_current_kbju_goal(settings)
@@ -275,11 +260,11 @@ async def handle_food_input(message: Message, state: FSMContext):
     else:
         entry_date = date.today()
     
-    translated_query = translate_text(user_text, source_lang="ru", target_lang="en")
+    translated_query = await translation_service.translate(user_text, source_lang="ru", target_lang="en")
     logger.info(f"🍱 Перевод запроса для API: {translated_query}")
     
     try:
-        items, totals = nutrition_service.get_nutrition_from_api(translated_query)
+        items, totals = await nutrition_service.get_nutrition_from_api_async(translated_query)
     except Exception as e:
         logger.error(f"Nutrition API error: {e}")
         await message.answer(
@@ -299,9 +284,15 @@ async def handle_food_input(message: Message, state: FSMContext):
     lines = ["🍱 Оценка по КБЖУ для этого приёма пищи:\n"]
     api_details_lines = []
     
-    for item in items:
-        name_en = (item.get("name") or "item").title()
-        name = translate_text(name_en, source_lang="en", target_lang="ru")
+    # Все названия переводим одним запросом (уже известные берутся из кэша)
+    names = await translation_service.translate_many(
+        [(item.get("name") or "item") for item in items],
+        source_lang="en",
+        target_lang="ru",
+    )
+    
+    for item, name in zip(items, names):
+        name = name[:1].upper() + name[1:]
         
         cal = float(item.get("_calories", 0.0))
         p = float(item.get("_protein_g", 0.0))
@@ -312,6 +303,27 @@ async def handle_food_input(message: Message, state: FSMContext):
         lines.append(line)
         api_details_lines.append(line)
     
+    # Пополняем справочник продуктов для локальных оценок
+    try:
+        await run_in_async_session(
+            ingredient_service.remember_items,
+            [
+                {
+                    "name": name,
+                    "grams": item.get("serving_size_g"),
+                    "kcal": item.get("_calories"),
+                    "protein": item.get("_protein_g"),
+                    "fat": item.get("_fat_total_g"),
+                    "carbs": item.get("_carbohydrates_total_g"),
+                }
+                for item, name in zip(items, names)
+            ],
+            "calorieninjas",
+            split_food_items(user_text),
+        )
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить продукты в справочник: {e}")
+    
     lines.append("\nИТОГО:")
     lines.append(
         f"🔥 Калории: {float(totals['calories']):.0f} ккал\n"
@@ -323,7 +335,7 @@ async def handle_food_input(message: Message, state: FSMContext):
     api_details = "\n".join(api_details_lines)
     
     # Сохраняем в БД
-    saved_meal = MealRepository.save_meal(
+    saved_meal = await AsyncMealRepository.save_meal(
         user_id=user_id,
         raw_query=user_text,
         calories=float(totals['calories']),
@@ -341,7 +353,7 @@ async def handle_food_input(message: Message, state: FSMContext):
     message.bot.last_meal_ids[user_id] = saved_meal.id
     
     # Показываем суммарные данные за день
-    daily_totals = MealRepository.get_daily_totals(user_id, entry_date)
+    daily_totals = await AsyncMealRepository.get_daily_totals(user_id, entry_date)
     lines.append("\nСУММА ЗА СЕГОДНЯ:")
     lines.append(
         f"🔥 Калории: {daily_totals['calories']:.0f} ккал\n"
@@ -381,8 +393,8 @@ async def handle_ai_food_input(message: Message, state: FSMContext):
     # Показываем сообщение об анализе
     await message.answer("🤖 Считаю КБЖУ с помощью ИИ, секунду...")
     
-    # Получаем КБЖУ через Gemini
-    kbju_data = gemini_service.estimate_kbju(user_text)
+    # Получаем КБЖУ через Gemini (повторы берутся из кэша)
+    kbju_data = await kbju_estimator.estimate(user_text)
     
     if not kbju_data or "total" not in kbju_data:
         await message.answer(
@@ -394,15 +406,6 @@ async def handle_ai_food_input(message: Message, state: FSMContext):
     items = kbju_data.get("items", [])
     total = kbju_data.get("total", {})
     
-    # Безопасное преобразование значений
-    def safe_float(value) -> float:
-        try:
-            if value is None:
-                return 0.0
-            return float(value)
-        except (TypeError, ValueError):
-            return 0.0
-    
     # Формируем детальный ответ
     lines = ["🤖 Оценка по ИИ для этого приёма пищи:\n"]
     
@@ -435,7 +438,7 @@ async def handle_ai_food_input(message: Message, state: FSMContext):
     )
     
     # Сохраняем в БД
-    saved_meal = MealRepository.save_meal(
+    saved_meal = await AsyncMealRepository.save_meal(
         user_id=user_id,
         raw_query=user_text,
         calories=totals_for_db["calories"],
@@ -452,7 +455,7 @@ async def handle_ai_food_input(message: Message, state: FSMContext):
     message.bot.last_meal_ids[user_id] = saved_meal.id
     
     # Показываем суммарные данные за день
-    daily_totals = MealRepository.get_daily_totals(user_id, entry_date)
+    daily_totals = await AsyncMealRepository.get_daily_totals(user_id, entry_date)
     lines.append("\nСУММА ЗА СЕГОДНЯ:")
     lines.append(
         f"🔥 Калории: {daily_totals.get('calories', 0):.0f} ккал\n"
@@ -522,14 +525,14 @@ async def handle_photo_input(message: Message, state: FSMContext):
     # Показываем сообщение об анализе
     await message.answer("📷 Анализирую фото с помощью ИИ, секунду... 🤖")
     
-    # Скачиваем фото
-    photo = message.photo[-1]  # Берём самое большое разрешение
-    file = await message.bot.get_file(photo.file_id)
-    image_bytes = await message.bot.download_file(file.file_path)
-    image_data = image_bytes.read()
-    
-    # Анализируем через Gemini
-    kbju_data = gemini_service.estimate_kbju_from_photo(image_data)
+    # Анализируем через Gemini (повторно отправленное фото берётся из кэша без скачивания)
+    kbju_data = await image_analysis_cache.analyze(
+        message.bot,
+        select_photo_size(message.photo, "photo"),
+        "photo",
+        gemini_service.estimate_kbju_from_photo_async,
+        validate=lambda result: "total" in result,
+    )
     
     if not kbju_data or "total" not in kbju_data:
         await message.answer(
@@ -541,15 +544,6 @@ async def handle_photo_input(message: Message, state: FSMContext):
     items = kbju_data.get("items", [])
     total = kbju_data.get("total", {})
     
-    # Безопасное преобразование значений
-    def safe_float(value) -> float:
-        try:
-            if value is None:
-                return 0.0
-            return float(value)
-        except (TypeError, ValueError):
-            return 0.0
-    
     # Формируем детальный ответ
     lines = ["📷 Анализ фото еды (ИИ):\n"]
     
@@ -582,7 +576,7 @@ async def handle_photo_input(message: Message, state: FSMContext):
     )
     
     # Сохраняем в БД
-    saved_meal = MealRepository.save_meal(
+    saved_meal = await AsyncMealRepository.save_meal(
         user_id=user_id,
         raw_query="[Анализ по фото]",
         calories=totals_for_db["calories"],
@@ -599,7 +593,7 @@ async def handle_photo_input(message: Message, state: FSMContext):
     message.bot.last_meal_ids[user_id] = saved_meal.id
     
     # Показываем суммарные данные за день
-    daily_totals = MealRepository.get_daily_totals(user_id, entry_date)
+    daily_totals = await AsyncMealRepository.get_daily_totals(user_id, entry_date)
     lines.append("\nСУММА ЗА СЕГОДНЯ:")
     lines.append(
         f"🔥 Калории: {daily_totals.get('calories', 0):.0f} ккал\n"
@@ -634,14 +628,14 @@ async def handle_label_photo(message: Message, state: FSMContext):
     # Показываем сообщение об анализе
     await message.answer("📋 Анализирую этикетку с помощью ИИ, секунду... 🤖")
     
-    # Скачиваем фото
-    photo = message.photo[-1]
-    file = await message.bot.get_file(photo.file_id)
-    image_bytes = await message.bot.download_file(file.file_path)
-    image_data = image_bytes.read()
-    
-    # Анализируем через Gemini
-    label_data = gemini_service.extract_kbju_from_label(image_data)
+    # Анализируем через Gemini (повторно отправленное фото берётся из кэша без скачивания)
+    label_data = await image_analysis_cache.analyze(
+        message.bot,
+        select_photo_size(message.photo, "label"),
+        "label",
+        gemini_service.extract_kbju_from_label_async,
+        validate=lambda result: "kbju_per_100g" in result,
+    )
     
     if not label_data or "kbju_per_100g" not in label_data:
         await message.answer(
@@ -655,15 +649,6 @@ async def handle_label_photo(message: Message, state: FSMContext):
     found_weight = label_data.get("found_weight", False)
     product_name = label_data.get("product_name", "Продукт")
     
-    # Безопасное преобразование значений
-    def safe_float(value) -> float:
-        try:
-            if value is None:
-                return 0.0
-            return float(value)
-        except (TypeError, ValueError):
-            return 0.0
-    
     kcal_100g = safe_float(kbju_per_100g.get("kcal"))
     protein_100g = safe_float(kbju_per_100g.get("protein"))
     fat_100g = safe_float(kbju_per_100g.get("fat"))
@@ -741,14 +726,13 @@ async def handle_barcode_photo(message: Message, state: FSMContext):
     # Показываем сообщение о распознавании
     await message.answer("📷 Распознаю штрих-код, секунду... 🤖")
     
-    # Скачиваем фото
-    photo = message.photo[-1]
-    file = await message.bot.get_file(photo.file_id)
-    image_bytes = await message.bot.download_file(file.file_path)
-    image_data = image_bytes.read()
-    
-    # Распознаём штрих-код
-    barcode = gemini_service.scan_barcode(image_data)
+    # Распознаём штрих-код (повторно отправленное фото берётся из кэша без скачивания)
+    barcode = await image_analysis_cache.analyze(
+        message.bot,
+        select_photo_size(message.photo, "barcode"),
+        "barcode",
+        gemini_service.scan_barcode_async,
+    )
     
     if not barcode:
         await message.answer(
@@ -764,7 +748,7 @@ async def handle_barcode_photo(message: Message, state: FSMContext):
     await message.answer(f"✅ Штрих-код распознан: {barcode}\n\n🔍 Ищу информацию о продукте...")
     
     # Получаем данные из Open Food Facts
-    product_data = nutrition_service.get_product_from_openfoodfacts(barcode)
+    product_data = await nutrition_service.get_product_by_barcode(barcode)
     
     if not product_data:
         await message.answer(
@@ -780,14 +764,6 @@ async def handle_barcode_photo(message: Message, state: FSMContext):
     nutriments = product_data.get("nutriments", {})
     weight = product_data.get("weight")
     
-    def safe_float(value) -> float:
-        try:
-            if value is None:
-                return 0.0
-            return float(value)
-        except (TypeError, ValueError):
-            return 0.0
-    
     # КБЖУ на 100г
     kcal_100g = safe_float(nutriments.get("kcal", 0))
     protein_100g = safe_float(nutriments.get("protein", 0))
@@ -874,15 +850,6 @@ async def handle_weight_input(message: Message, state: FSMContext):
     else:
         entry_date = date.today()
     
-    # Безопасное преобразование значений
-    def safe_float(value) -> float:
-        try:
-            if value is None:
-                return 0.0
-            return float(value)
-        except (TypeError, ValueError):
-            return 0.0
-    
     # Пересчитываем пропорционально указанному весу
     multiplier = weight_grams / 100.0
     
@@ -964,7 +931,7 @@ async def handle_weight_input(message: Message, state: FSMContext):
         )
     
     # Сохраняем в БД
-    saved_meal = MealRepository.save_meal(
+    saved_meal = await AsyncMealRepository.save_meal(
         user_id=user_id,
         raw_query=raw_query,
         calories=totals_for_db["calories"],
@@ -981,7 +948,7 @@ async def handle_weight_input(message: Message, state: FSMContext):
     message.bot.last_meal_ids[user_id] = saved_meal.id
     
     # Показываем суммарные данные за день
-    daily_totals = MealRepository.get_daily_totals(user_id, entry_date)
+    daily_totals = await AsyncMealRepository.get_daily_totals(user_id, entry_date)
     lines.append("\nСУММА ЗА СЕГОДНЯ:")
     lines.append(
         f"🔥 Калории: {daily_totals.get('calories', 0):.0f} ккал\n"
@@ -1006,7 +973,7 @@ async def calories_today_results(message: Message):
 async def send_today_results(message: Message, user_id: str):
     """Отправляет результаты за сегодня."""
     today = date.today()
-    meals = MealRepository.get_meals_for_date(user_id, today)
+    meals = await AsyncMealRepository.get_meals_for_date(user_id, today)
     
     if not meals:
         from utils.keyboards import kbju_menu
@@ -1017,7 +984,7 @@ async def send_today_results(message: Message, user_id: str):
         )
         return
     
-    daily_totals = MealRepository.get_daily_totals(user_id, today)
+    daily_totals = await AsyncMealRepository.get_daily_totals(user_id, today)
     day_str = today.strftime("%d.%m.%Y")
 
     from utils.meal_formatters import format_today_meals, build_meals_actions_keyboard
@@ -1073,7 +1040,7 @@ async def show_kbju_calendar(message: Message, user_id: str, year: Optional[int]
         month = today.month
     
     from utils.calendar_utils import build_kbju_calendar_keyboard
-    keyboard = build_kbju_calendar_keyboard(user_id, year, month)
+    keyboard = await build_kbju_calendar_keyboard(user_id, year, month)
     
     await message.answer(
         f"📆 Календарь КБЖУ\n\nВыбери день:",
@@ -1113,7 +1080,7 @@ async def select_kbju_calendar_day(callback: CallbackQuery):
 
 async def show_day_meals(message: Message, user_id: str, target_date: date):
     """Показывает приёмы пищи за день."""
-    meals = MealRepository.get_meals_for_date(user_id, target_date)
+    meals = await AsyncMealRepository.get_meals_for_date(user_id, target_date)
     
     if not meals:
         from utils.meal_formatters import build_kbju_day_actions_keyboard
@@ -1123,7 +1090,7 @@ async def show_day_meals(message: Message, user_id: str, target_date: date):
         )
         return
     
-    daily_totals = MealRepository.get_daily_totals(user_id, target_date)
+    daily_totals = await AsyncMealRepository.get_daily_totals(user_id, target_date)
     day_str = target_date.strftime("%d.%m.%Y")
     
     from utils.meal_formatters import format_today_meals, build_meals_actions_keyboard
@@ -1166,7 +1133,7 @@ async def edit_last_meal(message: Message, state: FSMContext):
         return
     
     # Получаем приём пищи
-    meal = MealRepository.get_meal_by_id(last_meal_id, user_id)
+    meal = await AsyncMealRepository.get_meal_by_id(last_meal_id, user_id)
     if not meal:
         await message.answer("❌ Не нашёл запись для изменения.")
         return
@@ -1212,7 +1179,7 @@ async def start_meal_edit(callback: CallbackQuery, state: FSMContext):
     target_date = date.fromisoformat(parts[2]) if len(parts) > 2 else date.today()
     user_id = str(callback.from_user.id)
     
-    meal = MealRepository.get_meal_by_id(meal_id, user_id)
+    meal = await AsyncMealRepository.get_meal_by_id(meal_id, user_id)
     if not meal:
         await callback.message.answer("❌ Не нашёл запись для изменения.")
         return
@@ -1530,11 +1497,11 @@ async def handle_meal_weight_edit(message: Message, state: FSMContext):
         api_details = "\n".join(api_details_lines) if api_details_lines else None
         
         # Получаем meal для сохранения raw_query
-        meal = MealRepository.get_meal_by_id(meal_id, user_id)
+        meal = await AsyncMealRepository.get_meal_by_id(meal_id, user_id)
         raw_query = meal.raw_query if meal and hasattr(meal, 'raw_query') else None
         
         # Обновляем запись
-        success = MealRepository.update_meal(
+        success = await AsyncMealRepository.update_meal(
             meal_id=meal_id,
             user_id=user_id,
             description=raw_query,
@@ -1613,8 +1580,8 @@ async def handle_meal_composition_edit(message: Message, state: FSMContext):
     # Показываем сообщение об анализе
     await message.answer("🤖 Считаю КБЖУ с помощью ИИ, секунду...")
     
-    # Получаем КБЖУ через Gemini (как в "ввести прием пищи")
-    kbju_data = gemini_service.estimate_kbju(user_text)
+    # Получаем КБЖУ через Gemini (как в "ввести прием пищи"), повторы берутся из кэша
+    kbju_data = await kbju_estimator.estimate(user_text)
     
     if not kbju_data or "total" not in kbju_data:
         await message.answer(
@@ -1626,15 +1593,6 @@ async def handle_meal_composition_edit(message: Message, state: FSMContext):
     items = kbju_data.get("items", [])
     total = kbju_data.get("total", {})
     
-    # Безопасное преобразование значений
-    def safe_float(value) -> float:
-        try:
-            if value is None:
-                return 0.0
-            return float(value)
-        except (TypeError, ValueError):
-            return 0.0
-    
     totals_for_db = {
         "calories": safe_float(total.get("kcal")),
         "protein": safe_float(total.get("protein")),
@@ -1643,7 +1601,7 @@ async def handle_meal_composition_edit(message: Message, state: FSMContext):
     }
     
     # Обновляем запись
-    success = MealRepository.update_meal(
+    success = await AsyncMealRepository.update_meal(
         meal_id=meal_id,
         user_id=user_id,
         description=user_text,
@@ -1792,15 +1750,18 @@ async def handle_meal_edit_input(message: Message, state: FSMContext):
                     name,  # Только название
                 ]
                 
-                for query_variant in query_variants:
+                translated_variants = await translation_service.translate_many(
+                    query_variants, source_lang="ru", target_lang="en"
+                )
+                
+                for query_variant, translated_query in zip(query_variants, translated_variants):
                     if api_success:
                         break
                         
                     try:
-                        translated_query = translate_text(query_variant, source_lang="ru", target_lang="en")
                         logger.info(f"Getting nutrition for product '{name}': trying query '{translated_query}'")
                         
-                        items, _ = nutrition_service.get_nutrition_from_api(translated_query)
+                        items, _ = await nutrition_service.get_nutrition_from_api_async(translated_query)
                         
                         if items:
                             logger.debug(f"API returned {len(items)} items for '{name}': {[item.get('name', 'unknown') for item in items]}")
@@ -1922,7 +1883,7 @@ async def handle_meal_edit_input(message: Message, state: FSMContext):
         api_details = "\n".join(api_details_lines) if api_details_lines else None
         
         # Обновляем запись
-        success = MealRepository.update_meal(
+        success = await AsyncMealRepository.update_meal(
             meal_id=meal_id,
             user_id=user_id,
             description=new_text,
@@ -1972,7 +1933,7 @@ async def delete_meal(callback: CallbackQuery):
     target_date = date.fromisoformat(parts[2]) if len(parts) > 2 else date.today()
     user_id = str(callback.from_user.id)
     
-    success = MealRepository.delete_meal(meal_id, user_id)
+    success = await AsyncMealRepository.delete_meal(meal_id, user_id)
     if success:
         await callback.message.answer("✅ Запись удалена")
         await show_day_meals(callback.message, user_id, target_date)
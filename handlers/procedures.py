@@ -6,7 +6,7 @@ from aiogram import Router
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from utils.keyboards import push_menu_stack, main_menu_button
-from database.repositories import ProcedureRepository
+from database.async_repositories import AsyncProcedureRepository
 from states.user_states import ProcedureStates
 from utils.calendar_utils import (
     build_procedure_calendar_keyboard,
@@ -108,7 +108,7 @@ async def process_procedure_name(message: Message, state: FSMContext):
     else:
         entry_date = date.today()
     
-    procedure_id = ProcedureRepository.save_procedure(user_id, name, entry_date, notes)
+    procedure_id = await AsyncProcedureRepository.save_procedure(user_id, name, entry_date, notes)
     
     if procedure_id:
         await state.clear()
@@ -129,7 +129,7 @@ async def procedures_today(message: Message):
     """Показывает процедуры за сегодня."""
     user_id = str(message.from_user.id)
     today = date.today()
-    procedures_list = ProcedureRepository.get_procedures_for_day(user_id, today)
+    procedures_list = await AsyncProcedureRepository.get_procedures_for_day(user_id, today)
     
     if not procedures_list:
         push_menu_stack(message.bot, procedures_menu)
@@ -159,7 +159,7 @@ async def procedures_calendar(message: Message):
 
 async def show_procedures_calendar(message: Message, user_id: str, year: int, month: int):
     """Показывает календарь процедур."""
-    keyboard = build_procedure_calendar_keyboard(user_id, year, month)
+    keyboard = await build_procedure_calendar_keyboard(user_id, year, month)
     await message.answer(
         "📆 Календарь процедур\n\nВыбери день, чтобы посмотреть или добавить процедуру:",
         reply_markup=keyboard,
@@ -206,7 +206,7 @@ async def select_procedure_calendar_day(callback: CallbackQuery):
 
 async def show_procedure_day(message: Message, user_id: str, target_date: date):
     """Показывает процедуры за день."""
-    procedures_list = ProcedureRepository.get_procedures_for_day(user_id, target_date)
+    procedures_list = await AsyncProcedureRepository.get_procedures_for_day(user_id, target_date)
 
     if not procedures_list:
         await message.answer(
@@ -244,7 +244,7 @@ async def delete_procedure_from_calendar(callback: CallbackQuery):
     procedure_id = int(parts[2])
     user_id = str(callback.from_user.id)
 
-    success = ProcedureRepository.delete_procedure(user_id, procedure_id)
+    success = await AsyncProcedureRepository.delete_procedure(user_id, procedure_id)
     if success:
         await callback.message.answer("✅ Процедура удалена.")
     else:
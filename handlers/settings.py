@@ -10,9 +10,14 @@ from utils.keyboards import (
     main_menu_button,
     push_menu_stack,
     settings_menu,
+    timezone_menu,
 )
 from database.session import get_db_session
-from states.user_states import SupportStates
+from database.async_session import run_in_async_session
+from database.async_repositories import AsyncUserRepository
+from database.repositories import SupplementRepository
+from states.user_states import SettingsStates, SupportStates
+from utils.timezones import parse_timezone_input, timezone_label
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +34,7 @@ def delete_user_account(user_id: str) -> bool:
     """Удаляет аккаунт пользователя и все связанные данные."""
     from database.models import (
         Workout, Weight, Measurement, Meal, KbjuSettings,
-        SupplementEntry, Supplement, Procedure, WaterEntry, User
+        SupplementEntry, Supplement, Procedure, WaterEntry, DailyUserSummary, User
     )
     
     with get_db_session() as session:
@@ -40,13 +45,17 @@ def delete_user_account(user_id: str) -> bool:
             session.query(Measurement).filter_by(user_id=user_id).delete()
             session.query(Meal).filter_by(user_id=user_id).delete()
             session.query(KbjuSettings).filter_by(user_id=user_id).delete()
+            supplement_ids = [row.id for row in session.query(Supplement.id).filter_by(user_id=user_id)]
             session.query(SupplementEntry).filter_by(user_id=user_id).delete()
             session.query(Supplement).filter_by(user_id=user_id).delete()
             session.query(Procedure).filter_by(user_id=user_id).delete()
             session.query(WaterEntry).filter_by(user_id=user_id).delete()
+            session.query(DailyUserSummary).filter_by(user_id=user_id).delete()
             session.query(User).filter_by(user_id=user_id).delete()
             
             session.commit()
+            for supplement_id in supplement_ids:
+                SupplementRepository.notify_change(supplement_id, None)
             logger.info(f"Successfully deleted account for user {user_id}")
             return True
         except Exception as e:
@@ -70,6 +79,55 @@ async def settings(message: Message, state: FSMContext):
     )
 
 
+@router.message(lambda m: m.text == "🕒 Часовой пояс")
+async def timezone_start(message: Message, state: FSMContext):
+    """Показывает текущий часовой пояс и предлагает выбрать другой."""
+    reset_user_state(message)
+    user_id = str(message.from_user.id)
+    current = await AsyncUserRepository.get_timezone(user_id)
+    
+    await state.set_state(SettingsStates.choosing_timezone)
+    push_menu_stack(message.bot, timezone_menu)
+    await message.answer(
+        f"🕒 Текущий часовой пояс: {timezone_label(current)}\n\n"
+        "По нему приходят напоминания о приёмах пищи и добавках. "
+        "Выбери город из списка или напиши пояс в формате Europe/Berlin.",
+        reply_markup=timezone_menu,
+    )
+
+
+@router.message(SettingsStates.choosing_timezone)
+async def timezone_chosen(message: Message, state: FSMContext):
+    """Сохраняет выбранный часовой пояс."""
+    if message.text in MAIN_MENU_BUTTON_ALIASES:
+        await state.clear()
+        from handlers.common import go_main_menu
+        await go_main_menu(message, state)
+        return
+    if message.text == "⬅️ Назад":
+        await settings(message, state)
+        return
+    
+    timezone_name = parse_timezone_input(message.text)
+    if timezone_name is None:
+        await message.answer(
+            "Не знаю такой часовой пояс. Выбери город из списка или напиши пояс в формате Europe/Berlin.",
+            reply_markup=timezone_menu,
+        )
+        return
+    
+    user_id = str(message.from_user.id)
+    await AsyncUserRepository.set_timezone(user_id, timezone_name)
+    logger.info(f"User {user_id} set timezone {timezone_name}")
+    
+    await state.clear()
+    push_menu_stack(message.bot, settings_menu)
+    await message.answer(
+        f"✅ Часовой пояс сохранён: {timezone_label(timezone_name)}",
+        reply_markup=settings_menu,
+    )
+
+
 @router.message(lambda m: m.text == "🗑 Удалить аккаунт")
 async def delete_account_start(message: Message):
     """Начинает процесс удаления аккаунта."""
@@ -105,7 +163,7 @@ async def delete_account_confirm(message: Message):
     message.bot.expecting_account_deletion_confirm = False
     logger.warning(f"User {user_id} confirmed account deletion")
     
-    success = delete_user_account(user_id)
+    success = await run_in_async_session(delete_user_account, user_id)
     
     if success:
         await message.answer(
@@ -13,7 +13,9 @@ from utils.progress_formatters import (
     get_today_summary_text,
 )
 from database.session import get_db_session
+from database.async_session import run_in_async_session
 from database.models import User
+from database.async_repositories import AsyncDashboardRepository
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +28,18 @@ async def _build_recommendations_link(message: Message) -> str:
     return f'🔗 <a href="https://t.me/{me.username}?start=recommendations">Рекомендации от бота</a>'
 
 
+def _register_user(user_id: str) -> bool:
+    """Создаёт пользователя, если его ещё нет. Возвращает True для нового пользователя."""
+    with get_db_session() as session:
+        user = session.query(User).filter(User.user_id == user_id).first()
+        if user:
+            return False
+        session.add(User(user_id=user_id))
+        session.commit()
+        logger.info(f"New user {user_id} registered")
+        return True
+
+
 @router.message(Command("start"))
 async def start(message: Message):
     """Обработчик команды /start."""
@@ -39,22 +53,15 @@ async def start(message: Message):
         await message.answer(_build_recommendations_text(), parse_mode="Markdown")
         return
     logger.info(f"User {user_id} started the bot")
-    is_new_user = False
     
     # Создаём или обновляем пользователя в БД
-    with get_db_session() as session:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            user = User(user_id=user_id)
-            session.add(user)
-            session.commit()
-            logger.info(f"New user {user_id} registered")
-            is_new_user = True
+    is_new_user = await run_in_async_session(_register_user, user_id)
     
-    # Формируем приветствие с прогрессом
-    progress_text = format_progress_block(user_id)
-    water_progress_text = format_water_progress_block(user_id)
-    workouts_text = format_today_workouts_block(user_id, include_date=False)
+    # Формируем приветствие с прогрессом: все данные экрана — одной сессией
+    snapshot = await AsyncDashboardRepository.get_snapshot(user_id)
+    progress_text = format_progress_block(user_id, snapshot)
+    water_progress_text = format_water_progress_block(user_id, snapshot)
+    workouts_text = format_today_workouts_block(user_id, include_date=False, snapshot=snapshot)
     today_line = f"📅 <b>{date.today().strftime('%d.%m.%Y')}</b>"
     recommendations_link = await _build_recommendations_link(message)
     
@@ -81,7 +88,7 @@ async def start(message: Message):
     else:
         # Для существующих пользователей показываем краткий дайджест
         try:
-            summary_text = get_today_summary_text(user_id)
+            summary_text = get_today_summary_text(user_id, snapshot)
         except Exception:
             summary_text = ""
         if summary_text:
@@ -30,7 +30,7 @@ from utils.calendar_utils import (
     build_supplement_calendar_keyboard,
     build_supplement_day_actions_keyboard,
 )
-from database.repositories import SupplementRepository
+from database.async_repositories import AsyncSupplementRepository
 from states.user_states import SupplementStates
 from utils.validators import parse_date
 
@@ -55,7 +55,7 @@ async def supplements(message: Message):
     logger.info(f"User {user_id} opened supplements menu")
     
     try:
-        supplements_list = SupplementRepository.get_supplements(user_id)
+        supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     except Exception as e:
         logger.error(f"Error loading supplements: {e}", exc_info=True)
         await message.answer("Произошла ошибка при загрузке добавок. Попробуйте позже.")
@@ -94,7 +94,7 @@ async def supplements(message: Message):
 async def supplements_list_view(message: Message, state: FSMContext):
     """Показывает список добавок для просмотра."""
     user_id = str(message.from_user.id)
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     
     if not supplements_list:
         push_menu_stack(message.bot, supplements_main_menu(has_items=False))
@@ -161,7 +161,7 @@ async def handle_supplement_name(message: Message, state: FSMContext):
 
 async def start_log_supplement_flow(message: Message, state: FSMContext, user_id: str):
     """Начинает процесс отметки приёма добавки."""
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
 
     if not supplements_list:
         push_menu_stack(message.bot, supplements_main_menu(has_items=False))
@@ -191,7 +191,7 @@ async def start_log_supplement(message: Message, state: FSMContext):
 async def log_supplement_intake(message: Message, state: FSMContext):
     """Обрабатывает выбор добавки для отметки приёма."""
     user_id = str(message.from_user.id)
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     state_data = await state.get_data()
     
     # Проверяем, не является ли это кнопкой меню
@@ -384,7 +384,7 @@ async def handle_history_amount(message: Message, state: FSMContext):
         return
     
     # Сохраняем запись
-    entry_id = SupplementRepository.save_entry(user_id, supplement_id, timestamp, amount)
+    entry_id = await AsyncSupplementRepository.save_entry(user_id, supplement_id, timestamp, amount)
     
     if entry_id:
         # Если это редактирование из календаря, показываем обновлённый день
@@ -472,7 +472,7 @@ async def show_supplement_details(message: Message, sup: dict, index: int):
 async def choose_supplement_for_view(message: Message, state: FSMContext):
     """Обрабатывает выбор добавки для просмотра."""
     user_id = str(message.from_user.id)
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     
     # Ищем добавку по имени (с учетом пробелов и регистра)
     message_text = message.text.strip()
@@ -501,7 +501,10 @@ async def choose_supplement_for_view(message: Message, state: FSMContext):
         )
         return
     
-    selected_supplement = supplements_list[target_index]
+    selected_supplement = dict(supplements_list[target_index])
+    selected_supplement["history"] = await AsyncSupplementRepository.get_supplement_history(
+        user_id, selected_supplement["id"]
+    )
     # Сохраняем и индекс, и ID добавки для надежности
     await state.update_data(
         viewing_index=target_index,
@@ -515,7 +518,7 @@ async def choose_supplement_for_view(message: Message, state: FSMContext):
 async def edit_supplement_start(message: Message, state: FSMContext):
     """Начинает процесс редактирования добавки."""
     user_id = str(message.from_user.id)
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     
     # Проверяем, есть ли текущий просмотр
     data = await state.get_data()
@@ -606,7 +609,7 @@ async def choose_supplement_to_edit(message: Message, state: FSMContext):
     
     # Если добавка еще не выбрана, обрабатываем выбор добавки
     user_id = str(message.from_user.id)
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     
     # Проверяем, не является ли это кнопкой меню
     if message.text in MAIN_MENU_BUTTON_ALIASES:
@@ -691,7 +694,7 @@ async def choose_supplement_to_edit(message: Message, state: FSMContext):
 async def delete_supplement(message: Message, state: FSMContext):
     """Удаляет добавку."""
     user_id = str(message.from_user.id)
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     
     data = await state.get_data()
     viewing_index = data.get("viewing_index")
@@ -703,7 +706,7 @@ async def delete_supplement(message: Message, state: FSMContext):
         # Проверяем, что добавка с таким ID существует
         target = next((s for s in supplements_list if s.get("id") == supplement_id), None)
         if target:
-            success = SupplementRepository.delete_supplement(user_id, supplement_id)
+            success = await AsyncSupplementRepository.delete_supplement(user_id, supplement_id)
             if success:
                 await message.answer(f"🗑 Добавка {target.get('name', 'без названия')} удалена.")
                 await state.clear()
@@ -718,7 +721,7 @@ async def delete_supplement(message: Message, state: FSMContext):
         supplement_id = target.get("id")
         
         if supplement_id:
-            success = SupplementRepository.delete_supplement(user_id, supplement_id)
+            success = await AsyncSupplementRepository.delete_supplement(user_id, supplement_id)
             if success:
                 await message.answer(f"🗑 Добавка {target.get('name', 'без названия')} удалена.")
                 await state.clear()
@@ -740,7 +743,7 @@ async def delete_supplement(message: Message, state: FSMContext):
 async def mark_supplement_from_details(message: Message, state: FSMContext):
     """Отмечает приём добавки из деталей."""
     user_id = str(message.from_user.id)
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     
     data = await state.get_data()
     viewing_index = data.get("viewing_index")
@@ -804,7 +807,7 @@ async def save_supplement(message: Message, state: FSMContext):
         "notifications_enabled": data.get("notifications_enabled", True),
     }
     
-    saved_id = SupplementRepository.save_supplement(user_id, supplement_payload, supplement_id)
+    saved_id = await AsyncSupplementRepository.save_supplement(user_id, supplement_payload, supplement_id)
     
     if saved_id:
         await state.clear()
@@ -1530,7 +1533,7 @@ async def save_supplement_from_test(message: Message, state: FSMContext):
             "notifications_enabled": data.get("notifications_enabled", False),
         }
         
-        saved_id = SupplementRepository.save_supplement(user_id, supplement_payload)
+        saved_id = await AsyncSupplementRepository.save_supplement(user_id, supplement_payload)
         
         if saved_id:
             await state.clear()
@@ -1602,16 +1605,30 @@ async def show_supplement_calendar(message: Message, user_id: str, year: Optiona
     today = date.today()
     year = year or today.year
     month = month or today.month
-    keyboard = build_supplement_calendar_keyboard(user_id, year, month)
+    keyboard = await build_supplement_calendar_keyboard(user_id, year, month)
     await message.answer(
         "📅 Календарь добавок. Выберите день, чтобы посмотреть, добавить или изменить приёмы:",
         reply_markup=keyboard,
     )
 
 
+def parse_entry_id(parts: list[str]) -> Optional[int]:
+    """
+    ID записи из callback_data вида supcal_edit:<дата>:<entry_id>.
+
+    Кнопки старого формата (индексы добавки и записи) считаются устаревшими.
+    """
+    if len(parts) != 3:
+        return None
+    try:
+        return int(parts[2])
+    except ValueError:
+        return None
+
+
 async def show_supplement_day_entries(message: Message, user_id: str, target_date: date):
     """Показывает записи приёма добавок за день."""
-    entries = SupplementRepository.get_entries_for_day(user_id, target_date)
+    entries = await AsyncSupplementRepository.get_entries_for_day(user_id, target_date)
     
     if not entries:
         await message.answer(
@@ -1651,7 +1668,7 @@ async def navigate_supplement_calendar(callback: CallbackQuery):
     parts = callback.data.split(":")
     year, month = map(int, parts[1].split("-"))
     user_id = str(callback.from_user.id)
-    keyboard = build_supplement_calendar_keyboard(user_id, year, month)
+    keyboard = await build_supplement_calendar_keyboard(user_id, year, month)
     await callback.message.edit_reply_markup(reply_markup=keyboard)
 
 
@@ -1684,7 +1701,7 @@ async def add_supplement_from_calendar(callback: CallbackQuery, state: FSMContex
     target_date = date.fromisoformat(parts[1])
     user_id = str(callback.from_user.id)
     
-    supplements_list = SupplementRepository.get_supplements(user_id)
+    supplements_list = await AsyncSupplementRepository.get_supplement_list(user_id)
     if not supplements_list:
         await callback.message.answer("Сначала создай добавку, чтобы отмечать приём.")
         return
@@ -1705,38 +1722,19 @@ async def delete_supplement_entry(callback: CallbackQuery):
     await callback.answer()
     parts = callback.data.split(":")
     target_date = date.fromisoformat(parts[1])
-    sup_idx = int(parts[2]) if len(parts) > 2 else None
-    entry_idx = int(parts[3]) if len(parts) > 3 else None
+    entry_id = parse_entry_id(parts)
     user_id = str(callback.from_user.id)
     
-    if sup_idx is None or entry_idx is None:
-        await callback.message.answer("❌ Не найдена запись для удаления")
-        await show_supplement_day_entries(callback.message, user_id, target_date)
-        return
-    
-    supplements_list = SupplementRepository.get_supplements(user_id)
-    if sup_idx >= len(supplements_list):
-        await callback.message.answer("❌ Не нашёл запись для удаления")
-        await show_supplement_day_entries(callback.message, user_id, target_date)
-        return
-    
-    history = supplements_list[sup_idx].get("history", [])
-    if entry_idx >= len(history):
+    if entry_id is None:
         await callback.message.answer("❌ Не нашёл запись для удаления")
         await show_supplement_day_entries(callback.message, user_id, target_date)
         return
     
-    removed = history[entry_idx]
-    entry_id = removed.get("id") if isinstance(removed, dict) else None
-    
-    if entry_id:
-        success = SupplementRepository.delete_entry(user_id, entry_id)
-        if success:
-            await callback.message.answer("✅ Приём удалён")
-        else:
-            await callback.message.answer("❌ Не удалось удалить запись")
+    success = await AsyncSupplementRepository.delete_entry(user_id, entry_id)
+    if success:
+        await callback.message.answer("✅ Приём удалён")
     else:
-        await callback.message.answer("❌ Не найдена запись для удаления")
+        await callback.message.answer("❌ Не удалось удалить запись")
     
     await show_supplement_day_entries(callback.message, user_id, target_date)
 
@@ -1747,26 +1745,16 @@ async def edit_supplement_entry(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
     parts = callback.data.split(":")
     target_date = date.fromisoformat(parts[1])
-    sup_idx = int(parts[2]) if len(parts) > 2 else None
-    entry_idx = int(parts[3]) if len(parts) > 3 else None
+    entry_id = parse_entry_id(parts)
     user_id = str(callback.from_user.id)
     
-    if sup_idx is None or entry_idx is None:
-        await callback.message.answer("❌ Не найдена запись для редактирования")
-        return
-    
-    supplements_list = SupplementRepository.get_supplements(user_id)
-    if sup_idx >= len(supplements_list):
-        await callback.message.answer("❌ Не нашёл запись для редактирования")
-        return
-    
-    history = supplements_list[sup_idx].get("history", [])
-    if entry_idx >= len(history):
+    entry = None
+    if entry_id is not None:
+        entry = await AsyncSupplementRepository.get_entry(user_id, entry_id)
+    if not entry:
         await callback.message.answer("❌ Не нашёл запись для редактирования")
         return
     
-    entry = history[entry_idx]
-    entry_id = entry.get("id")
     original_amount = entry.get("amount")
     original_timestamp = entry.get("timestamp")
     
@@ -1779,13 +1767,12 @@ async def edit_supplement_entry(callback: CallbackQuery, state: FSMContext):
         original_timestamp = datetime.combine(target_date, datetime.now().time())
     
     # Удаляем старую запись
-    if entry_id:
-        SupplementRepository.delete_entry(user_id, entry_id)
+    await AsyncSupplementRepository.delete_entry(user_id, entry_id)
     
     # Начинаем процесс добавления новой записи
     await state.update_data(
-        supplement_name=supplements_list[sup_idx].get("name", ""),
-        supplement_id=supplements_list[sup_idx].get("id"),
+        supplement_name=entry["supplement_name"],
+        supplement_id=entry["supplement_id"],
         entry_date=target_date.isoformat(),
         original_amount=original_amount,
         original_timestamp=original_timestamp.isoformat(),
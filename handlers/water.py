@@ -1,6 +1,7 @@
 """Обработчики для контроля воды."""
 import logging
 from datetime import date
+from typing import Optional
 from aiogram import Router
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -18,7 +19,7 @@ from utils.calendar_utils import (
     build_water_day_actions_keyboard,
 )
 from utils.progress_formatters import build_water_progress_bar
-from database.repositories import WaterRepository, WeightRepository
+from database.async_repositories import AsyncWaterRepository, AsyncWeightRepository
 
 logger = logging.getLogger(__name__)
 
@@ -31,9 +32,13 @@ def reset_user_state(message: Message, *, keep_supplements: bool = False):
     pass
 
 
-def get_water_recommended(user_id: str) -> float:
+async def get_water_recommended(user_id: str) -> float:
     """Получает рекомендуемую норму воды для пользователя."""
-    weight = WeightRepository.get_last_weight(user_id)
+    return calculate_water_recommended(await AsyncWeightRepository.get_last_weight(user_id))
+
+
+def calculate_water_recommended(weight: Optional[float]) -> float:
+    """Рекомендуемая норма воды по весу (кг)."""
     if weight and weight > 0:
         # Формула: вес (кг) × 32.5 мл
         return weight * 32.5
@@ -49,13 +54,13 @@ async def water(message: Message):
     logger.info(f"User {user_id} opened water menu")
     
     today = date.today()
-    daily_total = WaterRepository.get_daily_total(user_id, today)
-    recommended = get_water_recommended(user_id)
+    daily_total = await AsyncWaterRepository.get_daily_total(user_id, today)
+    weight = await AsyncWeightRepository.get_last_weight(user_id)
+    recommended = calculate_water_recommended(weight)
     
     progress = round((daily_total / recommended) * 100) if recommended > 0 else 0
     bar = build_water_progress_bar(daily_total, recommended)
     
-    weight = WeightRepository.get_last_weight(user_id)
     norm_info = ""
     if weight and weight > 0:
         norm_info = f"\n📊 Норма рассчитана по твоему весу ({weight:.1f} кг): {weight:.1f} × 32.5 мл = {recommended:.0f} мл"
@@ -88,10 +93,10 @@ async def quick_add_water_250(message: Message, state: FSMContext):
     
     entry_date = date.today()
     amount = 300.0
-    WaterRepository.save_water_entry(user_id, amount, entry_date)
+    await AsyncWaterRepository.save_water_entry(user_id, amount, entry_date)
     
-    daily_total = WaterRepository.get_daily_total(user_id, entry_date)
-    recommended = get_water_recommended(user_id)
+    daily_total = await AsyncWaterRepository.get_daily_total(user_id, entry_date)
+    recommended = await get_water_recommended(user_id)
     progress = round((daily_total / recommended) * 100) if recommended > 0 else 0
     bar = build_water_progress_bar(daily_total, recommended)
     
@@ -118,10 +123,10 @@ async def quick_add_water_250_cb(callback: CallbackQuery, state: FSMContext):
     
     entry_date = date.today()
     amount = 300.0
-    WaterRepository.save_water_entry(user_id, amount, entry_date)
+    await AsyncWaterRepository.save_water_entry(user_id, amount, entry_date)
     
-    daily_total = WaterRepository.get_daily_total(user_id, entry_date)
-    recommended = get_water_recommended(user_id)
+    daily_total = await AsyncWaterRepository.get_daily_total(user_id, entry_date)
+    recommended = await get_water_recommended(user_id)
     progress = round((daily_total / recommended) * 100) if recommended > 0 else 0
     bar = build_water_progress_bar(daily_total, recommended)
     
@@ -155,10 +160,10 @@ async def quick_add_water_amount_cb(callback: CallbackQuery, state: FSMContext):
     await state.clear()
     
     entry_date = date.today()
-    WaterRepository.save_water_entry(user_id, amount, entry_date)
+    await AsyncWaterRepository.save_water_entry(user_id, amount, entry_date)
     
-    daily_total = WaterRepository.get_daily_total(user_id, entry_date)
-    recommended = get_water_recommended(user_id)
+    daily_total = await AsyncWaterRepository.get_daily_total(user_id, entry_date)
+    recommended = await get_water_recommended(user_id)
     progress = round((daily_total / recommended) * 100) if recommended > 0 else 0
     bar = build_water_progress_bar(daily_total, recommended)
     
@@ -204,7 +209,7 @@ async def water_calendar(message: Message):
 
 async def show_water_calendar(message: Message, user_id: str, year: int, month: int):
     """Показывает календарь воды."""
-    keyboard = build_water_calendar_keyboard(user_id, year, month)
+    keyboard = await build_water_calendar_keyboard(user_id, year, month)
     await message.answer(
         "📆 Календарь воды\n\nВыбери день, чтобы посмотреть или добавить воду:",
         reply_markup=keyboard,
@@ -243,9 +248,9 @@ async def select_water_calendar_day(callback: CallbackQuery):
 
 async def show_water_day(message: Message, user_id: str, target_date: date):
     """Показывает записи воды за день."""
-    entries = WaterRepository.get_entries_for_day(user_id, target_date)
-    daily_total = WaterRepository.get_daily_total(user_id, target_date)
-    recommended = get_water_recommended(user_id)
+    entries = await AsyncWaterRepository.get_entries_for_day(user_id, target_date)
+    daily_total = await AsyncWaterRepository.get_daily_total(user_id, target_date)
+    recommended = await get_water_recommended(user_id)
 
     if not entries:
         await message.answer(
@@ -291,7 +296,7 @@ async def delete_water_from_calendar(callback: CallbackQuery):
     entry_id = int(parts[2])
     user_id = str(callback.from_user.id)
 
-    success = WaterRepository.delete_entry(entry_id, user_id)
+    success = await AsyncWaterRepository.delete_entry(entry_id, user_id)
     if success:
         await callback.message.answer("✅ Запись воды удалена.")
     else:
@@ -333,11 +338,11 @@ async def process_water_amount(message: Message, state: FSMContext):
             entry_date = date.fromisoformat(entry_date_str)
         except ValueError:
             entry_date = date.today()
-    WaterRepository.save_water_entry(user_id, amount, entry_date)
+    await AsyncWaterRepository.save_water_entry(user_id, amount, entry_date)
     
     await state.clear()
     
-    daily_total = WaterRepository.get_daily_total(user_id, entry_date)
+    daily_total = await AsyncWaterRepository.get_daily_total(user_id, entry_date)
     
     push_menu_stack(message.bot, water_menu)
     date_label = entry_date.strftime("%d.%m.%Y")
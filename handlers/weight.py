@@ -12,7 +12,7 @@ from utils.keyboards import (
     training_date_menu,
     other_day_menu,
 )
-from database.repositories import WeightRepository
+from database.async_repositories import AsyncWeightRepository
 from states.user_states import WeightStates
 from utils.validators import parse_weight, parse_date
 from utils.calendar_utils import (
@@ -74,7 +74,7 @@ async def my_weight(message: Message):
     user_id = str(message.from_user.id)
     logger.info(f"User {user_id} viewed weight history")
     
-    weights = WeightRepository.get_weights(user_id)
+    weights = await AsyncWeightRepository.get_weights(user_id)
     
     if not weights:
         push_menu_stack(message.bot, weight_menu)
@@ -85,6 +85,13 @@ async def my_weight(message: Message):
     for i, w in enumerate(weights, 1):
         text += f"{i}. {w.date.strftime('%d.%m.%Y')} — {w.value} кг\n"
     
+    stats = await AsyncWeightRepository.get_weight_stats(user_id)
+    if stats and stats["count"] > 1:
+        text += (
+            f"\nМин: {stats['min']:.1f} кг · Макс: {stats['max']:.1f} кг · "
+            f"Среднее: {stats['avg']:.1f} кг\n"
+        )
+    
     push_menu_stack(message.bot, weight_menu)
     await message.answer(text, reply_markup=weight_menu)
 
@@ -95,7 +102,7 @@ async def my_measurements(message: Message):
     user_id = str(message.from_user.id)
     logger.info(f"User {user_id} viewed measurements history")
     
-    measurements = WeightRepository.get_measurements(user_id)
+    measurements = await AsyncWeightRepository.get_measurements(user_id)
     
     if not measurements:
         push_menu_stack(message.bot, measurements_menu)
@@ -135,7 +142,7 @@ async def add_weight_start(message: Message, state: FSMContext):
     target_date = date.today()
     
     # Проверяем, есть ли уже вес за сегодня
-    existing_weight = WeightRepository.get_weight_for_date(user_id, target_date)
+    existing_weight = await AsyncWeightRepository.get_weight_for_date(user_id, target_date)
     
     if existing_weight:
         # Если вес уже есть, переходим в режим редактирования
@@ -230,7 +237,7 @@ async def handle_weight_input(message: Message, state: FSMContext):
     try:
         if weight_id:
             # Редактирование существующей записи
-            success = WeightRepository.update_weight(weight_id, user_id, str(weight_value))
+            success = await AsyncWeightRepository.update_weight(weight_id, user_id, str(weight_value))
             if success:
                 logger.info(f"User {user_id} updated weight {weight_id}: {weight_value} kg on {entry_date}")
                 await state.clear()
@@ -247,7 +254,7 @@ async def handle_weight_input(message: Message, state: FSMContext):
                 await state.clear()
         else:
             # Создание новой записи
-            WeightRepository.save_weight(user_id, str(weight_value), entry_date)
+            await AsyncWeightRepository.save_weight(user_id, str(weight_value), entry_date)
             logger.info(f"User {user_id} saved weight: {weight_value} kg on {entry_date}")
             
             await state.clear()
@@ -268,7 +275,7 @@ async def handle_weight_input(message: Message, state: FSMContext):
 async def delete_weight_start(message: Message, state: FSMContext):
     """Начинает процесс удаления веса."""
     user_id = str(message.from_user.id)
-    weights = WeightRepository.get_weights(user_id)
+    weights = await AsyncWeightRepository.get_weights(user_id)
     
     if not weights:
         push_menu_stack(message.bot, weight_menu)
@@ -300,7 +307,7 @@ async def handle_weight_delete_choice(message: Message, state: FSMContext):
             weight_data = weights_list[index]
             weight_id = weight_data["id"]
             
-            success = WeightRepository.delete_weight(weight_id, user_id)
+            success = await AsyncWeightRepository.delete_weight(weight_id, user_id)
             if success:
                 await message.answer(
                     f"✅ Удалил запись: {weight_data['date']} — {weight_data['value']} кг"
@@ -436,7 +443,7 @@ async def handle_measurements_input(message: Message, state: FSMContext):
 
     try:
         if measurement_id:
-            success = WeightRepository.update_measurement(
+            success = await AsyncWeightRepository.update_measurement(
                 measurement_id,
                 user_id,
                 measurements_mapped,
@@ -454,7 +461,7 @@ async def handle_measurements_input(message: Message, state: FSMContext):
                 await message.answer("⚠️ Не удалось обновить замеры.")
                 await state.clear()
         else:
-            WeightRepository.save_measurements(user_id, measurements_mapped, entry_date)
+            await AsyncWeightRepository.save_measurements(user_id, measurements_mapped, entry_date)
             logger.info(f"User {user_id} saved measurements on {entry_date}")
 
             await state.clear()
@@ -473,7 +480,7 @@ async def handle_measurements_input(message: Message, state: FSMContext):
 async def delete_measurements_start(message: Message, state: FSMContext):
     """Начинает процесс удаления замеров."""
     user_id = str(message.from_user.id)
-    measurements = WeightRepository.get_measurements(user_id)
+    measurements = await AsyncWeightRepository.get_measurements(user_id)
     
     if not measurements:
         push_menu_stack(message.bot, measurements_menu)
@@ -522,7 +529,7 @@ async def handle_measurements_delete_choice(message: Message, state: FSMContext)
             measurement_data = measurements_list[index]
             measurement_id = measurement_data["id"]
             
-            success = WeightRepository.delete_measurement(measurement_id, user_id)
+            success = await AsyncWeightRepository.delete_measurement(measurement_id, user_id)
             if success:
                 await message.answer(
                     f"✅ Удалил замеры от {measurement_data['date']}"
@@ -565,7 +572,7 @@ async def show_weight_calendar_view(message: Message, user_id: str, year: Option
     today = date.today()
     year = year or today.year
     month = month or today.month
-    keyboard = build_weight_calendar_keyboard(user_id, year, month)
+    keyboard = await build_weight_calendar_keyboard(user_id, year, month)
     await message.answer(
         "📆 Календарь веса\n\nВыбери день, чтобы посмотреть, изменить или удалить вес:",
         reply_markup=keyboard,
@@ -577,7 +584,7 @@ async def show_measurements_calendar_view(message: Message, user_id: str, year:
     today = date.today()
     year = year or today.year
     month = month or today.month
-    keyboard = build_measurement_calendar_keyboard(user_id, year, month)
+    keyboard = await build_measurement_calendar_keyboard(user_id, year, month)
     await message.answer(
         "📆 Календарь замеров\n\nВыбери день, чтобы посмотреть, изменить или удалить замеры:",
         reply_markup=keyboard,
@@ -646,7 +653,7 @@ async def select_measurements_calendar_day(callback: CallbackQuery):
 
 async def show_day_weight(message: Message, user_id: str, target_date: date):
     """Показывает вес за день."""
-    weight = WeightRepository.get_weight_for_date(user_id, target_date)
+    weight = await AsyncWeightRepository.get_weight_for_date(user_id, target_date)
     
     if not weight:
         await message.answer(
@@ -665,7 +672,7 @@ async def show_day_weight(message: Message, user_id: str, target_date: date):
 
 async def show_day_measurements(message: Message, user_id: str, target_date: date):
     """Показывает замеры за день."""
-    measurements = WeightRepository.get_measurement_for_date(user_id, target_date)
+    measurements = await AsyncWeightRepository.get_measurement_for_date(user_id, target_date)
 
     if not measurements:
         await message.answer(
@@ -694,7 +701,7 @@ async def add_weight_from_calendar(callback: CallbackQuery, state: FSMContext):
     user_id = str(callback.from_user.id)
     
     # Проверяем, есть ли уже вес за этот день
-    existing_weight = WeightRepository.get_weight_for_date(user_id, target_date)
+    existing_weight = await AsyncWeightRepository.get_weight_for_date(user_id, target_date)
     
     if existing_weight:
         # Если вес уже есть, переходим в режим редактирования
@@ -721,7 +728,7 @@ async def add_measurements_from_calendar(callback: CallbackQuery, state: FSMCont
     target_date = date.fromisoformat(parts[1])
     user_id = str(callback.from_user.id)
 
-    existing_measurements = WeightRepository.get_measurement_for_date(user_id, target_date)
+    existing_measurements = await AsyncWeightRepository.get_measurement_for_date(user_id, target_date)
 
     if existing_measurements:
         await state.update_data(entry_date=target_date.isoformat(), measurement_id=existing_measurements.id)
@@ -751,7 +758,7 @@ async def edit_weight_from_calendar(callback: CallbackQuery, state: FSMContext):
     target_date = date.fromisoformat(parts[1])
     user_id = str(callback.from_user.id)
     
-    weight = WeightRepository.get_weight_for_date(user_id, target_date)
+    weight = await AsyncWeightRepository.get_weight_for_date(user_id, target_date)
     if not weight:
         await callback.message.answer("❌ Не найдена запись веса для редактирования.")
         return
@@ -775,7 +782,7 @@ async def edit_measurements_from_calendar(callback: CallbackQuery, state: FSMCon
     target_date = date.fromisoformat(parts[1])
     user_id = str(callback.from_user.id)
 
-    measurements = WeightRepository.get_measurement_for_date(user_id, target_date)
+    measurements = await AsyncWeightRepository.get_measurement_for_date(user_id, target_date)
     if not measurements:
         await callback.message.answer("❌ Не найдены замеры для редактирования.")
         return
@@ -800,12 +807,12 @@ async def delete_weight_from_calendar(callback: CallbackQuery):
     target_date = date.fromisoformat(parts[1])
     user_id = str(callback.from_user.id)
     
-    weight = WeightRepository.get_weight_for_date(user_id, target_date)
+    weight = await AsyncWeightRepository.get_weight_for_date(user_id, target_date)
     if not weight:
         await callback.message.answer("❌ Не найдена запись веса для удаления.")
         return
     
-    success = WeightRepository.delete_weight(weight.id, user_id)
+    success = await AsyncWeightRepository.delete_weight(weight.id, user_id)
     if success:
         await callback.message.answer("✅ Вес удалён")
         await show_day_weight(callback.message, user_id, target_date)
@@ -821,12 +828,12 @@ async def delete_measurements_from_calendar(callback: CallbackQuery):
     target_date = date.fromisoformat(parts[1])
     user_id = str(callback.from_user.id)
 
-    measurements = WeightRepository.get_measurement_for_date(user_id, target_date)
+    measurements = await AsyncWeightRepository.get_measurement_for_date(user_id, target_date)
     if not measurements:
         await callback.message.answer("❌ Не найдены замеры для удаления.")
         return
 
-    success = WeightRepository.delete_measurement(measurements.id, user_id)
+    success = await AsyncWeightRepository.delete_measurement(measurements.id, user_id)
     if success:
         await callback.message.answer("✅ Замеры удалены")
         await show_day_measurements(callback.message, user_id, target_date)
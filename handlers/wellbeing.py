@@ -7,7 +7,7 @@ from aiogram import Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 
-from database.repositories.wellbeing_repository import WellbeingRepository
+from database.async_repositories import AsyncWellbeingRepository
 from states.user_states import WellbeingStates
 from utils.keyboards import (
     WELLBEING_BUTTON_TEXT,
@@ -105,7 +105,7 @@ async def show_wellbeing_calendar_view(
     today = date.today()
     year = year or today.year
     month = month or today.month
-    keyboard = build_wellbeing_calendar_keyboard(user_id, year, month)
+    keyboard = await build_wellbeing_calendar_keyboard(user_id, year, month)
     await message.answer(
         "📆 Календарь самочувствия\n\nВыбери день, чтобы посмотреть, добавить, изменить или удалить запись:",
         reply_markup=keyboard,
@@ -167,7 +167,7 @@ async def edit_wellbeing_from_calendar(callback: CallbackQuery, state: FSMContex
     entry_id = int(parts[2])
     user_id = str(callback.from_user.id)
 
-    entry = WellbeingRepository.get_entry_by_id(entry_id, user_id)
+    entry = await AsyncWellbeingRepository.get_entry_by_id(entry_id, user_id)
     if not entry:
         await callback.message.answer("❌ Не нашёл запись для редактирования.")
         return
@@ -216,7 +216,7 @@ async def delete_wellbeing_from_calendar(callback: CallbackQuery):
     entry_id = int(parts[2])
     user_id = str(callback.from_user.id)
 
-    success = WellbeingRepository.delete_entry(entry_id, user_id)
+    success = await AsyncWellbeingRepository.delete_entry(entry_id, user_id)
     if success:
         await callback.message.answer("✅ Запись удалена")
         await show_wellbeing_day(callback.message, user_id, target_date)
@@ -226,7 +226,7 @@ async def delete_wellbeing_from_calendar(callback: CallbackQuery):
 
 async def show_wellbeing_day(message: Message, user_id: str, target_date: date):
     """Показывает записи самочувствия за день."""
-    entries = WellbeingRepository.get_entries_for_date(user_id, target_date)
+    entries = await AsyncWellbeingRepository.get_entries_for_date(user_id, target_date)
 
     if not entries:
         await message.answer(
@@ -336,7 +336,7 @@ async def handle_comment(message: Message, state: FSMContext):
     return_to_calendar = data.get("return_to_calendar", False)
     entry_date = date.fromisoformat(entry_date_raw) if entry_date_raw else date.today()
 
-    WellbeingRepository.save_comment_entry(
+    await AsyncWellbeingRepository.save_comment_entry(
         user_id=str(message.from_user.id),
         comment=comment,
         entry_date=entry_date,
@@ -369,7 +369,7 @@ async def handle_edit_comment(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    updated = WellbeingRepository.update_comment_entry(
+    updated = await AsyncWellbeingRepository.update_comment_entry(
         entry_id=entry_id,
         user_id=str(message.from_user.id),
         comment=comment,
@@ -403,7 +403,7 @@ async def finalize_quick_entry(message: Message, state: FSMContext, difficulty:
         await show_wellbeing_menu(message, state, "Возвращаю в меню самочувствия.")
         return
 
-    WellbeingRepository.save_quick_entry(
+    await AsyncWellbeingRepository.save_quick_entry(
         user_id=str(message.from_user.id),
         mood=mood,
         influence=influence,
@@ -481,7 +481,7 @@ async def finalize_quick_edit(message: Message, state: FSMContext, difficulty: s
         await state.clear()
         return
 
-    updated = WellbeingRepository.update_quick_entry(
+    updated = await AsyncWellbeingRepository.update_quick_entry(
         entry_id=entry_id,
         user_id=str(message.from_user.id),
         mood=mood,
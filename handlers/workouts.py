@@ -21,9 +21,18 @@ from utils.keyboards import (
     grip_type_menu,
 )
 from states.user_states import WorkoutStates
-from database.repositories import WorkoutRepository
-from database.repositories import CustomWorkoutExerciseRepository
-from utils.workout_utils import calculate_workout_calories
+from database.async_repositories import (
+    AsyncCustomWorkoutExerciseRepository,
+    AsyncDashboardRepository,
+    AsyncWeightRepository,
+    AsyncWorkoutRepository,
+)
+from utils.workout_utils import (
+    DEFAULT_WEIGHT_KG,
+    calculate_workout_calories,
+    calculate_workouts_calories,
+    workout_dates_without_calories,
+)
 from utils.validators import parse_date
 from utils.formatters import format_count_with_unit
 from utils.calendar_utils import build_workout_calendar_keyboard
@@ -34,9 +43,9 @@ logger = logging.getLogger(__name__)
 router = Router()
 
 
-def _get_exercise_menu(user_id: str, category: str):
+async def _get_exercise_menu(user_id: str, category: str):
     """Возвращает меню упражнений c учётом пользовательских."""
-    custom_exercises = CustomWorkoutExerciseRepository.get_user_exercises(user_id, category)
+    custom_exercises = await AsyncCustomWorkoutExerciseRepository.get_user_exercises(user_id, category)
     return build_exercise_menu(category, custom_exercises)
 
 
@@ -55,7 +64,8 @@ async def show_training_menu(message: Message, state: FSMContext):
     
     # Показываем прогресс тренировок
     from utils.progress_formatters import format_today_workouts_block
-    workouts_text = format_today_workouts_block(user_id, include_date=False)
+    snapshot = await AsyncDashboardRepository.get_snapshot(user_id)
+    workouts_text = format_today_workouts_block(user_id, include_date=False, snapshot=snapshot)
     
     push_menu_stack(message.bot, training_menu)
     await message.answer(
@@ -122,7 +132,7 @@ async def show_workout_calendar(message: Message, user_id: str, year: Optional[i
     today = date.today()
     year = year or today.year
     month = month or today.month
-    keyboard = build_workout_calendar_keyboard(user_id, year, month)
+    keyboard = await build_workout_calendar_keyboard(user_id, year, month)
     await message.answer(
         "📆 Выбери день, чтобы посмотреть, изменить или удалить тренировку:",
         reply_markup=keyboard,
@@ -131,7 +141,7 @@ async def show_workout_calendar(message: Message, user_id: str, year: Optional[i
 
 async def show_day_workouts(message: Message, user_id: str, target_date: date):
     """Показывает тренировки за день."""
-    workouts = WorkoutRepository.get_workouts_for_day(user_id, target_date)
+    workouts = await AsyncWorkoutRepository.get_workouts_for_day(user_id, target_date)
     
     if not workouts:
         await message.answer(
@@ -143,9 +153,13 @@ async def show_day_workouts(message: Message, user_id: str, target_date: date):
     text = [f"📅 {target_date.strftime('%d.%m.%Y')} — тренировки:"]
     total_calories = 0.0
     
-    for w in workouts:
+    weights_by_date = await AsyncWeightRepository.get_weights_as_of(
+        user_id, workout_dates_without_calories(workouts)
+    )
+    workout_calories = calculate_workouts_calories(user_id, workouts, weights_by_date)
+    
+    for w, entry_calories in zip(workouts, workout_calories):
         variant_text = f" ({w.variant})" if w.variant else ""
-        entry_calories = w.calories or calculate_workout_calories(user_id, w.exercise, w.variant, w.count)
         total_calories += entry_calories
         formatted_count = format_count_with_unit(w.count, w.variant)
         text.append(
@@ -216,7 +230,7 @@ async def edit_workout(callback: CallbackQuery, state: FSMContext):
     target_date = date.fromisoformat(parts[2]) if len(parts) > 2 else date.today()
     user_id = str(callback.from_user.id)
     
-    workout = WorkoutRepository.get_workout_by_id(workout_id, user_id)
+    workout = await AsyncWorkoutRepository.get_workout_by_id(workout_id, user_id)
     if not workout:
         await callback.message.answer("❌ Не нашёл тренировку для изменения.")
         return
@@ -264,10 +278,11 @@ async def handle_workout_edit_count(message: Message, state: FSMContext):
         return
     
     # Пересчитываем калории
-    calories = calculate_workout_calories(user_id, exercise, variant, count)
+    weight = await AsyncWeightRepository.get_last_weight(user_id)
+    calories = calculate_workout_calories(user_id, exercise, variant, count, weight=weight or DEFAULT_WEIGHT_KG)
     
     # Обновляем тренировку
-    success = WorkoutRepository.update_workout(workout_id, user_id, count, calories)
+    success = await AsyncWorkoutRepository.update_workout(workout_id, user_id, count, calories)
     
     if success:
         if isinstance(target_date_str, str):
@@ -301,7 +316,7 @@ async def delete_workout_from_calendar(callback: CallbackQuery):
     target_date = date.fromisoformat(parts[2]) if len(parts) > 2 else date.today()
     user_id = str(callback.from_user.id)
     
-    success = WorkoutRepository.delete_workout(workout_id, user_id)
+    success = await AsyncWorkoutRepository.delete_workout(workout_id, user_id)
     if success:
         await callback.message.answer("✅ Тренировка удалена")
         await show_day_workouts(callback.message, user_id, target_date)
@@ -316,14 +331,14 @@ async def choose_category(message: Message, state: FSMContext):
         category = "bodyweight"
         await state.update_data(category=category)
         await state.set_state(WorkoutStates.choosing_exercise)
-        menu = _get_exercise_menu(str(message.from_user.id), "bodyweight")
+        menu = await _get_exercise_menu(str(message.from_user.id), "bodyweight")
         push_menu_stack(message.bot, menu)
         await message.answer("Выбери упражнение:", reply_markup=menu)
     elif message.text == "С утяжелителем":
         category = "weighted"
         await state.update_data(category=category)
         await state.set_state(WorkoutStates.choosing_exercise)
-        menu = _get_exercise_menu(str(message.from_user.id), "weighted")
+        menu = await _get_exercise_menu(str(message.from_user.id), "weighted")
         push_menu_stack(message.bot, menu)
         await message.answer("Выбери упражнение:", reply_markup=menu)
     else:
@@ -413,7 +428,7 @@ async def choose_grip_type(message: Message, state: FSMContext):
     if grip_type == "⬅️ Назад" or grip_type in MAIN_MENU_BUTTON_ALIASES:
         if grip_type == "⬅️ Назад":
             await state.set_state(WorkoutStates.choosing_exercise)
-            menu = _get_exercise_menu(str(message.from_user.id), "bodyweight")
+            menu = await _get_exercise_menu(str(message.from_user.id), "bodyweight")
             push_menu_stack(message.bot, menu)
             await message.answer("Выбери упражнение:", reply_markup=menu)
         else:
@@ -450,11 +465,11 @@ async def handle_custom_exercise(message: Message, state: FSMContext):
             category = data.get("category", "bodyweight")
             await state.set_state(WorkoutStates.choosing_exercise)
             if category == "weighted":
-                menu = _get_exercise_menu(str(message.from_user.id), "weighted")
+                menu = await _get_exercise_menu(str(message.from_user.id), "weighted")
                 push_menu_stack(message.bot, menu)
                 await message.answer("Выбери упражнение:", reply_markup=menu)
             else:
-                menu = _get_exercise_menu(str(message.from_user.id), "bodyweight")
+                menu = await _get_exercise_menu(str(message.from_user.id), "bodyweight")
                 push_menu_stack(message.bot, menu)
                 await message.answer("Выбери упражнение:", reply_markup=menu)
         else:
@@ -474,7 +489,7 @@ async def handle_custom_exercise(message: Message, state: FSMContext):
         await message.answer("⚠️ Слишком длинное название. Ограничение — 64 символа.")
         return
 
-    CustomWorkoutExerciseRepository.save_exercise(
+    await AsyncCustomWorkoutExerciseRepository.save_exercise(
         user_id=str(message.from_user.id),
         category=category,
         name=exercise,
@@ -513,11 +528,11 @@ async def handle_count_input(message: Message, state: FSMContext):
         
         await state.set_state(WorkoutStates.choosing_exercise)
         if category == "weighted":
-            menu = _get_exercise_menu(str(message.from_user.id), "weighted")
+            menu = await _get_exercise_menu(str(message.from_user.id), "weighted")
             push_menu_stack(message.bot, menu)
             await message.answer("Выбери упражнение:", reply_markup=menu)
         else:
-            menu = _get_exercise_menu(str(message.from_user.id), "bodyweight")
+            menu = await _get_exercise_menu(str(message.from_user.id), "bodyweight")
             push_menu_stack(message.bot, menu)
             await message.answer("Выбери упражнение:", reply_markup=menu)
         return
@@ -565,7 +580,8 @@ async def handle_count_input(message: Message, state: FSMContext):
         await state.clear()
         from utils.progress_formatters import format_today_workouts_block
 
-        workouts_text = format_today_workouts_block(user_id, include_date=False)
+        snapshot = await AsyncDashboardRepository.get_snapshot(user_id)
+        workouts_text = format_today_workouts_block(user_id, include_date=False, snapshot=snapshot)
         push_menu_stack(message.bot, training_menu)
         await message.answer(
             f"✅ Тренировка завершена!\n\n{workouts_text}\n\nВыбери действие:",
@@ -606,10 +622,11 @@ async def handle_count_input(message: Message, state: FSMContext):
         entry_date = date.today()
     
     # Рассчитываем калории
-    calories = calculate_workout_calories(user_id, exercise, variant, count)
+    weight = await AsyncWeightRepository.get_last_weight(user_id)
+    calories = calculate_workout_calories(user_id, exercise, variant, count, weight=weight or DEFAULT_WEIGHT_KG)
     
     # Сохраняем тренировку
-    workout = WorkoutRepository.save_workout(
+    workout = await AsyncWorkoutRepository.save_workout(
         user_id=user_id,
         exercise=exercise,
         count=count,
@@ -621,7 +638,7 @@ async def handle_count_input(message: Message, state: FSMContext):
     logger.info(f"User {user_id} saved workout: {exercise} x {count} on {entry_date}")
     
     # Получаем общее количество для этого упражнения за день
-    workouts_today = WorkoutRepository.get_workouts_for_day(user_id, entry_date)
+    workouts_today = await AsyncWorkoutRepository.get_workouts_for_day(user_id, entry_date)
     total_count = sum(w.count for w in workouts_today if w.exercise == exercise and w.variant == variant)
     
     # Формируем ответ
@@ -63,6 +63,9 @@ from handlers import (
     register_wellbeing_handlers,
 )
 from services.notification_scheduler import NotificationScheduler
+from services.http_client import http_client
+from database.async_session import async_pool_metrics, dispose_async_engine
+from database.session import pool_metrics
 
 
 async def main():
@@ -112,6 +115,10 @@ async def main():
             await scheduler_task
         except asyncio.CancelledError:
             pass
+        # Закрываем пул HTTP-соединений к внешним API
+        await http_client.close()
+        logger.info(f"Пул БД: {pool_metrics.stats()}; {async_pool_metrics.stats()}")
+        await dispose_async_engine()
 
 
 if __name__ == "__main__":
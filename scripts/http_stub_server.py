@@ -0,0 +1,126 @@
+"""
+Локальный stub-сервер внешних API питания — инструмент разработчика для ручной проверки.
+
+Имитирует CalorieNinjas, Open Food Facts и MyMemory, чтобы проверять HTTP-слой
+(пул соединений, таймауты, повторы) без сети и без расхода квот.
+
+Запуск:
+    python scripts/http_stub_server.py --port 8081 [--delay 0.5] [--fail-every 3]
+
+И в .env бота:
+    CALORIENINJAS_API_URL=http://127.0.0.1:8081/v1/nutrition
+    OPENFOODFACTS_API_URL=http://127.0.0.1:8081/api/v0/product
+    MYMEMORY_API_URL=http://127.0.0.1:8081/get
+"""
+import argparse
+import asyncio
+import itertools
+import re
+
+from aiohttp import web
+
+# Простейший словарь для «перевода»: всё остальное возвращается как есть
+TRANSLATIONS = {
+    "курица": "chicken",
+    "рис": "rice",
+    "овсянка": "oatmeal",
+    "яйцо": "egg",
+    "банан": "banana",
+    "chicken": "курица",
+    "rice": "рис",
+    "oatmeal": "овсянка",
+    "egg": "яйцо",
+    "banana": "банан",
+}
+
+# Значения КБЖУ на 100 г для stub-ответа CalorieNinjas
+NUTRITION_PER_100G = {
+    "chicken": (165.0, 31.0, 3.6, 0.0),
+    "rice": (130.0, 2.7, 0.3, 28.0),
+    "oatmeal": (68.0, 2.4, 1.4, 12.0),
+    "egg": (155.0, 13.0, 11.0, 1.1),
+    "banana": (89.0, 1.1, 0.3, 23.0),
+}
+
+PRODUCTS = {
+    "4607025392134": {
+        "product_name": "Тестовый йогурт",
+        "brands": "Stub",
+        "quantity": "150 г",
+        "nutriments": {
+            "energy-kcal_100g": 62,
+            "proteins_100g": 4.1,
+            "fat_100g": 2.5,
+            "carbohydrates_100g": 5.6,
+        },
+    },
+}
+
+
+def build_app(delay: float, fail_every: int) -> web.Application:
+    counter = itertools.count(1)
+
+    @web.middleware
+    async def chaos(request: web.Request, handler):
+        """Добавляет задержку и периодические 503 для проверки повторов."""
+        if delay:
+            await asyncio.sleep(delay)
+        if fail_every and next(counter) % fail_every == 0:
+            return web.json_response({"error": "stub failure"}, status=503)
+        return await handler(request)
+
+    async def nutrition(request: web.Request) -> web.Response:
+        if not request.headers.get("X-Api-Key"):
+            return web.json_response({"error": "missing api key"}, status=401)
+        query = request.query.get("query", "").lower()
+        items = []
+        for grams_text, name in re.findall(r"(\d+)\s*g?\s*(?:of\s+)?([a-z]+)", query):
+            per_100g = NUTRITION_PER_100G.get(name.rstrip("s"))
+            if not per_100g:
+                continue
+            grams = float(grams_text)
+            kcal, protein, fat, carbs = (value * grams / 100 for value in per_100g)
+            items.append({
+                "name": name,
+                "serving_size_g": grams,
+                "calories": round(kcal, 1),
+                "protein_g": round(protein, 1),
+                "fat_total_g": round(fat, 1),
+                "carbohydrates_total_g": round(carbs, 1),
+            })
+        return web.json_response({"items": items})
+
+    async def product(request: web.Request) -> web.Response:
+        barcode = request.match_info["barcode"]
+        data = PRODUCTS.get(barcode)
+        if not data:
+            return web.json_response({"status": 0, "status_verbose": "product not found"})
+        return web.json_response({"status": 1, "code": barcode, "product": data})
+
+    async def translate(request: web.Request) -> web.Response:
+        text = request.query.get("q", "")
+        translated = "\n".join(
+            TRANSLATIONS.get(line.strip().lower(), line) for line in text.split("\n")
+        )
+        return web.json_response({"responseData": {"translatedText": translated}, "matches": []})
+
+    app = web.Application(middlewares=[chaos])
+    app.router.add_get("/v1/nutrition", nutrition)
+    app.router.add_get("/api/v0/product/{barcode}.json", product)
+    app.router.add_get("/get", translate)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub-сервер CalorieNinjas / Open Food Facts / MyMemory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay", type=float, default=0.0, help="задержка ответа, секунды")
+    parser.add_argument("--fail-every", type=int, default=0, help="каждый N-й запрос отвечает 503")
+    args = parser.parse_args()
+
+    web.run_app(build_app(args.delay, args.fail_every), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Пересборка дневных сводок (таблица daily_user_summary) из исходных записей.
+
+Сводки поддерживаются репозиториями при каждой записи; скрипт нужен, если
+данные меняли в обход репозиториев (ручные правки, импорт, старый bot.py).
+
+Запуск:
+    python scripts/rebuild_daily_summary.py            # все пользователи
+    python scripts/rebuild_daily_summary.py --user 123 # один пользователь
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database.session import init_db  # noqa: E402
+from database.repositories import DailySummaryRepository  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Пересборка daily_user_summary")
+    parser.add_argument("--user", help="ID пользователя (по умолчанию — все)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    init_db()
+
+    user_ids = [args.user] if args.user else DailySummaryRepository.get_user_ids()
+    total_days = 0
+    for user_id in user_ids:
+        # Каждый пользователь — отдельная транзакция
+        total_days += DailySummaryRepository.rebuild(user_id)
+    print(f"Пересобрано сводок: {total_days} (пользователей: {len(user_ids)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Рассылка сообщения всем пользователям с соблюдением лимитов Telegram.
+
+Пользователи читаются из БД страницами по user_id, отправка идёт через общий
+token bucket (BROADCAST_RATE_PER_SECOND), а после каждой страницы прогресс
+сохраняется в broadcast_cursors. TelegramRetryAfter ставит на паузу весь
+bucket, а не только один запрос: 429 означает, что превышен общий лимит бота.
+После перезапуска незавершённая рассылка продолжается с сохранённой страницы,
+а notification_outbox не даёт отправить пользователю одну рассылку дважды.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+from config import (
+    BROADCAST_BURST,
+    BROADCAST_CONCURRENCY,
+    BROADCAST_MAX_RETRIES,
+    BROADCAST_PAGE_SIZE,
+    BROADCAST_RATE_PER_SECOND,
+    BROADCAST_RESUME_MAX_AGE_HOURS,
+    HTTP_RETRY_BACKOFF,
+)
+from database.async_repositories import AsyncBroadcastRepository, AsyncNotificationOutboxRepository
+
+logger = logging.getLogger(__name__)
+
+# Вид уведомления в notification_outbox; слот — ключ рассылки
+BROADCAST_OUTBOX_KIND = "broadcast"
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не больше capacity про запас."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Ждёт, пока можно отправить следующее сообщение."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Останавливает выдачу токенов на seconds (после 429 от Telegram)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class Broadcaster:
+    """Постраничная рассылка с лимитом частоты и сохранением прогресса."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.bucket = TokenBucket(BROADCAST_RATE_PER_SECOND, BROADCAST_BURST)
+
+    async def send(self, user_id: str, text: str) -> bool:
+        """Отправляет одно сообщение с повторами после RetryAfter и сетевых ошибок."""
+        for attempt in range(BROADCAST_MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id=user_id, text=text)
+                return True
+            except TelegramRetryAfter as e:
+                logger.warning(f"Лимит Telegram, пауза рассылки на {e.retry_after} с")
+                self.bucket.pause(e.retry_after)
+            except TelegramForbiddenError:
+                # Пользователь заблокировал бота — повтор не поможет
+                logger.info(f"Пользователь {user_id} недоступен для рассылки")
+                return False
+            except TelegramBadRequest as e:
+                logger.warning(f"Сообщение пользователю {user_id} отклонено: {e}")
+                return False
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning(f"Ошибка отправки пользователю {user_id} (попытка {attempt + 1}): {e}")
+                await asyncio.sleep(HTTP_RETRY_BACKOFF * (2 ** attempt))
+        logger.error(f"Не удалось отправить сообщение пользователю {user_id} после {BROADCAST_MAX_RETRIES + 1} попыток")
+        return False
+
+    async def _send_chunk(self, key: str, text: str, user_ids: list[str]) -> tuple[int, int]:
+        """
+        Отправляет пачку из BROADCAST_CONCURRENCY сообщений параллельно.
+
+        Пачка сначала забирается в notification_outbox: уже отправленное (до
+        рестарта или другим экземпляром бота) повторно не уйдёт. Забирается
+        ровно то, что сразу отправляется, поэтому падение процесса теряет не
+        больше одной пачки.
+        """
+        claimed = await AsyncNotificationOutboxRepository.claim(
+            BROADCAST_OUTBOX_KIND, [(user_id, key) for user_id in user_ids]
+        )
+        results = await asyncio.gather(*(self.send(user_id, text) for user_id, _ in claimed))
+        delivered = [item for item, ok in zip(claimed, results) if ok]
+        failed = [item for item, ok in zip(claimed, results) if not ok]
+        await AsyncNotificationOutboxRepository.mark(BROADCAST_OUTBOX_KIND, delivered, sent=True)
+        await AsyncNotificationOutboxRepository.mark(BROADCAST_OUTBOX_KIND, failed, sent=False)
+        return len(delivered), len(failed)
+
+    async def broadcast(
+        self,
+        key: str,
+        text: str,
+        timezone: Optional[str] = None,
+        meal_window_start: Optional[datetime] = None,
+        meal_window_end: Optional[datetime] = None,
+    ) -> None:
+        """
+        Рассылает text всем пользователям (или только пояса timezone) один раз для key.
+
+        meal_window_start/meal_window_end — не писать тем, кто уже записал приём
+        пищи в этом окне (UTC). Фильтр хранится в курсоре,
+        поэтому действует и при продолжении рассылки. Повторный вызов с тем же
+        key продолжает с сохранённого курсора, а завершённую рассылку не повторяет.
+        """
+        cursor = await AsyncBroadcastRepository.start(key, text, timezone, meal_window_start, meal_window_end)
+        if cursor.finished_at is not None:
+            logger.info(f"Рассылка {key} уже завершена, пропускаю")
+            return
+
+        if cursor.last_user_id is not None:
+            logger.info(f"Продолжаю рассылку {key} после пользователя {cursor.last_user_id}")
+        else:
+            logger.info(f"Начинаю рассылку {key}")
+
+        last_user_id = cursor.last_user_id
+        total_sent = cursor.sent_count
+        total_failed = cursor.failed_count
+        while True:
+            page = await AsyncBroadcastRepository.get_user_ids_page(
+                last_user_id,
+                BROADCAST_PAGE_SIZE,
+                cursor.timezone,
+                cursor.meal_window_start,
+                cursor.meal_window_end,
+            )
+            if not page:
+                break
+            page_sent = page_failed = 0
+            for start in range(0, len(page), BROADCAST_CONCURRENCY):
+                sent, failed = await self._send_chunk(key, text, page[start:start + BROADCAST_CONCURRENCY])
+                page_sent += sent
+                page_failed += failed
+            last_user_id = page[-1]
+            await AsyncBroadcastRepository.advance(key, last_user_id, page_sent, page_failed)
+            total_sent += page_sent
+            total_failed += page_failed
+
+        await AsyncBroadcastRepository.finish(key)
+        logger.info(f"Рассылка {key} завершена: отправлено {total_sent}, ошибок {total_failed}")
+
+    async def resume_unfinished(self) -> None:
+        """Продолжает рассылки, прерванные перезапуском бота."""
+        started_after = datetime.utcnow() - timedelta(hours=BROADCAST_RESUME_MAX_AGE_HOURS)
+        for cursor in await AsyncBroadcastRepository.get_unfinished(started_after):
+            try:
+                await self.broadcast(
+                    cursor.key, cursor.text, cursor.timezone, cursor.meal_window_start, cursor.meal_window_end
+                )
+            except Exception as e:
+                logger.error(f"Ошибка при продолжении рассылки {cursor.key}: {e}", exc_info=True)
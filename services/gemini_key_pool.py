@@ -0,0 +1,121 @@
+"""Пул ключей Gemini: по клиенту на ключ, балансировка нагрузки и пауза после ошибок квоты."""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from google import genai
+
+logger = logging.getLogger(__name__)
+
+# Окно, в котором считается число запросов на ключ (лимиты Gemini — в минуту)
+RATE_WINDOW_SECONDS = 60.0
+
+
+class GeminiKey:
+    """Состояние одного ключа: свой клиент, текущая нагрузка, окно запросов, пауза."""
+
+    def __init__(self, number: int, api_key: str):
+        self.number = number  # порядковый номер для логов (#1, #2, ...)
+        self.client = genai.Client(api_key=api_key)
+        self.in_flight = 0
+        self.window: deque[float] = deque()  # время начала запросов за последнюю минуту
+        self.cooldown_until = 0.0
+        self.total_requests = 0
+        self.total_errors = 0
+        self.quota_errors = 0
+
+    def trim_window(self, now: float) -> None:
+        while self.window and now - self.window[0] >= RATE_WINDOW_SECONDS:
+            self.window.popleft()
+
+
+class GeminiKeyPool:
+    """
+    Распределяет запросы по всем ключам одновременно.
+
+    Для каждого запроса выбирается наименее загруженный ключ, который не на
+    паузе и не исчерпал лимит rpm_limit запросов в минуту. После ошибки
+    квоты ключ уходит на паузу, остальные продолжают работать.
+    """
+
+    def __init__(self, api_keys: list[str], rpm_limit: int):
+        self.keys = [GeminiKey(number, api_key) for number, api_key in enumerate(api_keys, start=1)]
+        self.rpm_limit = rpm_limit
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def acquire(self, exclude: Optional[set] = None) -> Optional[GeminiKey]:
+        """
+        Занимает слот на наименее загруженном доступном ключе.
+
+        Возвращает None, если все ключи (кроме exclude) на паузе или упёрлись в лимит.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = []
+            for key in self.keys:
+                if exclude and key.number in exclude:
+                    continue
+                key.trim_window(now)
+                if key.cooldown_until > now:
+                    continue
+                if self.rpm_limit and len(key.window) >= self.rpm_limit:
+                    continue
+                candidates.append(key)
+            if not candidates:
+                return None
+            key = min(candidates, key=lambda item: (item.in_flight, len(item.window)))
+            key.in_flight += 1
+            key.total_requests += 1
+            key.window.append(now)
+            return key
+
+    def release(self, key: GeminiKey, error: Optional[Exception] = None, cooldown: Optional[float] = None) -> None:
+        """Освобождает слот; cooldown — пауза ключа в секундах после ошибки квоты."""
+        with self._lock:
+            key.in_flight -= 1
+            if error is not None:
+                key.total_errors += 1
+            if cooldown:
+                key.quota_errors += 1
+                key.cooldown_until = max(key.cooldown_until, time.monotonic() + cooldown)
+        if cooldown:
+            logger.warning(f"⏸ Ключ Gemini #{key.number} на паузе {cooldown:.0f} с: {error}")
+
+    def seconds_until_available(self, exclude: Optional[set] = None) -> Optional[float]:
+        """Через сколько секунд освободится хотя бы один ключ (None — все исключены)."""
+        now = time.monotonic()
+        waits = []
+        with self._lock:
+            for key in self.keys:
+                if exclude and key.number in exclude:
+                    continue
+                key.trim_window(now)
+                wait = max(key.cooldown_until - now, 0.0)
+                if self.rpm_limit and len(key.window) >= self.rpm_limit:
+                    wait = max(wait, key.window[0] + RATE_WINDOW_SECONDS - now)
+                waits.append(wait)
+        return min(waits) if waits else None
+
+    def stats(self) -> list[dict]:
+        """Загрузка по ключам: активные запросы, запросы за минуту, пауза, счётчики."""
+        now = time.monotonic()
+        with self._lock:
+            result = []
+            for key in self.keys:
+                key.trim_window(now)
+                result.append({
+                    "key": key.number,
+                    "in_flight": key.in_flight,
+                    "requests_last_minute": len(key.window),
+                    "utilization": len(key.window) / self.rpm_limit if self.rpm_limit else None,
+                    "cooldown_seconds": max(key.cooldown_until - now, 0.0),
+                    "total_requests": key.total_requests,
+                    "total_errors": key.total_errors,
+                    "quota_errors": key.quota_errors,
+                })
+            return result
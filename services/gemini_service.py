@@ -1,22 +1,332 @@
 """Сервис для работы с Gemini API."""
+import asyncio
+import io
 import json
 import logging
-from typing import Optional
-from google import genai
+from typing import Any, NamedTuple, Optional, Sequence
 from google.genai import errors as genai_errors
-from config import GEMINI_API_KEY, GEMINI_API_KEY2, GEMINI_API_KEY3
+from config import (
+    GEMINI_API_KEY,
+    GEMINI_API_KEY2,
+    GEMINI_API_KEY3,
+    GEMINI_MAX_CONCURRENT_REQUESTS,
+    GEMINI_KEY_RPM_LIMIT,
+    GEMINI_KEY_COOLDOWN,
+    GEMINI_KEY_FORBIDDEN_COOLDOWN,
+    GEMINI_REQUEST_TIMEOUT,
+    GEMINI_ANALYZE_TIMEOUT,
+)
+from services.gemini_key_pool import GeminiKeyPool
+from services.kbju_schema import (
+    KBJU_ESTIMATE_SCHEMA,
+    KBJU_LABEL_SCHEMA,
+    normalize_kbju_estimate,
+    normalize_label,
+)
+
+try:
+    from PIL import Image, ImageChops, ImageOps
+except ImportError:  # Pillow не установлен — изображения уходят в Gemini как есть
+    Image = None
 
 logger = logging.getLogger(__name__)
 
+ANALYZE_FALLBACK_TEXT = "Сервис анализа временно недоступен, попробуй позже 🙏"
+
+KBJU_TEXT_PROMPT = """
+Ты нутрициолог. Твоя задача — ОЦЕНИТЬ калории, белки, жиры и углеводы для списка продуктов.
+
+Пользователь вводит на русском, например:
+"200 г курицы, 100 г йогурта, 30 г орехов".
+
+Требования:
+
+1. Если вес не указан, оцени примерный (но лучше всегда использовать граммы из запроса).
+2. Используй типичные значения для обычных продуктов (не бренд-специфично).
+3. Ответь СТРОГО в формате JSON, БЕЗ объяснений, комментариев и оформления.
+
+ФОРМАТ ОТВЕТА (пример):
+{{
+  "items": [
+    {{
+      "name": "курица",
+      "grams": 200,
+      "kcal": 330,
+      "protein": 40,
+      "fat": 15,
+      "carbs": 0
+    }},
+    {{
+      "name": "йогурт",
+      "grams": 100,
+      "kcal": 60,
+      "protein": 5,
+      "fat": 2,
+      "carbs": 7
+    }}
+  ],
+  "total": {{
+    "kcal": 390,
+    "protein": 45,
+    "fat": 17,
+    "carbs": 7
+  }}
+}}
+
+Вот данные пользователя: "{food_text}"
+"""
+
+KBJU_PHOTO_PROMPT = """
+Ты нутрициолог. Твоя задача — ОЦЕНИТЬ калории, белки, жиры и углеводы для еды на фотографии.
+
+Проанализируй изображение и определи:
+1. Какие продукты/блюда видны на фото
+2. Примерный вес каждого продукта (в граммах)
+3. КБЖУ для каждого продукта
+
+Требования:
+1. Оценивай вес продуктов визуально, исходя из типичных размеров порций
+2. Используй типичные значения КБЖУ для обычных продуктов (не бренд-специфично)
+3. Ответь СТРОГО в формате JSON, БЕЗ объяснений, комментариев и оформления
+
+ФОРМАТ ОТВЕТА (пример):
+{
+  "items": [
+    {
+      "name": "курица",
+      "grams": 200,
+      "kcal": 330,
+      "protein": 40,
+      "fat": 15,
+      "carbs": 0
+    },
+    {
+      "name": "рис",
+      "grams": 150,
+      "kcal": 195,
+      "protein": 4,
+      "fat": 1,
+      "carbs": 42
+    }
+  ],
+  "total": {
+    "kcal": 525,
+    "protein": 44,
+    "fat": 16,
+    "carbs": 42
+  }
+}
+"""
+
+KBJU_LABEL_PROMPT = """
+Ты анализируешь фото этикетки или упаковки продукта. Твоя задача — найти в тексте информацию о КБЖУ (калориях, белках, жирах, углеводах).
+
+ВАЖНО:
+1. Прочитай весь текст на этикетке/упаковке
+2. Найди таблицу пищевой ценности или информацию о КБЖУ
+3. Обычно КБЖУ указывается на 100 грамм продукта
+4. Также попробуй найти вес упаковки/порции (может быть указан как "масса нетто", "вес", "порция" и т.д.)
+
+Ответь СТРОГО в формате JSON, БЕЗ объяснений, комментариев и оформления:
+
+{
+  "product_name": "название продукта (если видно)",
+  "kbju_per_100g": {
+    "kcal": число_калорий_на_100г,
+    "protein": число_белков_на_100г,
+    "fat": число_жиров_на_100г,
+    "carbs": число_углеводов_на_100г
+  },
+  "package_weight": число_грамм_упаковки_или_null,
+  "found_weight": true_если_найден_вес_иначе_false
+}
+
+Если не нашёл КБЖУ в тексте, верни null для всех значений.
+Если нашёл КБЖУ, но не нашёл вес упаковки, установи "package_weight": null и "found_weight": false.
+"""
+
+BARCODE_PROMPT = """
+Ты видишь фото со штрих-кодом. Твоя задача — прочитать номер штрих-кода.
+
+ВАЖНО:
+1. Найди штрих-код на изображении (обычно это вертикальные полоски с цифрами под ними)
+2. Прочитай все цифры, которые видны под штрих-кодом
+3. Верни ТОЛЬКО номер штрих-кода (цифры), БЕЗ пробелов, дефисов и других символов
+4. Если штрих-код не виден или нечитаем, верни "NOT_FOUND"
+
+Примеры правильных ответов:
+- 4607025392134
+- 3017620422003
+- 5449000000996
+
+Ответь ТОЛЬКО номером штрих-кода, без дополнительных объяснений.
+"""
+
+
+class ImageProfile(NamedTuple):
+    """Требования задачи к изображению."""
+    min_side: int  # минимальная короткая сторона, достаточная для распознавания
+    max_side: int  # длинная сторона после уменьшения
+    quality: int  # качество JPEG при перекодировании
+
+
+# Блюдо на тарелке распознаётся и на небольшом фото (Gemini режет картинку на
+# плитки 768×768), а для чтения цифр этикетки и штрих-кода нужна детализация.
+IMAGE_PROFILES = {
+    "photo": ImageProfile(min_side=480, max_side=768, quality=80),
+    "label": ImageProfile(min_side=960, max_side=1536, quality=90),
+    "barcode": ImageProfile(min_side=720, max_side=1536, quality=92),
+}
+
+# Обрезаем однотонные поля, только если они занимают заметную часть кадра
+AUTOCROP_MIN_GAIN = 0.1
+
+
+def select_photo_size(photos: Sequence, task: str):
+    """
+    Выбирает из message.photo наименьший размер, достаточный для задачи.
+
+    Telegram присылает несколько PhotoSize по возрастанию; если ни один не
+    дотягивает до min_side профиля, берётся самый большой.
+    """
+    profile = IMAGE_PROFILES[task]
+    for photo in sorted(photos, key=lambda size: size.width * size.height):
+        if min(photo.width, photo.height) >= profile.min_side:
+            return photo
+    return max(photos, key=lambda size: size.width * size.height)
+
+
+def _autocrop(image):
+    """Обрезает однотонные поля по цвету левого верхнего пикселя (скриншоты, рамки)."""
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    diff = ImageChops.difference(image, background).convert("L").point(lambda value: 255 if value > 16 else 0)
+    bbox = diff.getbbox()
+    if not bbox:
+        return image
+    cropped_area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+    if cropped_area > image.width * image.height * (1 - AUTOCROP_MIN_GAIN):
+        return image
+    return image.crop(bbox)
+
+
+def prepare_image(image_bytes: bytes, task: str) -> bytes:
+    """
+    Готовит изображение к отправке в Gemini: поворот по EXIF, обрезка полей,
+    уменьшение до max_side профиля и перекодирование в JPEG.
+
+    Если результат не меньше исходника или Pillow недоступен, возвращает исходные байты.
+    """
+    if Image is None:
+        return image_bytes
+    profile = IMAGE_PROFILES[task]
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as source:
+            image = ImageOps.exif_transpose(source).convert("RGB")
+        original_size = image.size
+        image = _autocrop(image)
+        image.thumbnail((profile.max_side, profile.max_side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=profile.quality, optimize=True)
+        prepared = buffer.getvalue()
+    except Exception as e:
+        logger.warning(f"Не удалось подготовить изображение ({task}): {e}")
+        return image_bytes
+
+    if len(prepared) >= len(image_bytes):
+        logger.info(f"Image {task}: {len(image_bytes)} B kept as is ({original_size[0]}x{original_size[1]})")
+        return image_bytes
+    logger.info(
+        f"Image {task}: {len(image_bytes)} B → {len(prepared)} B "
+        f"({original_size[0]}x{original_size[1]} → {image.width}x{image.height})"
+    )
+    return prepared
+
+
+def _detect_mime_type(image_bytes: bytes) -> str:
+    """Определяет MIME тип изображения по сигнатуре."""
+    if image_bytes.startswith(b'\x89PNG'):
+        return "image/png"
+    if image_bytes.startswith(b'GIF'):
+        return "image/gif"
+    if image_bytes.startswith(b'WEBP'):
+        return "image/webp"
+    return "image/jpeg"
+
+
+def _image_contents(image_bytes: bytes, prompt: str) -> list:
+    """Собирает contents для vision-запроса: изображение + промпт."""
+    from google.genai import types
+
+    return [
+        types.Part.from_bytes(
+            data=image_bytes,
+            mime_type=_detect_mime_type(image_bytes),
+        ),
+        prompt,
+    ]
+
+
+def _json_config(schema: dict):
+    """Конфиг JSON-режима: Gemini возвращает объект строго по схеме, без текста вокруг."""
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=schema,
+    )
+
+
+def _load_json(response) -> Any:
+    """Достаёт JSON из ответа в JSON-режиме (уже разобранный SDK, если он есть)."""
+    parsed = getattr(response, "parsed", None)
+    if isinstance(parsed, dict):
+        return parsed
+    return json.loads(response.text)
+
+
+def _estimate_to_dict(response, source: str) -> Optional[dict]:
+    logger.debug(f"Gemini raw KBJU response ({source}): {(response.text or '')[:200]}...")
+    estimate = normalize_kbju_estimate(_load_json(response))
+    return estimate.to_dict() if estimate else None
+
+
+def _label_to_dict(response) -> Optional[dict]:
+    logger.debug(f"Gemini raw label KBJU response: {(response.text or '')[:200]}...")
+    label = normalize_label(_load_json(response))
+    return label.to_dict() if label else None
+
+
+def _parse_barcode(raw: str) -> Optional[str]:
+    """Извлекает номер штрих-кода из ответа Gemini."""
+    # Очищаем ответ от лишних символов
+    barcode = raw.replace(" ", "").replace("-", "").replace("_", "")
+    
+    # Проверяем, что это похоже на штрих-код (обычно 8-13 цифр)
+    if barcode.isdigit() and 8 <= len(barcode) <= 14:
+        return barcode
+    if barcode.upper() == "NOT_FOUND":
+        return None
+    # Пробуем извлечь только цифры
+    digits = ''.join(filter(str.isdigit, barcode))
+    if 8 <= len(digits) <= 14:
+        return digits
+    return None
+
 
 class GeminiService:
-    """Сервис для работы с Gemini API с поддержкой fallback ключей."""
+    """
+    Сервис для работы с Gemini API с поддержкой fallback ключей.
+    
+    Синхронные методы оставлены для скриптов. Обработчики aiogram должны
+    использовать методы с суффиксом ``_async``: они не блокируют event loop,
+    ограничены семафором по числу одновременных запросов и имеют таймаут.
+    """
     
     def __init__(self):
         if not GEMINI_API_KEY:
             raise RuntimeError("GEMINI_API_KEY не задан в конфигурации")
         
-        # Список ключей для переключения
+        # Список ключей: каждый получает свой клиент в пуле
         self.api_keys = [GEMINI_API_KEY]
         if GEMINI_API_KEY2:
             self.api_keys.append(GEMINI_API_KEY2)
@@ -25,9 +335,12 @@ class GeminiService:
             self.api_keys.append(GEMINI_API_KEY3)
             logger.info("✅ Третий резервный ключ Gemini API (GEMINI_API_KEY3) найден")
         
-        self.current_key_index = 0
         self.model = "gemini-2.5-flash"
-        self.client = genai.Client(api_key=self.api_keys[self.current_key_index])
+        self.key_pool = GeminiKeyPool(self.api_keys, rpm_limit=GEMINI_KEY_RPM_LIMIT)
+        
+        # Ограничение числа одновременных запросов к Gemini из async-кода
+        self.request_timeout = GEMINI_REQUEST_TIMEOUT
+        self._semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENT_REQUESTS * len(self.api_keys))
     
     def _is_quota_error(self, error: Exception) -> bool:
         """Проверяет, является ли ошибка ошибкой квоты/лимита."""
@@ -50,54 +363,118 @@ class GeminiService:
         return any(indicator in error_str for indicator in quota_indicators) or \
                error_type in ["ResourceExhausted", "RateLimitError", "QuotaExceeded"]
     
-    def _switch_to_next_key(self):
-        """Переключается на следующий доступный ключ."""
-        if len(self.api_keys) <= 1:
-            logger.warning("⚠️ Нет резервных ключей для переключения")
-            return False
-        
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        self.client = genai.Client(api_key=self.api_keys[self.current_key_index])
-        logger.warning(f"🔄 Переключился на резервный ключ Gemini API (ключ #{self.current_key_index + 1})")
-        return True
+    def _cooldown_for(self, error: Exception) -> Optional[float]:
+        """
+        Пауза ключа после ошибки: короткая для 429 (лимит в минуту),
+        длинная для 403/биллинга (ключ вряд ли скоро заработает). None — не ошибка квоты.
+        """
+        if not self._is_quota_error(error):
+            return None
+        error_str = str(error).lower()
+        if any(indicator in error_str for indicator in ("403", "forbidden", "permission denied", "billing")):
+            return GEMINI_KEY_FORBIDDEN_COOLDOWN
+        return GEMINI_KEY_COOLDOWN
+    
+    def key_stats(self) -> list[dict]:
+        """Загрузка и состояние ключей (для логов и диагностики)."""
+        return self.key_pool.stats()
     
-    def _make_request(self, func, *args, **kwargs):
-        """Выполняет запрос с автоматическим переключением ключей при ошибках квоты."""
-        max_attempts = len(self.api_keys)
+    def _make_request(self, **kwargs):
+        """
+        Выполняет generate_content на наименее загруженном ключе.
+        
+        При ошибке квоты ключ уходит на паузу, а запрос повторяется на другом ключе.
+        """
+        tried: set[int] = set()
         last_error = None
         
-        for attempt in range(max_attempts):
+        for attempt in range(len(self.key_pool)):
+            key = self.key_pool.acquire(exclude=tried)
+            if key is None:
+                break
+            tried.add(key.number)
             try:
-                return func(*args, **kwargs)
+                response = key.client.models.generate_content(**kwargs)
             except Exception as e:
                 last_error = e
-                
-                # Если это ошибка квоты и есть резервные ключи
-                if self._is_quota_error(e) and len(self.api_keys) > 1:
-                    logger.warning(f"⚠️ Ошибка квоты на ключе #{self.current_key_index + 1}: {e}")
-                    
-                    # Переключаемся на следующий ключ
-                    if self._switch_to_next_key():
-                        continue  # Пробуем снова с новым ключом
-                
-                # Если это не ошибка квоты или нет резервных ключей - пробрасываем ошибку
+                cooldown = self._cooldown_for(e)
+                self.key_pool.release(key, error=e, cooldown=cooldown)
+                if cooldown:
+                    continue  # Пробуем другой ключ
                 raise
+            self.key_pool.release(key)
+            return response
+        
+        raise last_error or RuntimeError("Все ключи Gemini на паузе или исчерпали лимит запросов")
+    
+    async def _make_request_async(self, timeout: Optional[float] = None, **kwargs):
+        """
+        Асинхронный аналог _make_request.
+        
+        Запрос идёт через client.aio выбранного ключа, ждёт свободный слот семафора
+        и прерывается по таймауту. Если все ключи на паузе или упёрлись в лимит,
+        ждёт освобождения ключа в пределах того же таймаута.
+        """
+        timeout = timeout or self.request_timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        tried: set[int] = set()
+        last_error = None
+        
+        async with self._semaphore:
+            while len(tried) < len(self.key_pool):
+                key = self.key_pool.acquire(exclude=tried)
+                if key is None:
+                    wait = self.key_pool.seconds_until_available(exclude=tried)
+                    if wait is None or loop.time() + wait >= deadline:
+                        break
+                    logger.info(f"⏳ Все ключи Gemini заняты, жду {wait:.1f} с")
+                    await asyncio.sleep(wait)
+                    continue
+                
+                tried.add(key.number)
+                try:
+                    response = await asyncio.wait_for(
+                        key.client.aio.models.generate_content(**kwargs),
+                        timeout=max(deadline - loop.time(), 1.0),
+                    )
+                except asyncio.TimeoutError as e:
+                    self.key_pool.release(key, error=e)
+                    logger.warning(f"⏱ Gemini не ответил за {timeout:.0f} с (ключ #{key.number})")
+                    raise
+                except Exception as e:
+                    last_error = e
+                    cooldown = self._cooldown_for(e)
+                    self.key_pool.release(key, error=e, cooldown=cooldown)
+                    if cooldown:
+                        continue
+                    raise
+                self.key_pool.release(key)
+                return response
         
-        # Если все попытки исчерпаны
-        raise last_error
+        raise last_error or RuntimeError("Все ключи Gemini на паузе или исчерпали лимит запросов")
     
     def analyze(self, text: str) -> str:
         """Анализирует текст через Gemini."""
         try:
-            response = self._make_request(
-                self.client.models.generate_content,
+            response = self._make_request(model=self.model, contents=text)
+            return response.text
+        except Exception as e:
+            logger.error(f"Ошибка Gemini при анализе: {e}", exc_info=True)
+            return ANALYZE_FALLBACK_TEXT
+    
+    async def analyze_async(self, text: str, timeout: Optional[float] = None) -> str:
+        """Анализирует текст через Gemini, не блокируя event loop."""
+        try:
+            response = await self._make_request_async(
+                timeout=timeout or GEMINI_ANALYZE_TIMEOUT,
                 model=self.model,
-                contents=text
+                contents=text,
             )
             return response.text
         except Exception as e:
             logger.error(f"Ошибка Gemini при анализе: {e}", exc_info=True)
-            return "Сервис анализа временно недоступен, попробуй позже 🙏"
+            return ANALYZE_FALLBACK_TEXT
     
     def estimate_kbju(self, food_text: str) -> Optional[dict]:
         """
@@ -112,68 +489,27 @@ class GeminiService:
         }
         или None при ошибке.
         """
-        prompt = f"""
-Ты нутрициолог. Твоя задача — ОЦЕНИТЬ калории, белки, жиры и углеводы для списка продуктов.
-
-Пользователь вводит на русском, например:
-"200 г курицы, 100 г йогурта, 30 г орехов".
-
-Требования:
-
-1. Если вес не указан, оцени примерный (но лучше всегда использовать граммы из запроса).
-2. Используй типичные значения для обычных продуктов (не бренд-специфично).
-3. Ответь СТРОГО в формате JSON, БЕЗ объяснений, комментариев и оформления.
-
-ФОРМАТ ОТВЕТА (пример):
-{{
-  "items": [
-    {{
-      "name": "курица",
-      "grams": 200,
-      "kcal": 330,
-      "protein": 40,
-      "fat": 15,
-      "carbs": 0
-    }},
-    {{
-      "name": "йогурт",
-      "grams": 100,
-      "kcal": 60,
-      "protein": 5,
-      "fat": 2,
-      "carbs": 7
-    }}
-  ],
-  "total": {{
-    "kcal": 390,
-    "protein": 45,
-    "fat": 17,
-    "carbs": 7
-  }}
-}}
-
-Вот данные пользователя: "{food_text}"
-"""
         try:
             response = self._make_request(
-                self.client.models.generate_content,
                 model=self.model,
-                contents=prompt,
+                contents=KBJU_TEXT_PROMPT.format(food_text=food_text),
+                config=_json_config(KBJU_ESTIMATE_SCHEMA),
             )
-            raw = response.text.strip()
-            logger.debug(f"Gemini raw KBJU response: {raw[:200]}...")
-            
-            # Парсим JSON
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError:
-                # Если Gemini добавил лишний текст — вырежем JSON
-                start = raw.find("{")
-                end = raw.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    snippet = raw[start : end + 1]
-                    return json.loads(snippet)
-                raise
+            return _estimate_to_dict(response, "text")
+        except Exception as e:
+            logger.error(f"Ошибка Gemini (КБЖУ): {e}", exc_info=True)
+            return None
+    
+    async def estimate_kbju_async(self, food_text: str, timeout: Optional[float] = None) -> Optional[dict]:
+        """Асинхронная версия estimate_kbju (тот же формат ответа)."""
+        try:
+            response = await self._make_request_async(
+                timeout=timeout,
+                model=self.model,
+                contents=KBJU_TEXT_PROMPT.format(food_text=food_text),
+                config=_json_config(KBJU_ESTIMATE_SCHEMA),
+            )
+            return _estimate_to_dict(response, "text")
         except Exception as e:
             logger.error(f"Ошибка Gemini (КБЖУ): {e}", exc_info=True)
             return None
@@ -191,84 +527,32 @@ class GeminiService:
         }
         или None при ошибке.
         """
-        prompt = """
-Ты нутрициолог. Твоя задача — ОЦЕНИТЬ калории, белки, жиры и углеводы для еды на фотографии.
-
-Проанализируй изображение и определи:
-1. Какие продукты/блюда видны на фото
-2. Примерный вес каждого продукта (в граммах)
-3. КБЖУ для каждого продукта
-
-Требования:
-1. Оценивай вес продуктов визуально, исходя из типичных размеров порций
-2. Используй типичные значения КБЖУ для обычных продуктов (не бренд-специфично)
-3. Ответь СТРОГО в формате JSON, БЕЗ объяснений, комментариев и оформления
-
-ФОРМАТ ОТВЕТА (пример):
-{
-  "items": [
-    {
-      "name": "курица",
-      "grams": 200,
-      "kcal": 330,
-      "protein": 40,
-      "fat": 15,
-      "carbs": 0
-    },
-    {
-      "name": "рис",
-      "grams": 150,
-      "kcal": 195,
-      "protein": 4,
-      "fat": 1,
-      "carbs": 42
-    }
-  ],
-  "total": {
-    "kcal": 525,
-    "protein": 44,
-    "fat": 16,
-    "carbs": 42
-  }
-}
-"""
         try:
-            from google.genai import types
-            
-            # Определяем MIME тип
-            mime_type = "image/jpeg"
-            if image_bytes.startswith(b'\x89PNG'):
-                mime_type = "image/png"
-            elif image_bytes.startswith(b'GIF'):
-                mime_type = "image/gif"
-            elif image_bytes.startswith(b'WEBP'):
-                mime_type = "image/webp"
-            
             response = self._make_request(
-                self.client.models.generate_content,
                 model=self.model,
-                contents=[
-                    types.Part.from_bytes(
-                        data=image_bytes,
-                        mime_type=mime_type
-                    ),
-                    prompt
-                ]
+                contents=_image_contents(prepare_image(image_bytes, "photo"), KBJU_PHOTO_PROMPT),
+                config=_json_config(KBJU_ESTIMATE_SCHEMA),
             )
-            
-            raw = response.text.strip()
-            logger.debug(f"Gemini raw KBJU response from photo: {raw[:200]}...")
-            
-            # Парсим JSON
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError:
-                start = raw.find("{")
-                end = raw.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    snippet = raw[start : end + 1]
-                    return json.loads(snippet)
-                raise
+            return _estimate_to_dict(response, "photo")
+        except Exception as e:
+            logger.error(f"Ошибка Gemini (КБЖУ по фото): {e}", exc_info=True)
+            return None
+    
+    async def estimate_kbju_from_photo_async(
+        self,
+        image_bytes: bytes,
+        timeout: Optional[float] = None,
+    ) -> Optional[dict]:
+        """Асинхронная версия estimate_kbju_from_photo (тот же формат ответа)."""
+        try:
+            image_bytes = await asyncio.to_thread(prepare_image, image_bytes, "photo")
+            response = await self._make_request_async(
+                timeout=timeout,
+                model=self.model,
+                contents=_image_contents(image_bytes, KBJU_PHOTO_PROMPT),
+                config=_json_config(KBJU_ESTIMATE_SCHEMA),
+            )
+            return _estimate_to_dict(response, "photo")
         except Exception as e:
             logger.error(f"Ошибка Gemini (КБЖУ по фото): {e}", exc_info=True)
             return None
@@ -289,69 +573,34 @@ class GeminiService:
           "package_weight": 50,
           "found_weight": true
         }
-        или None при ошибке.
+        или None при ошибке и если калорийность на этикетке не найдена.
         """
-        prompt = """
-Ты анализируешь фото этикетки или упаковки продукта. Твоя задача — найти в тексте информацию о КБЖУ (калориях, белках, жирах, углеводах).
-
-ВАЖНО:
-1. Прочитай весь текст на этикетке/упаковке
-2. Найди таблицу пищевой ценности или информацию о КБЖУ
-3. Обычно КБЖУ указывается на 100 грамм продукта
-4. Также попробуй найти вес упаковки/порции (может быть указан как "масса нетто", "вес", "порция" и т.д.)
-
-Ответь СТРОГО в формате JSON, БЕЗ объяснений, комментариев и оформления:
-
-{
-  "product_name": "название продукта (если видно)",
-  "kbju_per_100g": {
-    "kcal": число_калорий_на_100г,
-    "protein": число_белков_на_100г,
-    "fat": число_жиров_на_100г,
-    "carbs": число_углеводов_на_100г
-  },
-  "package_weight": число_грамм_упаковки_или_null,
-  "found_weight": true_если_найден_вес_иначе_false
-}
-
-Если не нашёл КБЖУ в тексте, верни null для всех значений.
-Если нашёл КБЖУ, но не нашёл вес упаковки, установи "package_weight": null и "found_weight": false.
-"""
         try:
-            from google.genai import types
-            
-            mime_type = "image/jpeg"
-            if image_bytes.startswith(b'\x89PNG'):
-                mime_type = "image/png"
-            elif image_bytes.startswith(b'GIF'):
-                mime_type = "image/gif"
-            elif image_bytes.startswith(b'WEBP'):
-                mime_type = "image/webp"
-            
             response = self._make_request(
-                self.client.models.generate_content,
                 model=self.model,
-                contents=[
-                    types.Part.from_bytes(
-                        data=image_bytes,
-                        mime_type=mime_type
-                    ),
-                    prompt
-                ]
+                contents=_image_contents(prepare_image(image_bytes, "label"), KBJU_LABEL_PROMPT),
+                config=_json_config(KBJU_LABEL_SCHEMA),
             )
-            
-            raw = response.text.strip()
-            logger.debug(f"Gemini raw label KBJU response: {raw[:200]}...")
-            
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError:
-                start = raw.find("{")
-                end = raw.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    snippet = raw[start : end + 1]
-                    return json.loads(snippet)
-                raise
+            return _label_to_dict(response)
+        except Exception as e:
+            logger.error(f"Ошибка Gemini (КБЖУ с этикетки): {e}", exc_info=True)
+            return None
+    
+    async def extract_kbju_from_label_async(
+        self,
+        image_bytes: bytes,
+        timeout: Optional[float] = None,
+    ) -> Optional[dict]:
+        """Асинхронная версия extract_kbju_from_label (тот же формат ответа)."""
+        try:
+            image_bytes = await asyncio.to_thread(prepare_image, image_bytes, "label")
+            response = await self._make_request_async(
+                timeout=timeout,
+                model=self.model,
+                contents=_image_contents(image_bytes, KBJU_LABEL_PROMPT),
+                config=_json_config(KBJU_LABEL_SCHEMA),
+            )
+            return _label_to_dict(response)
         except Exception as e:
             logger.error(f"Ошибка Gemini (КБЖУ с этикетки): {e}", exc_info=True)
             return None
@@ -362,62 +611,30 @@ class GeminiService:
         
         Возвращает строку с номером штрих-кода (EAN-13, UPC и т.д.) или None при ошибке.
         """
-        prompt = """
-Ты видишь фото со штрих-кодом. Твоя задача — прочитать номер штрих-кода.
-
-ВАЖНО:
-1. Найди штрих-код на изображении (обычно это вертикальные полоски с цифрами под ними)
-2. Прочитай все цифры, которые видны под штрих-кодом
-3. Верни ТОЛЬКО номер штрих-кода (цифры), БЕЗ пробелов, дефисов и других символов
-4. Если штрих-код не виден или нечитаем, верни "NOT_FOUND"
-
-Примеры правильных ответов:
-- 4607025392134
-- 3017620422003
-- 5449000000996
-
-Ответь ТОЛЬКО номером штрих-кода, без дополнительных объяснений.
-"""
         try:
-            from google.genai import types
-            
-            mime_type = "image/jpeg"
-            if image_bytes.startswith(b'\x89PNG'):
-                mime_type = "image/png"
-            elif image_bytes.startswith(b'GIF'):
-                mime_type = "image/gif"
-            elif image_bytes.startswith(b'WEBP'):
-                mime_type = "image/webp"
-            
             response = self._make_request(
-                self.client.models.generate_content,
                 model=self.model,
-                contents=[
-                    types.Part.from_bytes(
-                        data=image_bytes,
-                        mime_type=mime_type
-                    ),
-                    prompt
-                ]
+                contents=_image_contents(prepare_image(image_bytes, "barcode"), BARCODE_PROMPT),
             )
-            
             raw = response.text.strip()
             logger.debug(f"Gemini raw barcode response: {raw}")
-            
-            # Очищаем ответ от лишних символов
-            barcode = raw.replace(" ", "").replace("-", "").replace("_", "")
-            
-            # Проверяем, что это похоже на штрих-код (обычно 8-13 цифр)
-            if barcode.isdigit() and 8 <= len(barcode) <= 14:
-                return barcode
-            elif barcode.upper() == "NOT_FOUND":
-                return None
-            else:
-                # Пробуем извлечь только цифры
-                digits = ''.join(filter(str.isdigit, barcode))
-                if 8 <= len(digits) <= 14:
-                    return digits
-                return None
+            return _parse_barcode(raw)
+        except Exception as e:
+            logger.error(f"Ошибка Gemini (распознавание штрих-кода): {e}", exc_info=True)
+            return None
+    
+    async def scan_barcode_async(self, image_bytes: bytes, timeout: Optional[float] = None) -> Optional[str]:
+        """Асинхронная версия scan_barcode."""
+        try:
+            image_bytes = await asyncio.to_thread(prepare_image, image_bytes, "barcode")
+            response = await self._make_request_async(
+                timeout=timeout,
+                model=self.model,
+                contents=_image_contents(image_bytes, BARCODE_PROMPT),
+            )
+            raw = response.text.strip()
+            logger.debug(f"Gemini raw barcode response: {raw}")
+            return _parse_barcode(raw)
         except Exception as e:
             logger.error(f"Ошибка Gemini (распознавание штрих-кода): {e}", exc_info=True)
             return None
@@ -425,4 +642,3 @@ class GeminiService:
 
 # Глобальный экземпляр сервиса
 gemini_service = GeminiService()
-
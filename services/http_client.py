@@ -0,0 +1,168 @@
+"""Общий асинхронный HTTP-клиент для внешних API (CalorieNinjas, Open Food Facts, MyMemory)."""
+import asyncio
+import json
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from config import (
+    HTTP_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    HTTP_POOL_LIMIT,
+    HTTP_PER_HOST_LIMIT,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_HOST_LIMITS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Статусы, при которых имеет смысл повторить запрос
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Больше этого не ждём, даже если сервер прислал большой Retry-After
+MAX_RETRY_AFTER = 10.0
+
+
+@dataclass
+class HttpResponse:
+    """Прочитанный ответ: соединение уже возвращено в пул."""
+    status: int
+    body: bytes
+    headers: dict
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class HttpClient:
+    """
+    Асинхронный HTTP-клиент с общим пулом keep-alive соединений.
+
+    - одна aiohttp.ClientSession на процесс (создаётся лениво внутри event loop);
+    - ограничение одновременных запросов на хост (HTTP_PER_HOST_LIMIT, HTTP_HOST_LIMITS);
+    - таймаут на запрос;
+    - повторы при сетевых ошибках и 429/5xx с экспоненциальной задержкой и jitter.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float = HTTP_TIMEOUT,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF,
+        pool_limit: int = HTTP_POOL_LIMIT,
+        per_host_limit: int = HTTP_PER_HOST_LIMIT,
+        host_limits: Optional[dict[str, int]] = None,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_limit = pool_limit
+        self.per_host_limit = per_host_limit
+        self.host_limits = host_limits if host_limits is not None else dict(HTTP_HOST_LIMITS)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Возвращает общую сессию, создавая её при первом обращении."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.per_host_limit,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            limit = self.host_limits.get(host, self.per_host_limit)
+            semaphore = asyncio.Semaphore(limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Задержка перед повтором: Retry-After или full jitter от экспоненты."""
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_RETRY_AFTER)
+            except ValueError:
+                pass
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+    ) -> HttpResponse:
+        """
+        Выполняет запрос и возвращает прочитанный ответ.
+
+        Если после всех повторов сервер всё ещё отвечает 429/5xx — возвращается
+        последний ответ (вызывающий код сам решает, что с ним делать).
+        Если все попытки упали с сетевой ошибкой/таймаутом — пробрасывается последнее исключение.
+        """
+        retries = self.max_retries if retries is None else retries
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        semaphore = self._get_host_semaphore(url)
+        last_error: Optional[Exception] = None
+
+        for attempt in range(retries + 1):
+            retry_after = None
+            try:
+                async with semaphore:
+                    async with self._get_session().request(
+                        method,
+                        url,
+                        params=params,
+                        headers=headers,
+                        timeout=client_timeout,
+                    ) as resp:
+                        body = await resp.read()
+                        response = HttpResponse(status=resp.status, body=body, headers=dict(resp.headers))
+                if response.status not in RETRYABLE_STATUSES or attempt == retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                logger.warning(f"HTTP {response.status} от {url}, повтор {attempt + 1}/{retries}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+                if attempt == retries:
+                    raise
+                logger.warning(f"Сетевая ошибка при запросе к {url}: {e!r}, повтор {attempt + 1}/{retries}")
+
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+
+        # Сюда не доходим: последний проход либо вернул ответ, либо пробросил ошибку
+        raise last_error or RuntimeError(f"HTTP request to {url} failed")
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        """GET-запрос (параметры как у request)."""
+        return await self.request("GET", url, **kwargs)
+
+    async def close(self) -> None:
+        """Закрывает пул соединений (вызывается при остановке бота)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._host_semaphores.clear()
+
+
+# Глобальный экземпляр клиента
+http_client = HttpClient()
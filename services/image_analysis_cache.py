@@ -0,0 +1,104 @@
+"""Кэш анализа фото: повторно отправленные изображения не скачиваются и не уходят в Gemini."""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import Bot
+from aiogram.types import PhotoSize
+
+from config import IMAGE_CACHE_MEMORY_SIZE
+from database.async_repositories import AsyncImageAnalysisCacheRepository
+from utils.image_hash import dhash
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Максимальное расстояние Хэмминга между dHash, при котором фото считаются одинаковыми.
+# Для штрих-кодов поиск по похожести отключён: разные коды выглядят почти одинаково.
+PHASH_MAX_DISTANCE = {
+    "photo": 3,
+    "label": 2,
+}
+
+MEMORY_TTL_SECONDS = 24 * 3600
+
+
+class ImageAnalysisCache:
+    """
+    Кэш результатов анализа изображений.
+
+    Порядок: in-process LRU и таблица image_analysis_cache по file_unique_id
+    (до скачивания файла) → поиск по перцептивному хэшу (после скачивания,
+    до запроса к Gemini) → сам анализ. Сохраняются только валидные результаты,
+    чтобы повтор после ошибки снова шёл в Gemini.
+    """
+
+    def __init__(self):
+        self._memory = TTLCache(maxsize=IMAGE_CACHE_MEMORY_SIZE, ttl=MEMORY_TTL_SECONDS)
+
+    async def analyze(
+        self,
+        bot: Bot,
+        photo: PhotoSize,
+        kind: str,
+        analyzer: Callable[[bytes], Awaitable[Optional[Any]]],
+        validate: Callable[[Any], bool] = bool,
+    ) -> Optional[Any]:
+        """
+        Возвращает результат analyzer(image_bytes) для фото, используя кэш.
+
+        Args:
+            bot: бот для скачивания файла
+            photo: размер фото из message.photo
+            kind: тип анализа ("photo", "label", "barcode")
+            analyzer: асинхронная функция анализа (методы gemini_service)
+            validate: проверка, что результат можно сохранить в кэш
+        """
+        memory_key = (kind, photo.file_unique_id)
+        cached = self._memory.get(memory_key)
+        if cached is not None:
+            logger.info(f"Image analysis cache hit (memory): {kind}")
+            return cached
+
+        try:
+            cached = await AsyncImageAnalysisCacheRepository.get_by_file_id(kind, photo.file_unique_id)
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать кэш анализа фото: {e}")
+            cached = None
+        if cached is not None:
+            logger.info(f"Image analysis cache hit (file_unique_id): {kind}")
+            self._memory.set(memory_key, cached)
+            return cached
+
+        file = await bot.get_file(photo.file_id)
+        image_bytes = (await bot.download_file(file.file_path)).read()
+
+        # Декодирование изображения в PIL — CPU-работа, не держим на ней event loop
+        phash = await asyncio.to_thread(dhash, image_bytes)
+        max_distance = PHASH_MAX_DISTANCE.get(kind)
+        if phash is not None and max_distance is not None:
+            try:
+                cached = await AsyncImageAnalysisCacheRepository.find_similar(kind, phash, max_distance)
+            except Exception as e:
+                logger.warning(f"Не удалось найти похожее фото в кэше: {e}")
+                cached = None
+            if cached is not None:
+                logger.info(f"Image analysis cache hit (perceptual hash): {kind}")
+                await self._remember(kind, photo.file_unique_id, phash, cached)
+                return cached
+
+        result = await analyzer(image_bytes)
+        if result is not None and validate(result):
+            await self._remember(kind, photo.file_unique_id, phash, result)
+        return result
+
+    async def _remember(self, kind: str, file_unique_id: str, phash: Optional[int], result: Any) -> None:
+        self._memory.set((kind, file_unique_id), result)
+        try:
+            await AsyncImageAnalysisCacheRepository.save(kind, file_unique_id, phash, result)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить анализ фото в кэш: {e}")
+
+
+# Глобальный экземпляр сервиса
+image_analysis_cache = ImageAnalysisCache()
@@ -0,0 +1,132 @@
+"""Справочник КБЖУ отдельных продуктов: локальный пересчёт по граммам вместо запроса к ИИ."""
+import logging
+from typing import Optional
+
+from database.repositories import IngredientNutritionRepository
+from utils.food_text import normalize_ingredient_name, parse_food_item, split_food_items
+from utils.validators import safe_float
+
+logger = logging.getLogger(__name__)
+
+# Чем выше, тем надёжнее источник: данные с упаковки > база CalorieNinjas > оценка ИИ
+SOURCE_PRIORITY = {
+    "gemini": 1,
+    "calorieninjas": 2,
+    "openfoodfacts": 3,
+}
+
+# Значения на 100 г вне этих границ считаем ошибкой распознавания и не сохраняем
+MAX_KCAL_100G = 900.0
+MAX_MACRO_100G = 100.0
+
+# Допустимое расхождение граммов при сопоставлении позиций запроса и ответа
+ALIGN_GRAMS_TOLERANCE = 1.0
+
+
+class IngredientService:
+    """
+    Справочник «продукт → КБЖУ на 100 г».
+
+    Пополняется из ответов Gemini, CalorieNinjas и Open Food Facts. При новой
+    оценке позиции вида «200 г курицы», уже известные справочнику, считаются
+    локально, а в Gemini уходят только неизвестные.
+    """
+
+    def split_known(self, food_text: str) -> tuple[list[Optional[dict]], list[str]]:
+        """
+        Делит описание на позиции.
+
+        Returns:
+            (items, unknown): items — по одной записи на позицию, для известных
+            продуктов готовый dict в формате estimate_kbju, для остальных None;
+            unknown — текст неизвестных позиций в том же порядке.
+        """
+        segments = split_food_items(food_text)
+        parsed = [parse_food_item(segment) for segment in segments]
+        names = [
+            normalize_ingredient_name(item.name)
+            for item in parsed
+            if item is not None and item.unit == "г"
+        ]
+        try:
+            known = IngredientNutritionRepository.get_many(names)
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать справочник продуктов: {e}")
+            known = {}
+
+        items: list[Optional[dict]] = []
+        unknown: list[str] = []
+        for segment, item in zip(segments, parsed):
+            per_100g = None
+            if item is not None and item.unit == "г":
+                per_100g = known.get(normalize_ingredient_name(item.name))
+            if per_100g is None:
+                items.append(None)
+                unknown.append(segment)
+                continue
+            factor = item.amount / 100.0
+            items.append({
+                "name": item.name,
+                "grams": item.amount,
+                "kcal": round(per_100g["kcal"] * factor, 1),
+                "protein": round(per_100g["protein"] * factor, 1),
+                "fat": round(per_100g["fat"] * factor, 1),
+                "carbs": round(per_100g["carbs"] * factor, 1),
+            })
+        return items, unknown
+
+    def remember_items(self, items: list[dict], source: str, segments: Optional[list[str]] = None) -> None:
+        """
+        Сохраняет значения на 100 г из позиций ответа ({"name", "grams", "kcal", ...}).
+
+        Если передан исходный текст позиций (segments) и он однозначно
+        сопоставляется с ответом (столько же позиций, те же граммы), название
+        из запроса пользователя сохраняется как синоним: «курицы» → как «курица».
+        """
+        aliases: list[Optional[str]] = [None] * len(items)
+        if segments is not None and len(segments) == len(items):
+            parsed = [parse_food_item(segment) for segment in segments]
+            if all(
+                p is not None and p.unit == "г"
+                and abs(p.amount - safe_float(item.get("grams"))) <= ALIGN_GRAMS_TOLERANCE
+                for p, item in zip(parsed, items)
+            ):
+                aliases = [p.name for p in parsed]
+
+        entries: dict[str, dict] = {}
+        for item, alias in zip(items, aliases):
+            grams = safe_float(item.get("grams"))
+            if grams <= 0:
+                continue
+            per_100g = {
+                field: safe_float(item.get(field)) * 100.0 / grams
+                for field in ("kcal", "protein", "fat", "carbs")
+            }
+            for name in (item.get("name"), alias):
+                key = normalize_ingredient_name(name or "")
+                if key:
+                    entries[key] = per_100g
+        self._save(entries, source)
+
+    def remember_per_100g(self, name: str, per_100g: dict, source: str) -> None:
+        """Сохраняет продукт, для которого значения на 100 г уже известны (например, с упаковки)."""
+        key = normalize_ingredient_name(name)
+        if not key or per_100g.get("kcal") is None:
+            return
+        values = {field: safe_float(per_100g.get(field)) for field in ("kcal", "protein", "fat", "carbs")}
+        self._save({key: values}, source)
+
+    def _save(self, entries: dict[str, dict], source: str) -> None:
+        valid = {
+            name: values for name, values in entries.items()
+            if 0 < values["kcal"] <= MAX_KCAL_100G
+            and all(0 <= values[field] <= MAX_MACRO_100G for field in ("protein", "fat", "carbs"))
+        }
+        try:
+            IngredientNutritionRepository.upsert_many(valid, source, SOURCE_PRIORITY.get(source, 0))
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить продукты в справочник: {e}")
+
+
+# Глобальный экземпляр сервиса
+ingredient_service = IngredientService()
@@ -0,0 +1,147 @@
+"""Оценка КБЖУ по текстовому описанию еды с кэшированием ответов Gemini."""
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from config import KBJU_ESTIMATE_CACHE_MAX_ENTRIES
+from database.async_repositories import AsyncKbjuEstimateCacheRepository
+from database.async_session import run_in_async_session
+from services.gemini_service import gemini_service
+from services.ingredient_service import ingredient_service
+from utils.food_text import normalize_food_text
+from utils.validators import safe_float
+
+logger = logging.getLogger(__name__)
+
+# Меняется при изменении промпта/формата ответа — старые записи перестают совпадать
+CACHE_KEY_VERSION = "v1"
+
+# Как часто (в новых записях) проверять размер кэша и вытеснять старые записи
+EVICTION_CHECK_EVERY = 50
+
+
+class KbjuEstimator:
+    """
+    Обёртка над gemini_service.estimate_kbju_async с кэшем в БД.
+
+    Ключ — sha256 от нормализованного текста (регистр, пробелы, единицы
+    измерения и порядок продуктов не влияют), поэтому «200 г курицы, 100 г риса»
+    и «Риса 100гр, курицы 200 грамм» дают одно обращение к Gemini.
+    Кэшируются только успешные ответы.
+
+    При промахе продукты, уже известные справочнику ingredient_service,
+    пересчитываются по граммам локально — в Gemini уходят только остальные.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._saves_until_eviction = 0
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def cache_key(food_text: str) -> tuple[str, str]:
+        """Возвращает (хэш, нормализованный текст) для описания еды."""
+        normalized = normalize_food_text(food_text)
+        digest = hashlib.sha256(f"{CACHE_KEY_VERSION}:{normalized}".encode("utf-8")).hexdigest()
+        return digest, normalized
+
+    async def estimate(self, food_text: str) -> Optional[dict]:
+        """Оценивает КБЖУ; формат ответа как у GeminiService.estimate_kbju."""
+        text_hash, normalized = self.cache_key(food_text)
+        if not normalized:
+            return await gemini_service.estimate_kbju_async(food_text)
+
+        try:
+            cached = await AsyncKbjuEstimateCacheRepository.get_and_touch(text_hash)
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать кэш КБЖУ: {e}")
+            cached = None
+        if cached is not None:
+            self.hits += 1
+            logger.info(f"KBJU estimate cache hit: {normalized!r}")
+            return cached
+
+        in_flight = self._in_flight.get(text_hash)
+        if in_flight is not None:
+            self.hits += 1
+            return await in_flight
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[text_hash] = future
+        result = None
+        try:
+            result = await self._estimate_uncached(food_text)
+        finally:
+            self._in_flight.pop(text_hash, None)
+            future.set_result(result)
+
+        if result and "total" in result:
+            await self._store(text_hash, normalized, result)
+        return result
+
+    async def _estimate_uncached(self, food_text: str) -> Optional[dict]:
+        """Считает известные продукты локально, в Gemini отправляет только неизвестные."""
+        local_items, unknown = await run_in_async_session(ingredient_service.split_known, food_text)
+        if not unknown:
+            logger.info("KBJU estimated locally from ingredient store")
+            return self._merge(local_items, [])
+
+        if len(unknown) == len(local_items):
+            result = await gemini_service.estimate_kbju_async(food_text)
+        else:
+            logger.info(f"Ingredient store: {len(local_items) - len(unknown)} known, sending {len(unknown)} to Gemini")
+            result = await gemini_service.estimate_kbju_async(", ".join(unknown))
+        if not result or "total" not in result:
+            return None
+
+        ai_items = result.get("items") or []
+        try:
+            await run_in_async_session(ingredient_service.remember_items, ai_items, "gemini", unknown)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить продукты в справочник: {e}")
+        if len(unknown) == len(local_items):
+            return result
+        return self._merge(local_items, ai_items)
+
+    @staticmethod
+    def _merge(local_items: list[Optional[dict]], ai_items: list[dict]) -> dict:
+        """Собирает ответ в формате estimate_kbju из локальных позиций и позиций от Gemini."""
+        items = [item for item in local_items if item is not None]
+        if len(ai_items) == local_items.count(None):
+            # Ответ сопоставим по позициям — сохраняем порядок ввода
+            remaining = iter(ai_items)
+            items = [item if item is not None else next(remaining) for item in local_items]
+        else:
+            items.extend(ai_items)
+
+        total = {
+            field: round(sum(safe_float(item.get(field)) for item in items), 1)
+            for field in ("kcal", "protein", "fat", "carbs")
+        }
+        return {"items": items, "total": total}
+
+    async def _store(self, text_hash: str, normalized: str, result: dict) -> None:
+        try:
+            await AsyncKbjuEstimateCacheRepository.save(text_hash, normalized, result)
+            self._saves_until_eviction -= 1
+            if self._saves_until_eviction <= 0:
+                self._saves_until_eviction = EVICTION_CHECK_EVERY
+                await AsyncKbjuEstimateCacheRepository.evict_least_recently_used(KBJU_ESTIMATE_CACHE_MAX_ENTRIES)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить оценку КБЖУ в кэш: {e}")
+
+    def stats(self) -> dict:
+        """Счётчики попаданий/промахов с момента запуска."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Глобальный экземпляр сервиса
+kbju_estimator = KbjuEstimator()
@@ -0,0 +1,138 @@
+"""Схемы JSON-ответов Gemini для КБЖУ и единый нормализатор результатов."""
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+from utils.validators import safe_float
+
+NUTRIENT_KEYS = ("kcal", "protein", "fat", "carbs")
+
+_NUMBER = {"type": "NUMBER"}
+_NULLABLE_NUMBER = {"type": "NUMBER", "nullable": True}
+
+# Схемы в формате OpenAPI-подмножества, которое принимает response_schema Gemini
+KBJU_ESTIMATE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "items": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "name": {"type": "STRING"},
+                    "grams": _NUMBER,
+                    **{key: _NUMBER for key in NUTRIENT_KEYS},
+                },
+                "required": ["name", "grams", *NUTRIENT_KEYS],
+            },
+        },
+        "total": {
+            "type": "OBJECT",
+            "properties": {key: _NUMBER for key in NUTRIENT_KEYS},
+            "required": list(NUTRIENT_KEYS),
+        },
+    },
+    "required": ["items", "total"],
+}
+
+KBJU_LABEL_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "product_name": {"type": "STRING", "nullable": True},
+        "kbju_per_100g": {
+            "type": "OBJECT",
+            "properties": {key: _NULLABLE_NUMBER for key in NUTRIENT_KEYS},
+            "required": list(NUTRIENT_KEYS),
+        },
+        "package_weight": _NULLABLE_NUMBER,
+        "found_weight": {"type": "BOOLEAN"},
+    },
+    "required": ["kbju_per_100g", "package_weight", "found_weight"],
+}
+
+
+@dataclass
+class Nutrients:
+    kcal: float = 0.0
+    protein: float = 0.0
+    fat: float = 0.0
+    carbs: float = 0.0
+
+    @classmethod
+    def from_raw(cls, data: Any) -> "Nutrients":
+        data = data if isinstance(data, dict) else {}
+        return cls(**{key: safe_float(data.get(key)) for key in NUTRIENT_KEYS})
+
+
+@dataclass
+class KbjuItem:
+    name: str
+    grams: float
+    kcal: float
+    protein: float
+    fat: float
+    carbs: float
+
+
+@dataclass
+class KbjuEstimate:
+    """Оценка КБЖУ: продукты и итог."""
+    items: list[KbjuItem] = field(default_factory=list)
+    total: Nutrients = field(default_factory=Nutrients)
+
+    def to_dict(self) -> dict:
+        """Формат, который хранится в кэшах и products_json: {"items": [...], "total": {...}}."""
+        return asdict(self)
+
+
+@dataclass
+class LabelKbju:
+    """КБЖУ с этикетки (на 100 г) и вес упаковки."""
+    product_name: str
+    kbju_per_100g: Nutrients
+    package_weight: Optional[float]
+    found_weight: bool
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def normalize_kbju_estimate(data: Any) -> Optional[KbjuEstimate]:
+    """
+    Приводит ответ Gemini к KbjuEstimate: числа — float, пустые названия заменены.
+
+    Если итог не пришёл, он считается по продуктам. None — в ответе нет ни продуктов, ни итога.
+    """
+    if not isinstance(data, dict):
+        return None
+    items = [
+        KbjuItem(
+            name=str(item.get("name") or "продукт"),
+            grams=safe_float(item.get("grams")),
+            **{key: safe_float(item.get(key)) for key in NUTRIENT_KEYS},
+        )
+        for item in data.get("items") or []
+        if isinstance(item, dict)
+    ]
+    if isinstance(data.get("total"), dict):
+        total = Nutrients.from_raw(data["total"])
+    elif items:
+        total = Nutrients(**{key: sum(getattr(item, key) for item in items) for key in NUTRIENT_KEYS})
+    else:
+        return None
+    return KbjuEstimate(items=items, total=total)
+
+
+def normalize_label(data: Any) -> Optional[LabelKbju]:
+    """Приводит ответ по этикетке к LabelKbju. None — калорийность на этикетке не найдена."""
+    if not isinstance(data, dict):
+        return None
+    per_100g = data.get("kbju_per_100g")
+    if not isinstance(per_100g, dict) or per_100g.get("kcal") is None:
+        return None
+    package_weight = safe_float(data.get("package_weight")) or None
+    return LabelKbju(
+        product_name=str(data.get("product_name") or "Продукт"),
+        kbju_per_100g=Nutrients.from_raw(per_100g),
+        package_weight=package_weight,
+        found_weight=bool(data.get("found_weight")) and package_weight is not None,
+    )
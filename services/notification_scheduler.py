@@ -1,15 +1,69 @@
-"""Сервис для отправки запланированных уведомлений."""
+"""
+Сервис для отправки запланированных уведомлений.
+
+Время уведомлений — местное для каждого пользователя. Напоминания о приёмах
+пищи рассылаются по корзинам (часовой пояс, местное время): каждая корзина
+уходит, когда в её поясе наступает 10:00/14:00/20:00, поэтому нагрузка
+распределяется по суткам, а не приходится на три момента по Москве.
+Пользователи, которые уже записали еду в окне напоминания, пропускаются
+прямо в запросе страницы рассылки.
+"""
 import asyncio
 import logging
-import json
-from datetime import datetime, time
-from zoneinfo import ZoneInfo
+from datetime import date, datetime, time, timedelta, timezone
+from typing import NamedTuple
 from aiogram import Bot
-from database.session import get_db_session
-from database.models import User, Supplement
+from config import NOTIFICATION_OUTBOX_RETENTION_DAYS, SUPPLEMENT_REMINDER_MAX_LATENESS_MINUTES
+from database.async_repositories import (
+    AsyncNotificationOutboxRepository,
+    AsyncSupplementRepository,
+    AsyncUserRepository,
+)
+from services.broadcast import Broadcaster
+from services.supplement_schedule import (
+    MINUTES_PER_DAY,
+    MINUTES_PER_WEEK,
+    minute_of_week,
+    supplement_schedule,
+)
+from utils.timezones import get_zone
 
 logger = logging.getLogger(__name__)
-MSK_TZ = ZoneInfo("Europe/Moscow")
+
+# Вид уведомления в notification_outbox; слот — дата, время (UTC) и id добавки
+SUPPLEMENT_OUTBOX_KIND = "supplement"
+
+# Как часто циклы перечитывают пояса пользователей и расписание добавок
+SCHEDULE_REFRESH_SECONDS = 60 * 60
+
+
+class MealReminder(NamedTuple):
+    local_time: time
+    # С какого местного времени записанная еда считается этим приёмом пищи
+    window_start: time
+    meal_type: str
+    text: str
+
+
+MEAL_REMINDERS = (
+    MealReminder(time(10, 0), time(0, 0), "завтрак", "Добавьте завтрак и Вы на один шаг приблизитесь к цели!"),
+    MealReminder(time(14, 0), time(11, 0), "обед", "Добавьте обед и Вы на один шаг приблизитесь к цели!"),
+    MealReminder(time(20, 0), time(16, 0), "ужин", "Добавьте ужин и Вы на один шаг приблизитесь к цели!"),
+)
+
+
+def next_local_occurrence(timezone_name: str, local_time: time, after: datetime) -> datetime:
+    """Ближайший после after момент, когда в поясе timezone_name наступает local_time."""
+    zone = get_zone(timezone_name)
+    local_after = after.astimezone(zone)
+    candidate = datetime.combine(local_after.date(), local_time, tzinfo=zone)
+    if candidate <= local_after:
+        candidate = datetime.combine(local_after.date() + timedelta(days=1), local_time, tzinfo=zone)
+    return candidate
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 class NotificationScheduler:
@@ -18,79 +72,82 @@ class NotificationScheduler:
     def __init__(self, bot: Bot):
         self.bot = bot
         self.running = False
-        self.sent_notifications_today = set()  # Для предотвращения дублирования уведомлений
-        self._last_check_date = None  # Дата последней проверки для сброса кэша
+        self.broadcaster = Broadcaster(bot)
+        self._dispatch_tasks: set[asyncio.Task] = set()
         
-    async def send_notification(self, user_id: str, message: str):
-        """Отправляет уведомление пользователю."""
+    async def send_notification(self, user_id: str, message: str) -> bool:
+        """Отправляет уведомление пользователю (через общий лимит частоты рассылок)."""
         try:
-            await self.bot.send_message(chat_id=user_id, text=message)
-            logger.info(f"Уведомление отправлено пользователю {user_id}")
+            if await self.broadcaster.send(user_id, message):
+                logger.info(f"Уведомление отправлено пользователю {user_id}")
+                return True
         except Exception as e:
             logger.error(f"Ошибка при отправке уведомления пользователю {user_id}: {e}")
+        return False
     
-    async def send_meal_notifications(self, meal_type: str, message_text: str):
-        """Отправляет уведомления о приёме пищи всем пользователям."""
+    async def send_meal_notifications(self, reminder: MealReminder, timezone_name: str, local_date: date):
+        """
+        Отправляет напоминание о приёме пищи пользователям одного часового пояса.
+
+        Тем, кто уже записал еду за local_date между reminder.window_start и
+        reminder.local_time (по местному времени), напоминание не отправляется.
+        """
+        key = f"meal:{reminder.meal_type}:{local_date.isoformat()}:{timezone_name}"
+        zone = get_zone(timezone_name)
+        window_start, window_end = (
+            datetime.combine(local_date, local_time, tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+            for local_time in (reminder.window_start, reminder.local_time)
+        )
         try:
-            with get_db_session() as session:
-                users = session.query(User).all()
-                user_ids = [user.user_id for user in users]
-            
-            logger.info(f"Отправка уведомлений о {meal_type} {len(user_ids)} пользователям")
-            
-            # Отправляем уведомления всем пользователям
-            tasks = [self.send_notification(user_id, message_text) for user_id in user_ids]
-            await asyncio.gather(*tasks, return_exceptions=True)
-            
-            logger.info(f"Уведомления о {meal_type} отправлены")
+            await self.broadcaster.broadcast(
+                key,
+                reminder.text,
+                timezone=timezone_name,
+                meal_window_start=window_start,
+                meal_window_end=window_end,
+            )
         except Exception as e:
-            logger.error(f"Ошибка при отправке уведомлений о {meal_type}: {e}")
+            logger.error(f"Ошибка при отправке уведомлений о {reminder.meal_type} ({timezone_name}): {e}")
     
-    def _get_weekday_name(self, weekday: int) -> str:
-        """Преобразует номер дня недели (0=Понедельник) в русское сокращение."""
-        weekday_names = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
-        return weekday_names[weekday]
+    def _dispatch(self, coro) -> None:
+        """Запускает рассылку корзины, не задерживая следующие корзины."""
+        task = asyncio.create_task(coro)
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
     
-    def calculate_next_time(self, target_time: time) -> float:
-        """Вычисляет время до следующего указанного времени в секундах."""
-        now = datetime.now(MSK_TZ)
-        target_datetime = datetime.combine(now.date(), target_time)
-        target_datetime = target_datetime.replace(tzinfo=MSK_TZ)
-        
-        # Если время уже прошло сегодня, планируем на завтра
-        if now.time() >= target_time:
-            from datetime import timedelta
-            target_datetime += timedelta(days=1)
-        
-        delta = (target_datetime - now).total_seconds()
-        return delta
-    
-    async def schedule_daily_notification(self, target_time: time, meal_type: str, message_text: str):
-        """Планирует ежедневное уведомление на указанное время."""
+    async def meal_notification_loop(self):
+        """
+        Цикл напоминаний о приёмах пищи по корзинам (часовой пояс, местное время).
+
+        Спит до ближайшей корзины (но не дольше SCHEDULE_REFRESH_SECONDS, чтобы
+        подхватить новые пояса) и запускает рассылку всех наступивших корзин.
+        """
+        last_check = utc_now()
         while self.running:
             try:
-                # Вычисляем время до следующего указанного времени
-                wait_seconds = self.calculate_next_time(target_time)
-                
-                logger.info(
-                    f"Следующее уведомление о {meal_type} будет отправлено через "
-                    f"{wait_seconds / 3600:.2f} часов (в {target_time})"
-                )
-                
-                # Ждём до указанного времени
-                await asyncio.sleep(wait_seconds)
-                
-                # Отправляем уведомления
-                await self.send_meal_notifications(meal_type, message_text)
-                
-                # Ждём 1 секунду перед следующей итерацией (чтобы не отправлять дважды)
-                await asyncio.sleep(1)
+                timezones = await AsyncUserRepository.get_timezones()
+                buckets = [
+                    (timezone_name, reminder, next_local_occurrence(timezone_name, reminder.local_time, last_check))
+                    for timezone_name in timezones
+                    for reminder in MEAL_REMINDERS
+                ]
+                next_due = min((due for _, _, due in buckets), default=None)
+                wait = SCHEDULE_REFRESH_SECONDS
+                if next_due is not None:
+                    wait = min(wait, (next_due - utc_now()).total_seconds())
+                await asyncio.sleep(max(wait, 0))
                 
+                now = utc_now()
+                for timezone_name, reminder, due in buckets:
+                    if due <= now:
+                        logger.info(f"Корзина напоминаний: {reminder.meal_type}, {timezone_name}")
+                        self._dispatch(self.send_meal_notifications(reminder, timezone_name, due.date()))
+                last_check = now
             except asyncio.CancelledError:
-                logger.info(f"Планировщик уведомлений о {meal_type} остановлен")
+                logger.info("Планировщик уведомлений о приёмах пищи остановлен")
                 break
             except Exception as e:
-                logger.error(f"Ошибка в планировщике уведомлений о {meal_type}: {e}")
+                logger.error(f"Ошибка в планировщике уведомлений о приёмах пищи: {e}")
                 # В случае ошибки ждём минуту перед повтором
                 await asyncio.sleep(60)
     
@@ -99,100 +156,112 @@ class NotificationScheduler:
         self.running = True
         logger.info("Запуск планировщика уведомлений о приёмах пищи и добавках")
         
-        # Создаём задачи для каждого времени приёма пищи
         tasks = [
-            self.schedule_daily_notification(
-                time(10, 0),
-                "завтрак",
-                "Добавьте завтрак и Вы на один шаг приблизитесь к цели!"
-            ),
-            self.schedule_daily_notification(
-                time(14, 0),
-                "обед",
-                "Добавьте обед и Вы на один шаг приблизитесь к цели!"
-            ),
-            self.schedule_daily_notification(
-                time(20, 0),
-                "ужин",
-                "Добавьте ужин и Вы на один шаг приблизитесь к цели!"
-            ),
+            self.meal_notification_loop(),
             # Запускаем цикл проверки уведомлений о добавках
             self.supplement_notification_loop(),
+            # Досылаем рассылки, прерванные перезапуском
+            self.broadcaster.resume_unfinished(),
+            self.outbox_cleanup_loop(),
         ]
         
         # Запускаем все задачи параллельно
         await asyncio.gather(*tasks, return_exceptions=True)
     
-    async def check_and_send_supplement_notifications(self):
-        """Проверяет добавки и отправляет уведомления, если наступило время приёма."""
-        try:
-            now = datetime.now(MSK_TZ)
-            current_time_str = now.strftime("%H:%M")
-            current_weekday = self._get_weekday_name(now.weekday())
-            today_date = now.date()
-            
-            # Сбрасываем кэш отправленных уведомлений в начале нового дня
-            if self._last_check_date is None or self._last_check_date != today_date:
-                self.sent_notifications_today.clear()
-                self._last_check_date = today_date
-            
-            with get_db_session() as session:
-                # Получаем все добавки с включенными уведомлениями (проверяем явно на True, чтобы исключить None)
-                supplements = session.query(Supplement).filter(
-                    Supplement.notifications_enabled.is_(True)
-                ).all()
-                
-                for supplement in supplements:
-                    try:
-                        # Парсим дни и время
-                        days = json.loads(supplement.days_json or "[]")
-                        times = json.loads(supplement.times_json or "[]")
-                        
-                        # Проверяем, нужно ли отправлять уведомление
-                        if not days or not times:
-                            continue
-                        
-                        # Проверяем день недели
-                        if current_weekday not in days:
-                            continue
-                        
-                        # Проверяем время (с точностью до минуты)
-                        if current_time_str not in times:
-                            continue
-                        
-                        # Создаём уникальный ключ для уведомления
-                        notification_key = f"{supplement.user_id}_{supplement.id}_{current_time_str}_{today_date}"
-                        
-                        # Проверяем, не отправляли ли уже это уведомление сегодня
-                        if notification_key in self.sent_notifications_today:
-                            continue
-                        
-                        # Отправляем уведомление
-                        message = f"💊 Напоминание: пора принять добавку {supplement.name}"
-                        await self.send_notification(supplement.user_id, message)
-                        
-                        # Помечаем уведомление как отправленное
-                        self.sent_notifications_today.add(notification_key)
-                        logger.info(
-                            f"Отправлено уведомление о добавке {supplement.name} "
-                            f"пользователю {supplement.user_id} в {current_time_str}"
-                        )
-                    except Exception as e:
-                        logger.error(
-                            f"Ошибка при проверке добавки {supplement.id} "
-                            f"для пользователя {supplement.user_id}: {e}",
-                            exc_info=True
-                        )
-        except Exception as e:
-            logger.error(f"Ошибка при проверке уведомлений о добавках: {e}", exc_info=True)
+    async def send_supplement_reminders(self, slot: int, slot_date: date) -> None:
+        """Отправляет напоминания слота недели из индекса расписания; slot_date — дата слота (UTC)."""
+        slot_time = f"{slot % MINUTES_PER_DAY // 60:02d}:{slot % 60:02d}"
+        reminders = {
+            (reminder.user_id, f"{slot_date.isoformat()}T{slot_time}#{reminder.supplement_id}"): reminder
+            for reminder in supplement_schedule.due(slot)
+        }
+        # Забираем напоминания в журнале: уже отправленные (до рестарта или
+        # другим экземпляром бота) пропускаются
+        claimed = await AsyncNotificationOutboxRepository.claim(SUPPLEMENT_OUTBOX_KIND, list(reminders))
+        
+        delivered, failed = [], []
+        for item in claimed:
+            reminder = reminders[item]
+            message = f"💊 Напоминание: пора принять добавку {reminder.name}"
+            if await self.send_notification(reminder.user_id, message):
+                delivered.append(item)
+                logger.info(
+                    f"Отправлено уведомление о добавке {reminder.name} "
+                    f"пользователю {reminder.user_id} в {slot_time}"
+                )
+            else:
+                failed.append(item)
+        
+        await AsyncNotificationOutboxRepository.mark(SUPPLEMENT_OUTBOX_KIND, delivered, sent=True)
+        await AsyncNotificationOutboxRepository.mark(SUPPLEMENT_OUTBOX_KIND, failed, sent=False)
+    
+    async def check_and_send_supplement_notifications(self, last_slot: int) -> int:
+        """
+        Отправляет напоминания всех слотов после last_slot до текущей минуты.
+
+        Слоты, пропущенные из-за задержки цикла, досылаются, если опоздание
+        не больше SUPPLEMENT_REMINDER_MAX_LATENESS_MINUTES. Возвращает текущий слот.
+        """
+        now = utc_now()
+        current_slot = minute_of_week(now.weekday(), now.hour, now.minute)
+        
+        oldest_slot = (current_slot - SUPPLEMENT_REMINDER_MAX_LATENESS_MINUTES - 1) % MINUTES_PER_WEEK
+        if (current_slot - last_slot) % MINUTES_PER_WEEK > SUPPLEMENT_REMINDER_MAX_LATENESS_MINUTES + 1:
+            last_slot = oldest_slot
+        
+        for slot in supplement_schedule.occupied_slots(last_slot, current_slot):
+            # Дата самого слота: досылаемый после полуночи слот 23:59 относится к прошлому дню
+            slot_date = (now - timedelta(minutes=(current_slot - slot) % MINUTES_PER_WEEK)).date()
+            try:
+                await self.send_supplement_reminders(slot, slot_date)
+            except Exception as e:
+                logger.error(f"Ошибка при отправке напоминаний слота {slot}: {e}", exc_info=True)
+        return current_slot
+    
+    def _seconds_until_slot(self, slot: int) -> float:
+        """Секунд до начала слота недели (ближайшего в будущем)."""
+        now = utc_now()
+        current_slot = minute_of_week(now.weekday(), now.hour, now.minute)
+        minutes_ahead = (slot - current_slot) % MINUTES_PER_WEEK or MINUTES_PER_WEEK
+        slot_start = now.replace(second=0, microsecond=0) + timedelta(minutes=minutes_ahead)
+        return max((slot_start - now).total_seconds(), 0.0)
     
     async def supplement_notification_loop(self):
-        """Цикл проверки уведомлений о добавках каждую минуту."""
+        """
+        Цикл напоминаний о добавках: спит до ближайшего занятого слота индекса.
+
+        Изменение добавки будит цикл, чтобы пересчитать ближайший слот. Слоты
+        считаются по UTC; индекс перечитывается из БД раз в сутки.
+        """
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        supplement_schedule.add_change_callback(lambda: loop.call_soon_threadsafe(wakeup.set))
+        
+        loaded_on = None
+        last_slot = None
+        
         while self.running:
             try:
-                await self.check_and_send_supplement_notifications()
-                # Проверяем каждую минуту
-                await asyncio.sleep(60)
+                now = utc_now()
+                if loaded_on != now.date():
+                    # Раз в сутки: смещения поясов меняются при переходе на летнее время
+                    supplement_schedule.load(await AsyncSupplementRepository.get_notification_schedule())
+                    loaded_on = now.date()
+                if last_slot is None:
+                    # Текущая минута тоже обрабатывается при старте
+                    last_slot = (minute_of_week(now.weekday(), now.hour, now.minute) - 1) % MINUTES_PER_WEEK
+                
+                wakeup.clear()
+                last_slot = await self.check_and_send_supplement_notifications(last_slot)
+                
+                next_slot = supplement_schedule.next_slot_after(last_slot)
+                timeout = SCHEDULE_REFRESH_SECONDS
+                if next_slot is not None:
+                    timeout = min(timeout, self._seconds_until_slot(next_slot))
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
             except asyncio.CancelledError:
                 logger.info("Цикл проверки уведомлений о добавках остановлен")
                 break
@@ -201,6 +270,18 @@ class NotificationScheduler:
                 # В случае ошибки ждём минуту перед повтором
                 await asyncio.sleep(60)
     
+    async def outbox_cleanup_loop(self):
+        """Раз в сутки удаляет старые записи журнала уведомлений."""
+        while self.running:
+            try:
+                await AsyncNotificationOutboxRepository.purge_older_than(NOTIFICATION_OUTBOX_RETENTION_DAYS)
+                await asyncio.sleep(24 * 60 * 60)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Ошибка при очистке журнала уведомлений: {e}", exc_info=True)
+                await asyncio.sleep(60 * 60)
+    
     def stop(self):
         """Останавливает планировщик уведомлений."""
         self.running = False
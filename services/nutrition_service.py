@@ -1,12 +1,29 @@
 """Сервис для работы с API питания."""
+import json
 import logging
 import re
 import requests
+from datetime import datetime, timedelta
 from typing import Optional, Tuple
-from config import NUTRITION_API_KEY
+from config import (
+    NUTRITION_API_KEY,
+    CALORIENINJAS_API_URL,
+    OPENFOODFACTS_API_URL,
+    PRODUCT_CACHE_TTL_HOURS,
+    PRODUCT_CACHE_NEGATIVE_TTL_HOURS,
+    PRODUCT_CACHE_MEMORY_SIZE,
+)
+from database.async_repositories import AsyncProductCacheRepository
+from database.async_session import run_in_async_session
+from services.http_client import http_client
+from services.ingredient_service import ingredient_service
+from utils.ttl_cache import TTLCache
+from utils.validators import safe_float
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
 
 class NutritionService:
     """Сервис для работы с CalorieNinjas API и Open Food Facts."""
@@ -15,6 +32,8 @@ class NutritionService:
         if not NUTRITION_API_KEY:
             logger.warning("NUTRITION_API_KEY не задан. CalorieNinjas работать не будет.")
         self.api_key = NUTRITION_API_KEY
+        # Горячий слой кэша продуктов по штрих-коду поверх таблицы product_cache
+        self._product_cache = TTLCache(maxsize=PRODUCT_CACHE_MEMORY_SIZE)
     
     def get_nutrition_from_api(self, query: str) -> Tuple[list, dict]:
         """
@@ -30,27 +49,50 @@ class NutritionService:
         if not self.api_key:
             raise RuntimeError("NUTRITION_API_KEY не задан в переменных окружения")
         
-        url = "https://api.calorieninjas.com/v1/nutrition"
-        headers = {"X-Api-Key": self.api_key}
-        params = {"query": query}
+        try:
+            resp = requests.get(
+                CALORIENINJAS_API_URL,
+                headers={"X-Api-Key": self.api_key},
+                params={"query": query},
+                timeout=10,
+            )
+        except Exception as e:
+            logger.error(f"Ошибка сети при запросе к CalorieNinjas: {e}", exc_info=True)
+            raise
+        
+        return self._parse_nutrition_response(resp.status_code, resp.text, resp.json)
+    
+    async def get_nutrition_from_api_async(self, query: str) -> Tuple[list, dict]:
+        """Асинхронная версия get_nutrition_from_api через общий HTTP-клиент."""
+        if not self.api_key:
+            raise RuntimeError("NUTRITION_API_KEY не задан в переменных окружения")
         
         try:
-            resp = requests.get(url, headers=headers, params=params, timeout=10)
+            resp = await http_client.get(
+                CALORIENINJAS_API_URL,
+                headers={"X-Api-Key": self.api_key},
+                params={"query": query},
+            )
         except Exception as e:
             logger.error(f"Ошибка сети при запросе к CalorieNinjas: {e}", exc_info=True)
             raise
         
-        logger.debug(f"CalorieNinjas status: {resp.status_code}")
-        logger.debug(f"CalorieNinjas raw response: {resp.text[:500]}")
+        return self._parse_nutrition_response(resp.status, resp.text, resp.json)
+    
+    @staticmethod
+    def _parse_nutrition_response(status: int, text: str, load_json) -> Tuple[list, dict]:
+        """Разбирает ответ CalorieNinjas в (items, totals)."""
+        logger.debug(f"CalorieNinjas status: {status}")
+        logger.debug(f"CalorieNinjas raw response: {text[:500]}")
         
-        if resp.status_code != 200:
-            logger.error(f"Ответ от CalorieNinjas (non-200): {resp.text[:500]}")
-            raise RuntimeError(f"CalorieNinjas error: HTTP {resp.status_code}")
+        if status != 200:
+            logger.error(f"Ответ от CalorieNinjas (non-200): {text[:500]}")
+            raise RuntimeError(f"CalorieNinjas error: HTTP {status}")
         
         try:
-            data = resp.json()
+            data = load_json()
         except Exception as e:
-            logger.error(f"Не получилось распарсить JSON от CalorieNinjas: {resp.text[:500]}", exc_info=True)
+            logger.error(f"Не получилось распарсить JSON от CalorieNinjas: {text[:500]}", exc_info=True)
             raise
         
         # формат: {"items": [ {...}, {...}, ... ]}
@@ -60,14 +102,6 @@ class NutritionService:
         
         items = data.get("items") or []
         
-        def safe_float(v) -> float:
-            try:
-                if v is None:
-                    return 0.0
-                return float(v)
-            except (TypeError, ValueError):
-                return 0.0
-        
         totals = {
             "calories": 0.0,
             "protein_g": 0.0,
@@ -104,7 +138,7 @@ class NutritionService:
         Returns:
             dict с информацией о продукте или None при ошибке
         """
-        url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
+        url = f"{OPENFOODFACTS_API_URL}/{barcode}.json"
         
         try:
             resp = requests.get(url, timeout=10)
@@ -113,120 +147,200 @@ class NutritionService:
                 logger.warning(f"Open Food Facts API error: HTTP {resp.status_code}")
                 return None
             
-            data = resp.json()
-            
-            if data.get("status") != 1:
-                logger.info(f"Product not found in Open Food Facts: {barcode}")
+            return self._parse_openfoodfacts_product(barcode, resp.json())
+        except Exception as e:
+            logger.error(f"Ошибка при запросе к Open Food Facts: {e}", exc_info=True)
+            return None
+    
+    async def get_product_from_openfoodfacts_async(self, barcode: str) -> Optional[dict]:
+        """Асинхронная версия get_product_from_openfoodfacts через общий HTTP-клиент."""
+        try:
+            return await self._fetch_openfoodfacts_product_async(barcode)
+        except Exception as e:
+            logger.error(f"Ошибка при запросе к Open Food Facts: {e}", exc_info=True)
+            return None
+    
+    async def _fetch_openfoodfacts_product_async(self, barcode: str) -> Optional[dict]:
+        """
+        Запрашивает продукт в Open Food Facts.
+        
+        Возвращает None, если продукта нет в базе, и пробрасывает исключение
+        при сбое сети или сервиса — чтобы сбой не попал в кэш как «не найден».
+        """
+        resp = await http_client.get(f"{OPENFOODFACTS_API_URL}/{barcode}.json")
+        if resp.status != 200:
+            raise RuntimeError(f"Open Food Facts API error: HTTP {resp.status}")
+        return self._parse_openfoodfacts_product(barcode, resp.json())
+    
+    async def get_product_by_barcode(self, barcode: str) -> Optional[dict]:
+        """
+        Получает продукт по штрих-коду с кэшированием.
+        
+        Порядок: in-process LRU → таблица product_cache → Open Food Facts.
+        Найденные продукты живут PRODUCT_CACHE_TTL_HOURS, «не найден» —
+        PRODUCT_CACHE_NEGATIVE_TTL_HOURS. Если сеть недоступна, а в БД есть
+        устаревшая запись о продукте, возвращается она.
+        
+        Returns:
+            dict в формате get_product_from_openfoodfacts или None
+        """
+        cached = self._product_cache.get(barcode, _MISSING)
+        if cached is not _MISSING:
+            logger.debug(f"Product cache hit (memory): {barcode}")
+            return cached
+        
+        try:
+            entry = await AsyncProductCacheRepository.get_entry(barcode)
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать кэш продукта {barcode}: {e}")
+            entry = None
+        
+        stale_product = None
+        if entry:
+            product = json.loads(entry.product_json) if entry.found and entry.product_json else None
+            ttl = timedelta(hours=PRODUCT_CACHE_TTL_HOURS if entry.found else PRODUCT_CACHE_NEGATIVE_TTL_HOURS)
+            age = datetime.utcnow() - entry.fetched_at
+            if age < ttl:
+                logger.debug(f"Product cache hit (db): {barcode}")
+                self._product_cache.set(barcode, product, ttl=(ttl - age).total_seconds())
+                return product
+            stale_product = product
+        
+        try:
+            product = await self._fetch_openfoodfacts_product_async(barcode)
+        except Exception as e:
+            logger.error(f"Ошибка при запросе к Open Food Facts: {e}", exc_info=True)
+            if stale_product is not None:
+                logger.info(f"Open Food Facts недоступен, отдаю устаревшую запись кэша: {barcode}")
+            return stale_product
+        
+        if product is not None and product.get("nutriments") and product["name"] != "Неизвестный продукт":
+            try:
+                await run_in_async_session(
+                    ingredient_service.remember_per_100g, product["name"], product["nutriments"], "openfoodfacts"
+                )
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить продукт {barcode} в справочник: {e}")
+        
+        ttl_hours = PRODUCT_CACHE_TTL_HOURS if product is not None else PRODUCT_CACHE_NEGATIVE_TTL_HOURS
+        self._product_cache.set(barcode, product, ttl=ttl_hours * 3600)
+        try:
+            await AsyncProductCacheRepository.save_entry(barcode, product)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить продукт {barcode} в кэш: {e}")
+        return product
+    
+    @staticmethod
+    def _parse_openfoodfacts_product(barcode: str, data: dict) -> Optional[dict]:
+        """Нормализует ответ Open Food Facts: название, бренд, КБЖУ на 100 г, вес."""
+        if data.get("status") != 1:
+            logger.info(f"Product not found in Open Food Facts: {barcode}")
+            return None
+        
+        product = data.get("product", {})
+        
+        # Извлекаем основную информацию
+        result = {
+            "name": product.get("product_name") or product.get("product_name_ru") or product.get("product_name_en") or "Неизвестный продукт",
+            "brand": product.get("brands") or "",
+            "barcode": barcode,
+            "nutriments": {}
+        }
+        
+        # Извлекаем КБЖУ (на 100г)
+        nutriments = product.get("nutriments", {})
+        
+        logger.debug(f"Open Food Facts barcode {barcode}, product: {result['name']}")
+        
+        def parse_number(value):
+            if value is None:
                 return None
-            
-            product = data.get("product", {})
-            
-            # Извлекаем основную информацию
-            result = {
-                "name": product.get("product_name") or product.get("product_name_ru") or product.get("product_name_en") or "Неизвестный продукт",
-                "brand": product.get("brands") or "",
-                "barcode": barcode,
-                "nutriments": {}
-            }
-            
-            # Извлекаем КБЖУ (на 100г)
-            nutriments = product.get("nutriments", {})
-            
-            logger.debug(f"Open Food Facts barcode {barcode}, product: {result['name']}")
-            
-            def safe_float(value):
-                if value is None:
-                    return None
-                try:
-                    if isinstance(value, (int, float)):
-                        return float(value)
-                    if isinstance(value, str):
-                        cleaned = value.strip().replace(',', '.')
-                        return float(cleaned)
-                    return None
-                except (ValueError, TypeError):
-                    return None
-            
-            # Калории
-            kcal = None
-            for key in ["energy-kcal_100g", "energy-kcal", "energy_100g", "energy-kcal_value", 
-                        "energy-kcal_serving", "energy_serving", "energy"]:
-                if key in nutriments:
-                    kcal = safe_float(nutriments[key])
-                    if kcal is not None and kcal > 0:
-                        break
-            
-            # Конвертируем из кДж если нужно
-            if not kcal or kcal <= 0:
-                energy_kj = None
-                for key in ["energy-kj_100g", "energy-kj", "energy-kj_value", "energy-kj_serving"]:
-                    if key in nutriments:
-                        energy_kj = safe_float(nutriments[key])
-                        if energy_kj is not None and energy_kj > 0:
-                            break
-                
-                if energy_kj and energy_kj > 0:
-                    try:
-                        kcal = energy_kj / 4.184
-                    except (ValueError, TypeError):
-                        pass
-            
-            if kcal and kcal > 0:
-                result["nutriments"]["kcal"] = kcal
-            
-            # Белки
-            protein = None
-            for key in ["proteins_100g", "proteins", "protein_100g", "protein", 
-                        "proteins_value", "proteins_serving", "protein_serving"]:
-                if key in nutriments:
-                    protein = safe_float(nutriments[key])
-                    if protein is not None and protein >= 0:
-                        break
-            
-            if protein is not None and protein >= 0:
-                result["nutriments"]["protein"] = protein
-            
-            # Жиры
-            fat = None
-            for key in ["fat_100g", "fat", "fats_100g", "fats", 
-                        "fat_value", "fat_serving", "fats_serving"]:
-                if key in nutriments:
-                    fat = safe_float(nutriments[key])
-                    if fat is not None and fat >= 0:
-                        break
-            
-            if fat is not None and fat >= 0:
-                result["nutriments"]["fat"] = fat
-            
-            # Углеводы
-            carbs = None
-            for key in ["carbohydrates_100g", "carbohydrates", "carbohydrate_100g", "carbohydrate",
-                        "carbohydrates_value", "carbohydrates_serving", "carbohydrate_serving", "carbs_100g", "carbs"]:
+            try:
+                if isinstance(value, (int, float)):
+                    return float(value)
+                if isinstance(value, str):
+                    cleaned = value.strip().replace(',', '.')
+                    return float(cleaned)
+                return None
+            except (ValueError, TypeError):
+                return None
+        
+        # Калории
+        kcal = None
+        for key in ["energy-kcal_100g", "energy-kcal", "energy_100g", "energy-kcal_value", 
+                    "energy-kcal_serving", "energy_serving", "energy"]:
+            if key in nutriments:
+                kcal = parse_number(nutriments[key])
+                if kcal is not None and kcal > 0:
+                    break
+        
+        # Конвертируем из кДж если нужно
+        if not kcal or kcal <= 0:
+            energy_kj = None
+            for key in ["energy-kj_100g", "energy-kj", "energy-kj_value", "energy-kj_serving"]:
                 if key in nutriments:
-                    carbs = safe_float(nutriments[key])
-                    if carbs is not None and carbs >= 0:
+                    energy_kj = parse_number(nutriments[key])
+                    if energy_kj is not None and energy_kj > 0:
                         break
             
-            if carbs is not None and carbs >= 0:
-                result["nutriments"]["carbs"] = carbs
-            
-            # Вес продукта
-            weight = product.get("quantity") or product.get("product_quantity") or product.get("net_weight") or product.get("weight")
-            if weight:
-                weight_match = re.search(r'(\d+)', str(weight))
-                if weight_match:
-                    result["weight"] = int(weight_match.group(1))
-            
-            # Дополнительная информация
-            result["ingredients"] = product.get("ingredients_text") or product.get("ingredients_text_ru") or product.get("ingredients_text_en") or ""
-            result["categories"] = product.get("categories") or ""
-            result["image_url"] = product.get("image_url") or product.get("image_front_url") or ""
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Ошибка при запросе к Open Food Facts: {e}", exc_info=True)
-            return None
+            if energy_kj and energy_kj > 0:
+                try:
+                    kcal = energy_kj / 4.184
+                except (ValueError, TypeError):
+                    pass
+        
+        if kcal and kcal > 0:
+            result["nutriments"]["kcal"] = kcal
+        
+        # Белки
+        protein = None
+        for key in ["proteins_100g", "proteins", "protein_100g", "protein", 
+                    "proteins_value", "proteins_serving", "protein_serving"]:
+            if key in nutriments:
+                protein = parse_number(nutriments[key])
+                if protein is not None and protein >= 0:
+                    break
+        
+        if protein is not None and protein >= 0:
+            result["nutriments"]["protein"] = protein
+        
+        # Жиры
+        fat = None
+        for key in ["fat_100g", "fat", "fats_100g", "fats", 
+                    "fat_value", "fat_serving", "fats_serving"]:
+            if key in nutriments:
+                fat = parse_number(nutriments[key])
+                if fat is not None and fat >= 0:
+                    break
+        
+        if fat is not None and fat >= 0:
+            result["nutriments"]["fat"] = fat
+        
+        # Углеводы
+        carbs = None
+        for key in ["carbohydrates_100g", "carbohydrates", "carbohydrate_100g", "carbohydrate",
+                    "carbohydrates_value", "carbohydrates_serving", "carbohydrate_serving", "carbs_100g", "carbs"]:
+            if key in nutriments:
+                carbs = parse_number(nutriments[key])
+                if carbs is not None and carbs >= 0:
+                    break
+        
+        if carbs is not None and carbs >= 0:
+            result["nutriments"]["carbs"] = carbs
+        
+        # Вес продукта
+        weight = product.get("quantity") or product.get("product_quantity") or product.get("net_weight") or product.get("weight")
+        if weight:
+            weight_match = re.search(r'(\d+)', str(weight))
+            if weight_match:
+                result["weight"] = int(weight_match.group(1))
+        
+        # Дополнительная информация
+        result["ingredients"] = product.get("ingredients_text") or product.get("ingredients_text_ru") or product.get("ingredients_text_en") or ""
+        result["categories"] = product.get("categories") or ""
+        result["image_url"] = product.get("image_url") or product.get("image_front_url") or ""
+        
+        return result
 
 
 # Глобальный экземпляр сервиса
@@ -0,0 +1,170 @@
+"""
+Индекс расписания напоминаний о добавках.
+
+Слоты — минуты недели по UTC (день недели × 1440 + ЧЧ×60 + ММ): местное время
+приёма переводится в UTC по часовому поясу пользователя. Для каждого занятого
+слота хранится набор напоминаний, а отсортированный список слотов позволяет
+бинарным поиском найти следующий. Индекс строится один раз при старте из БД
+и дальше обновляется по событиям SupplementRepository (сохранение/удаление
+добавки), поэтому тик планировщика стоит O(напоминаний в слоте), а не
+O(всех добавок) с разбором JSON на каждой итерации. Смещение пояса берётся
+на момент построения, поэтому планировщик перестраивает индекс раз в сутки
+(переходы на летнее время).
+"""
+import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional
+
+from database.repositories import SupplementRepository
+from utils.timezones import get_zone
+
+logger = logging.getLogger(__name__)
+
+WEEKDAY_NAMES = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+class ScheduledReminder(NamedTuple):
+    supplement_id: int
+    user_id: str
+    name: str
+
+
+def minute_of_week(weekday: int, hour: int, minute: int) -> int:
+    """Слот недели: 0 — понедельник 00:00."""
+    return weekday * MINUTES_PER_DAY + hour * 60 + minute
+
+
+def parse_time_slot(value: str) -> Optional[tuple[int, int]]:
+    """'09:00' → (9, 0); некорректное время — None."""
+    try:
+        hour_text, minute_text = str(value).strip().split(":")
+        hour, minute = int(hour_text), int(minute_text)
+    except (ValueError, AttributeError):
+        return None
+    if 0 <= hour < 24 and 0 <= minute < 60:
+        return hour, minute
+    return None
+
+
+def supplement_slots(days: list[str], times: list[str], utc_offset_minutes: int = 0) -> set[int]:
+    """Все слоты недели (UTC) для местных дней и времён добавки."""
+    weekdays = [WEEKDAY_NAMES.index(day) for day in days if day in WEEKDAY_NAMES]
+    parsed_times = [slot for slot in (parse_time_slot(value) for value in times) if slot]
+    return {
+        (minute_of_week(weekday, hour, minute) - utc_offset_minutes) % MINUTES_PER_WEEK
+        for weekday in weekdays
+        for hour, minute in parsed_times
+    }
+
+
+def utc_offset_minutes(timezone_name: Optional[str]) -> int:
+    """Текущее смещение пояса пользователя от UTC в минутах."""
+    offset = datetime.now(timezone.utc).astimezone(get_zone(timezone_name)).utcoffset()
+    return int(offset.total_seconds() // 60)
+
+
+class SupplementSchedule:
+    """Индекс (день недели, ЧЧ:ММ) → напоминания о добавках."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots: dict[int, dict[int, ScheduledReminder]] = {}
+        self._slot_keys: list[int] = []
+        self._by_supplement: dict[int, set[int]] = {}
+        self._change_callbacks: list[Callable[[], None]] = []
+
+    def add_change_callback(self, callback: Callable[[], None]) -> None:
+        """Вызывается после каждого изменения индекса (будит цикл планировщика)."""
+        self._change_callbacks.append(callback)
+
+    def load(self, supplements: list[dict]) -> int:
+        """Строит индекс заново из добавок (формат SupplementRepository). Возвращает число слотов."""
+        with self._lock:
+            self._slots.clear()
+            self._slot_keys.clear()
+            self._by_supplement.clear()
+            for supplement in supplements:
+                self._add(supplement)
+            slots_count = len(self._slot_keys)
+        logger.info(f"Индекс напоминаний о добавках: {len(supplements)} добавок, {slots_count} слотов")
+        self._changed()
+        return slots_count
+
+    def rebuild(self) -> int:
+        """Перечитывает расписание из БД."""
+        return self.load(SupplementRepository.get_notification_schedule())
+
+    def apply_change(self, supplement_id: int, supplement: Optional[dict]) -> None:
+        """Слушатель SupplementRepository: обновляет слоты одной добавки."""
+        with self._lock:
+            self._remove(supplement_id)
+            if supplement is not None and supplement.get("notifications_enabled", True):
+                self._add(supplement)
+        self._changed()
+
+    def due(self, slot: int) -> list[ScheduledReminder]:
+        """Напоминания слота."""
+        with self._lock:
+            return list(self._slots.get(slot, {}).values())
+
+    def occupied_slots(self, start: int, end: int) -> list[int]:
+        """Занятые слоты в полуинтервале (start, end] с переходом через конец недели."""
+        with self._lock:
+            if start == end:
+                return []
+            if start < end:
+                return self._slot_keys[bisect_right(self._slot_keys, start):bisect_right(self._slot_keys, end)]
+            return (
+                self._slot_keys[bisect_right(self._slot_keys, start):]
+                + self._slot_keys[:bisect_right(self._slot_keys, end)]
+            )
+
+    def next_slot_after(self, slot: int) -> Optional[int]:
+        """Ближайший занятый слот строго после slot (по кругу недели); None — индекс пуст."""
+        with self._lock:
+            if not self._slot_keys:
+                return None
+            index = bisect_right(self._slot_keys, slot)
+            return self._slot_keys[index % len(self._slot_keys)]
+
+    def _add(self, supplement: dict) -> None:
+        reminder = ScheduledReminder(
+            supplement_id=supplement["id"],
+            user_id=str(supplement["user_id"]),
+            name=supplement["name"],
+        )
+        slots = supplement_slots(
+            supplement.get("days") or [],
+            supplement.get("times") or [],
+            utc_offset_minutes(supplement.get("timezone")),
+        )
+        for slot in slots:
+            if slot not in self._slots:
+                self._slots[slot] = {}
+                insort(self._slot_keys, slot)
+            self._slots[slot][reminder.supplement_id] = reminder
+        if slots:
+            self._by_supplement[reminder.supplement_id] = slots
+
+    def _remove(self, supplement_id: int) -> None:
+        for slot in self._by_supplement.pop(supplement_id, set()):
+            reminders = self._slots.get(slot)
+            if reminders is None:
+                continue
+            reminders.pop(supplement_id, None)
+            if not reminders:
+                del self._slots[slot]
+                del self._slot_keys[bisect_left(self._slot_keys, slot)]
+
+    def _changed(self) -> None:
+        for callback in self._change_callbacks:
+            callback()
+
+
+# Глобальный экземпляр сервиса
+supplement_schedule = SupplementSchedule()
+SupplementRepository.add_change_listener(supplement_schedule.apply_change)
@@ -0,0 +1,201 @@
+"""Сервис перевода ru↔en через MyMemory с кэшем и пакетными запросами."""
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+from config import (
+    MYMEMORY_API_URL,
+    TRANSLATION_CACHE_MEMORY_SIZE,
+    TRANSLATION_BATCH_MAX_BYTES,
+    TRANSLATION_PERSIST_MAX_LENGTH,
+)
+from database.async_repositories import AsyncTranslationRepository
+from services.http_client import http_client
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Разделитель строк внутри одного пакетного запроса: MyMemory сохраняет переводы строк
+BATCH_SEPARATOR = "\n"
+
+# Переводы не устаревают — держим в памяти сутки, дальше подтянем из БД
+MEMORY_TTL_SECONDS = 24 * 3600
+
+
+class TranslationService:
+    """
+    Перевод с мемоизацией.
+
+    Порядок поиска: in-process LRU → таблица translations → MyMemory.
+    Одинаковые тексты, которые уже переводятся в другом запросе, не
+    отправляются повторно — вызывающий ждёт тот же результат. Несколько
+    непереведённых текстов уходят одним запросом, разделённые переводом строки.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(maxsize=TRANSLATION_CACHE_MEMORY_SIZE, ttl=MEMORY_TTL_SECONDS)
+        self._in_flight: dict[tuple[str, str, str], asyncio.Future] = {}
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.split()).lower()
+
+    async def translate(self, text: str, source_lang: str = "ru", target_lang: str = "en") -> str:
+        """Переводит один текст; при ошибке возвращает исходный."""
+        if not text or not text.strip():
+            return text
+        return (await self.translate_many([text], source_lang, target_lang))[0]
+
+    async def translate_many(
+        self,
+        texts: Iterable[str],
+        source_lang: str = "ru",
+        target_lang: str = "en",
+    ) -> list[str]:
+        """
+        Переводит список текстов, сохраняя порядок.
+
+        Всё, чего нет в кэше, отправляется не более чем одним запросом на каждые
+        TRANSLATION_BATCH_MAX_BYTES текста. Непереведённые элементы возвращаются как есть.
+        """
+        texts = list(texts)
+        keys = [self._normalize(text) if text else "" for text in texts]
+        result: dict[str, str] = {}
+        waiting: dict[str, asyncio.Future] = {}
+        missing: list[str] = []
+
+        for key in dict.fromkeys(key for key in keys if key):
+            cache_key = (source_lang, target_lang, key)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                result[key] = cached
+            elif cache_key in self._in_flight:
+                waiting[key] = self._in_flight[cache_key]
+            else:
+                missing.append(key)
+
+        if missing:
+            try:
+                stored = await AsyncTranslationRepository.get_translations(source_lang, target_lang, missing)
+            except Exception as e:
+                logger.warning(f"Не удалось прочитать словарь переводов: {e}")
+                stored = {}
+            for key, value in stored.items():
+                self._cache.set((source_lang, target_lang, key), value)
+            result.update(stored)
+            # Пока читали БД, те же тексты мог начать переводить параллельный вызов
+            still_missing = []
+            for key in missing:
+                if key in stored:
+                    continue
+                future = self._in_flight.get((source_lang, target_lang, key))
+                if future is not None:
+                    waiting[key] = future
+                else:
+                    still_missing.append(key)
+            missing = still_missing
+
+        if missing:
+            result.update(await self._translate_missing(missing, source_lang, target_lang))
+
+        for key, future in waiting.items():
+            value = await future
+            if value:
+                result[key] = value
+
+        return [result.get(key, text) if key else text for key, text in zip(keys, texts)]
+
+    async def _translate_missing(self, keys: list[str], source_lang: str, target_lang: str) -> dict[str, str]:
+        """Переводит тексты через API, регистрируя их как «в процессе» для параллельных вызовов."""
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in keys}
+        for key, future in futures.items():
+            self._in_flight[(source_lang, target_lang, key)] = future
+
+        fetched: dict[str, str] = {}
+        try:
+            fetched = await self._fetch_batches(keys, source_lang, target_lang)
+        except Exception as e:
+            logger.warning(f"Translation error: {e}")
+        finally:
+            for key, future in futures.items():
+                self._in_flight.pop((source_lang, target_lang, key), None)
+                future.set_result(fetched.get(key))
+
+        for key, value in fetched.items():
+            self._cache.set((source_lang, target_lang, key), value)
+        persistent = {
+            key: value for key, value in fetched.items()
+            if len(key) <= TRANSLATION_PERSIST_MAX_LENGTH
+        }
+        try:
+            await AsyncTranslationRepository.save_translations(source_lang, target_lang, persistent)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить переводы: {e}")
+        return fetched
+
+    async def _fetch_batches(self, keys: list[str], source_lang: str, target_lang: str) -> dict[str, str]:
+        """Разбивает тексты на пакеты по размеру и переводит каждый пакет одним запросом."""
+        batches: list[list[str]] = []
+        current: list[str] = []
+        current_size = 0
+        for key in keys:
+            size = len(key.encode("utf-8")) + len(BATCH_SEPARATOR)
+            if current and current_size + size > TRANSLATION_BATCH_MAX_BYTES:
+                batches.append(current)
+                current, current_size = [], 0
+            current.append(key)
+            current_size += size
+        if current:
+            batches.append(current)
+
+        fetched: dict[str, str] = {}
+        for batch_result in await asyncio.gather(
+            *(self._fetch_batch(batch, source_lang, target_lang) for batch in batches)
+        ):
+            fetched.update(batch_result)
+        return fetched
+
+    async def _fetch_batch(self, batch: list[str], source_lang: str, target_lang: str) -> dict[str, str]:
+        translated = await self._request(BATCH_SEPARATOR.join(batch), source_lang, target_lang)
+        if translated is None:
+            return {}
+        if len(batch) == 1:
+            return {batch[0]: translated.strip()}
+
+        parts = [part.strip() for part in translated.split(BATCH_SEPARATOR)]
+        if len(parts) == len(batch) and all(parts):
+            return dict(zip(batch, parts))
+
+        # Сервис склеил или потерял строки — переводим по одной
+        logger.info(f"Пакетный перевод вернул {len(parts)} строк вместо {len(batch)}, перевожу по одной")
+        singles = await asyncio.gather(
+            *(self._request(key, source_lang, target_lang) for key in batch)
+        )
+        return {key: value.strip() for key, value in zip(batch, singles) if value}
+
+    async def _request(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        """Один запрос к MyMemory. None — перевод не получен."""
+        try:
+            response = await http_client.get(
+                MYMEMORY_API_URL,
+                params={"q": text, "langpair": f"{source_lang}|{target_lang}"},
+            )
+            if response.status != 200:
+                raise RuntimeError(f"MyMemory error: HTTP {response.status}")
+            data = response.json()
+            status = data.get("responseStatus")
+            if status is not None and str(status) != "200":
+                raise RuntimeError(f"MyMemory error: {status} {data.get('responseDetails')}")
+            translated = (
+                (data.get("responseData") or {}).get("translatedText")
+                or (data.get("matches") or [{}])[0].get("translation")
+            )
+            return translated or None
+        except Exception as e:
+            logger.warning(f"Translation error: {e}")
+            return None
+
+
+# Глобальный экземпляр сервиса
+translation_service = TranslationService()
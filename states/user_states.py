@@ -90,6 +90,11 @@ class SupportStates(StatesGroup):
     waiting_for_message = State()
 
 
+class SettingsStates(StatesGroup):
+    """Состояния для настроек."""
+    choosing_timezone = State()
+
+
 class WellbeingStates(StatesGroup):
     """Состояния для отметки самочувствия."""
     choosing_mode = State()
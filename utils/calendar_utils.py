@@ -4,52 +4,32 @@ import logging
 from datetime import date
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import MONTH_NAMES
-from database.repositories import (
-    WorkoutRepository,
-    MealRepository,
-    SupplementRepository,
-    ProcedureRepository,
-    WeightRepository,
-    WaterRepository,
-)
-from database.repositories.wellbeing_repository import WellbeingRepository
-from database.repositories.activity_analysis_repository import ActivityAnalysisRepository
+from database.async_repositories import AsyncCalendarRepository
 
 logger = logging.getLogger(__name__)
 
 
-def get_month_workout_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_marked_days(kind: str, user_id: str, year: int, month: int) -> set[int]:
+    """
+    Получает дни месяца, которые нужно отметить в календаре типа kind.
+
+    kind: workout, meal, weight, measurement, procedure, water, wellbeing,
+    activity_analysis или supplement. Каждый вызов — один индексный запрос.
+    """
+    return await AsyncCalendarRepository.get_month_days(kind, user_id, year, month)
+
+
+async def get_month_workout_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые были тренировки."""
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
-    else:
-        end_date = date(year, month + 1, 1)
-    
-    workouts = WorkoutRepository.get_workouts_for_period(user_id, start_date, end_date)
-    return {w.date.day for w in workouts if w.date.month == month}
+    return await get_month_marked_days("workout", user_id, year, month)
 
 
-def get_month_meal_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_meal_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые были приёмы пищи."""
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
-    else:
-        end_date = date(year, month + 1, 1)
-    
-    # TODO: Добавить метод в MealRepository для получения дней
-    # Пока упрощённая версия
-    days = set()
-    for day in range(1, calendar.monthrange(year, month)[1] + 1):
-        check_date = date(year, month, day)
-        meals = MealRepository.get_meals_for_date(user_id, check_date)
-        if meals:
-            days.add(day)
-    return days
-
-
-def build_calendar_keyboard(
+    return await get_month_marked_days("meal", user_id, year, month)
+
+
+async def build_calendar_keyboard(
     user_id: str,
     year: int,
     month: int,
@@ -66,10 +46,10 @@ def build_calendar_keyboard(
         month: Месяц
         callback_prefix: Префикс для callback_data
         marker: Маркер для дней с данными
-        get_days_func: Функция для получения дней с данными
+        get_days_func: Асинхронная функция для получения дней с данными
     """
     if get_days_func:
-        marked_days = get_days_func(user_id, year, month)
+        marked_days = await get_days_func(user_id, year, month)
     else:
         marked_days = set()
     
@@ -117,9 +97,9 @@ def build_calendar_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def build_workout_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_workout_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит календарь тренировок."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -129,9 +109,9 @@ def build_workout_calendar_keyboard(user_id: str, year: int, month: int) -> Inli
     )
 
 
-def build_kbju_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_kbju_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит календарь КБЖУ."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -141,21 +121,14 @@ def build_kbju_calendar_keyboard(user_id: str, year: int, month: int) -> InlineK
     )
 
 
-def get_month_wellbeing_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_wellbeing_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые были записи самочувствия."""
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
-    else:
-        end_date = date(year, month + 1, 1)
-
-    entries = WellbeingRepository.get_entries_for_period(user_id, start_date, end_date)
-    return {entry.date.day for entry in entries if entry.date.month == month}
+    return await get_month_marked_days("wellbeing", user_id, year, month)
 
 
-def build_wellbeing_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_wellbeing_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит календарь самочувствия."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -212,14 +185,14 @@ def build_wellbeing_day_actions_keyboard(entries: list, target_date: date) -> In
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def get_month_supplement_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_supplement_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые были приёмы добавок."""
-    return SupplementRepository.get_history_days(user_id, year, month)
+    return await get_month_marked_days("supplement", user_id, year, month)
 
 
-def build_supplement_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_supplement_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит клавиатуру календаря добавок."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -243,13 +216,13 @@ def build_supplement_day_actions_keyboard(entries: list[dict], target_date: date
                 InlineKeyboardButton(
                     text=f"✏️ {label}",
                     callback_data=(
-                        f"supcal_edit:{target_date.isoformat()}:{entry['supplement_index']}:{entry['entry_index']}"
+                        f"supcal_edit:{target_date.isoformat()}:{entry['entry_id']}"
                     ),
                 ),
                 InlineKeyboardButton(
                     text=f"🗑 {label}",
                     callback_data=(
-                        f"supcal_del:{target_date.isoformat()}:{entry['supplement_index']}:{entry['entry_index']}"
+                        f"supcal_del:{target_date.isoformat()}:{entry['entry_id']}"
                     ),
                 ),
             ]
@@ -275,14 +248,14 @@ def build_supplement_day_actions_keyboard(entries: list[dict], target_date: date
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def get_month_procedure_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_procedure_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые были процедуры."""
-    return ProcedureRepository.get_month_procedure_days(user_id, year, month)
+    return await get_month_marked_days("procedure", user_id, year, month)
 
 
-def build_procedure_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_procedure_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит клавиатуру календаря процедур."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -329,14 +302,14 @@ def build_procedure_day_actions_keyboard(procedures, target_date: date) -> Inlin
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def get_month_water_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_water_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые была вода."""
-    return WaterRepository.get_month_water_days(user_id, year, month)
+    return await get_month_marked_days("water", user_id, year, month)
 
 
-def build_water_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_water_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит календарь воды."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -384,14 +357,14 @@ def build_water_day_actions_keyboard(entries: list, target_date: date) -> Inline
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def get_month_weight_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_weight_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые был записан вес."""
-    return WeightRepository.get_month_weight_days(user_id, year, month)
+    return await get_month_marked_days("weight", user_id, year, month)
 
 
-def build_weight_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_weight_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит клавиатуру календаря веса."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -441,14 +414,14 @@ def build_weight_day_actions_keyboard(weight, target_date: date) -> InlineKeyboa
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def get_month_measurement_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_measurement_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые были замеры."""
-    return WeightRepository.get_month_measurement_days(user_id, year, month)
+    return await get_month_marked_days("measurement", user_id, year, month)
 
 
-def build_measurement_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_measurement_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит клавиатуру календаря замеров."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -498,14 +471,14 @@ def build_measurement_day_actions_keyboard(measurement, target_date: date) -> In
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def get_month_activity_analysis_days(user_id: str, year: int, month: int) -> set[int]:
+async def get_month_activity_analysis_days(user_id: str, year: int, month: int) -> set[int]:
     """Получает дни месяца, в которые есть сохранённые ИИ-анализы."""
-    return ActivityAnalysisRepository.get_month_days(user_id, year, month)
+    return await get_month_marked_days("activity_analysis", user_id, year, month)
 
 
-def build_activity_analysis_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
+async def build_activity_analysis_calendar_keyboard(user_id: str, year: int, month: int) -> InlineKeyboardMarkup:
     """Строит календарь сохранённых ИИ-анализов деятельности."""
-    return build_calendar_keyboard(
+    return await build_calendar_keyboard(
         user_id=user_id,
         year=year,
         month=month,
@@ -0,0 +1,86 @@
+"""Нормализация текстового описания еды (для кэшей и разбора на продукты)."""
+import re
+from typing import NamedTuple, Optional
+
+# Написания единиц измерения → каноническая единица и множитель
+UNIT_ALIASES = {
+    "г": ("г", 1.0), "гр": ("г", 1.0), "грамм": ("г", 1.0), "грамма": ("г", 1.0),
+    "граммов": ("г", 1.0), "g": ("г", 1.0), "gr": ("г", 1.0), "gram": ("г", 1.0),
+    "grams": ("г", 1.0),
+    "кг": ("г", 1000.0), "килограмм": ("г", 1000.0), "килограмма": ("г", 1000.0),
+    "килограммов": ("г", 1000.0), "kg": ("г", 1000.0),
+    "мл": ("мл", 1.0), "миллилитр": ("мл", 1.0), "миллилитра": ("мл", 1.0),
+    "миллилитров": ("мл", 1.0), "ml": ("мл", 1.0),
+    "л": ("мл", 1000.0), "литр": ("мл", 1000.0), "литра": ("мл", 1000.0),
+    "литров": ("мл", 1000.0),
+    "шт": ("шт", 1.0), "штук": ("шт", 1.0), "штука": ("шт", 1.0), "штуки": ("шт", 1.0),
+}
+
+_UNIT_PATTERN = "|".join(sorted(map(re.escape, UNIT_ALIASES), key=len, reverse=True))
+_AMOUNT_RE = re.compile(rf"(?<![\w.])(\d+(?:\.\d+)?)\s*({_UNIT_PATTERN})\.?(?!\w)")
+_ITEM_SEPARATORS_RE = re.compile(r"[,;\n+]|\s+и\s+")
+_AMOUNT_FIRST_RE = re.compile(r"^(\d+(?:\.\d+)?)(?:\s+(г|мл|шт))?\s+(.+)$")
+_AMOUNT_LAST_RE = re.compile(r"^(.+?)\s+(\d+(?:\.\d+)?)(?:\s+(г|мл|шт))?$")
+
+
+class FoodItem(NamedTuple):
+    """Одна позиция описания: «200 г курица» → (200.0, "г", "курица")."""
+    amount: float
+    unit: Optional[str]
+    name: str
+
+
+def _format_number(value: float) -> str:
+    return f"{value:g}"
+
+
+def _canonical_amount(match: re.Match) -> str:
+    unit, factor = UNIT_ALIASES[match.group(2)]
+    return f"{_format_number(float(match.group(1)) * factor)} {unit}"
+
+
+def split_food_items(text: str) -> list[str]:
+    """
+    Разбивает описание на позиции и приводит каждую к виду «200 г курица».
+
+    Регистр, пробелы, «ё», написание единиц («гр», «грамм», «g», «кг»)
+    и порядок «курица 200 г» / «200 г курица» сводятся к одной форме.
+    """
+    text = (text or "").lower().replace("ё", "е")
+    text = re.sub(r"(\d),(\d)", r"\1.\2", text)
+    text = _AMOUNT_RE.sub(_canonical_amount, text)
+
+    items = []
+    for segment in _ITEM_SEPARATORS_RE.split(text):
+        segment = re.sub(r"\s[-–—]\s|:", " ", segment)
+        segment = " ".join(segment.split()).strip(" .!")
+        if not segment:
+            continue
+        if not _AMOUNT_FIRST_RE.match(segment):
+            match = _AMOUNT_LAST_RE.match(segment)
+            if match:
+                name, amount, unit = match.groups()
+                segment = " ".join(part for part in (amount, unit, name) if part)
+        items.append(segment)
+    return items
+
+
+def parse_food_item(item: str) -> Optional[FoodItem]:
+    """Разбирает позицию из split_food_items; None — количество не указано."""
+    match = _AMOUNT_FIRST_RE.match(item)
+    if not match:
+        return None
+    amount, unit, name = match.groups()
+    return FoodItem(float(amount), unit, name)
+
+
+def normalize_food_text(text: str) -> str:
+    """Каноническая форма описания еды: нормализованные позиции в отсортированном порядке."""
+    return "; ".join(sorted(split_food_items(text)))
+
+
+def normalize_ingredient_name(name: str) -> str:
+    """Ключ продукта в справочнике: нижний регистр, «ё» → «е», без кавычек и лишних пробелов."""
+    name = (name or "").lower().replace("ё", "е")
+    name = re.sub(r"[\"'«»()]", " ", name)
+    return " ".join(name.split()).strip(" .,!-")
@@ -0,0 +1,55 @@
+"""Перцептивный хэш изображений (dHash) для поиска повторно отправленных фото."""
+import io
+import logging
+from typing import Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow не установлен — работаем только по file_unique_id
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8  # 8x8 сравнений → 64-битный хэш
+
+
+def dhash(image_bytes: bytes) -> Optional[int]:
+    """
+    Возвращает 64-битный difference hash или None, если Pillow недоступен
+    или изображение не читается.
+
+    Хэш устойчив к пересжатию и масштабированию: одно и то же фото,
+    отправленное повторно, даёт хэш с расстоянием Хэмминга в пару бит.
+    """
+    if Image is None or not image_bytes:
+        return None
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+            pixels = list(small.getdata())
+    except Exception as e:
+        logger.warning(f"Не удалось посчитать хэш изображения: {e}")
+        return None
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def hash_bands(value: int, bands: int = 4) -> list[int]:
+    """
+    Делит 64-битный хэш на bands частей по 64/bands бит.
+
+    Если расстояние между хэшами меньше bands, хотя бы одна часть совпадает
+    точно — это позволяет искать похожие хэши по индексу, а не перебором.
+    """
+    width = 64 // bands
+    mask = (1 << width) - 1
+    return [(value >> (width * i)) & mask for i in range(bands)]
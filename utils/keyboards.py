@@ -1,5 +1,6 @@
 """Клавиатуры для бота."""
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+from utils.timezones import TIMEZONE_CHOICES
 
 # Главная кнопка меню
 MAIN_MENU_BUTTON_TEXT = "🔄 Главное меню"
@@ -310,6 +311,7 @@ kbju_edit_type_menu = ReplyKeyboardMarkup(
 # Меню настроек
 settings_menu = ReplyKeyboardMarkup(
     keyboard=[
+        [KeyboardButton(text="🕒 Часовой пояс")],
         [KeyboardButton(text="🗑 Удалить аккаунт")],
         [KeyboardButton(text="💬 Поддержка")],
         [KeyboardButton(text="🔒 Политика конфиденциальности")],
@@ -318,6 +320,15 @@ settings_menu = ReplyKeyboardMarkup(
     resize_keyboard=True,
 )
 
+_timezone_labels = list(TIMEZONE_CHOICES)
+timezone_menu = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text=label) for label in _timezone_labels[i:i + 2]]
+        for i in range(0, len(_timezone_labels), 2)
+    ] + [[KeyboardButton(text="⬅️ Назад"), main_menu_button]],
+    resize_keyboard=True,
+)
+
 delete_account_confirm_menu = ReplyKeyboardMarkup(
     keyboard=[
         [KeyboardButton(text="✅ Да, удалить аккаунт")],
@@ -1,16 +1,11 @@
 """Функции форматирования прогресса и сводок."""
 import logging
 import random
-from datetime import date, datetime
-from database.repositories import (
-    MealRepository,
-    WorkoutRepository,
-    WeightRepository,
-    WaterRepository,
-)
-from database.models import Workout
+from datetime import datetime
+from typing import Optional
+from database.repositories import DashboardRepository, DashboardSnapshot
 from utils.formatters import get_kbju_goal_label, format_count_with_unit
-from utils.workout_utils import calculate_workout_calories, get_daily_workout_calories
+from utils.workout_utils import calculate_workouts_calories
 
 logger = logging.getLogger(__name__)
 
@@ -63,16 +58,33 @@ def build_water_progress_bar(current: float, target: float, length: int = 10) ->
         return "🟦" * filled_blocks + "⬜" * empty_blocks
 
 
+def get_snapshot_workout_calories(user_id: str, snapshot: DashboardSnapshot) -> list[float]:
+    """
+    Калории тренировок снимка (в порядке snapshot.workouts).
+
+    Для тренировок без сохранённых калорий — оценка по весу, как в списке
+    тренировок; вес на сегодня уже есть в снимке, отдельный запрос не нужен.
+    """
+    weights_by_date = {snapshot.day: snapshot.last_weight} if snapshot.last_weight else {}
+    return calculate_workouts_calories(user_id, snapshot.workouts, weights_by_date)
 
 
-def format_progress_block(user_id: str) -> str:
+def format_progress_block(user_id: str, snapshot: Optional[DashboardSnapshot] = None) -> str:
     """Форматирует блок прогресса КБЖУ."""
-    settings = MealRepository.get_kbju_settings(user_id)
+    snapshot = snapshot or DashboardRepository.get_snapshot(user_id)
+    settings = snapshot.kbju_settings
     if not settings:
         return "🍱 Настрой цель по КБЖУ через «🎯 Цель / Норма КБЖУ», чтобы я показывал прогресс."
     
-    totals = MealRepository.get_daily_totals(user_id, date.today())
-    burned_calories = get_daily_workout_calories(user_id, date.today())
+    # Суммы за день — одна строка daily_user_summary
+    summary = snapshot.summary
+    totals = {
+        "calories": summary.calories if summary else 0.0,
+        "protein": summary.protein if summary else 0.0,
+        "fat": summary.fat if summary else 0.0,
+        "carbs": summary.carbs if summary else 0.0,
+    }
+    burned_calories = sum(get_snapshot_workout_calories(user_id, snapshot))
     
     base_calories_target = settings.calories
     adjusted_calories_target = base_calories_target + burned_calories
@@ -104,20 +116,20 @@ def format_progress_block(user_id: str) -> str:
     
     lines.append("")
     lines.append(line("🔥 Калории", totals["calories"], adjusted_calories_target, "ккал"))
-    lines.append(line("💪 Белки", totals.get("protein_g", totals.get("protein", 0)), adjusted_protein_target, "г"))
-    lines.append(line("🥑 Жиры", totals.get("fat_total_g", totals.get("fat", 0)), adjusted_fat_target, "г"))
-    lines.append(line("🍩 Углеводы", totals.get("carbohydrates_total_g", totals.get("carbs", 0)), adjusted_carbs_target, "г"))
+    lines.append(line("💪 Белки", totals["protein"], adjusted_protein_target, "г"))
+    lines.append(line("🥑 Жиры", totals["fat"], adjusted_fat_target, "г"))
+    lines.append(line("🍩 Углеводы", totals["carbs"], adjusted_carbs_target, "г"))
     
     return "\n".join(lines)
 
 
-def format_water_progress_block(user_id: str) -> str:
+def format_water_progress_block(user_id: str, snapshot: Optional[DashboardSnapshot] = None) -> str:
     """Форматирует блок прогресса воды."""
-    from handlers.water import get_water_recommended
+    from handlers.water import calculate_water_recommended
     
-    today = date.today()
-    daily_total = WaterRepository.get_daily_total(user_id, today)
-    recommended = get_water_recommended(user_id)
+    snapshot = snapshot or DashboardRepository.get_snapshot(user_id)
+    daily_total = snapshot.water_ml
+    recommended = calculate_water_recommended(snapshot.last_weight)
     
     percent = 0 if recommended <= 0 else round((daily_total / recommended) * 100)
     bar = build_water_progress_bar(daily_total, recommended)
@@ -125,10 +137,14 @@ def format_water_progress_block(user_id: str) -> str:
     return f"💧 <b>Вода</b>: {daily_total:.0f}/{recommended:.0f} мл ({percent}%)\n{bar}"
 
 
-def format_today_workouts_block(user_id: str, include_date: bool = True) -> str:
+def format_today_workouts_block(
+    user_id: str,
+    include_date: bool = True,
+    snapshot: Optional[DashboardSnapshot] = None,
+) -> str:
     """Форматирует блок тренировок за сегодня."""
-    today = date.today()
-    workouts = WorkoutRepository.get_workouts_for_day(user_id, today)
+    snapshot = snapshot or DashboardRepository.get_snapshot(user_id)
+    workouts = snapshot.workouts
     
     if not workouts:
         return "💪 <b>Тренировки</b>\n—"
@@ -137,10 +153,9 @@ def format_today_workouts_block(user_id: str, include_date: bool = True) -> str:
     total_calories = 0.0
     aggregates: dict[tuple[str, str | None], dict[str, float]] = {}
     
-    for w in workouts:
-        entry_calories = w.calories or calculate_workout_calories(
-            user_id, w.exercise, w.variant, w.count
-        )
+    workout_calories = get_snapshot_workout_calories(user_id, snapshot)
+    
+    for w, entry_calories in zip(workouts, workout_calories):
         total_calories += entry_calories
         
         key = (w.exercise, w.variant)
@@ -162,9 +177,9 @@ def format_today_workouts_block(user_id: str, include_date: bool = True) -> str:
     return "\n".join(text)
 
 
-def get_today_summary_text(user_id: str) -> str:
+def get_today_summary_text(user_id: str, snapshot: Optional[DashboardSnapshot] = None) -> str:
     """Получает сводку за сегодня."""
-    today = date.today()
+    snapshot = snapshot or DashboardRepository.get_snapshot(user_id)
     today_str = datetime.now().strftime("%d.%m.%Y")
     
     greetings = [
@@ -176,13 +191,11 @@ def get_today_summary_text(user_id: str) -> str:
     ]
     motivation = random.choice(greetings)
     
-    workouts = WorkoutRepository.get_workouts_for_day(user_id, today)
-    meals_today = MealRepository.get_meals_for_date(user_id, today)
-    weight = WeightRepository.get_last_weight(user_id)
-    measurements = WeightRepository.get_measurements(user_id, limit=1)
-    m = measurements[0] if measurements else None
+    workouts = snapshot.workouts
+    weight = snapshot.last_weight
+    m = snapshot.last_measurement
     
-    has_today_anything = bool(workouts or meals_today)
+    has_today_anything = bool(workouts or snapshot.has_meals)
     
     if not has_today_anything:
         summary_lines = [
@@ -0,0 +1,59 @@
+"""Часовые пояса пользователей."""
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import DEFAULT_TIMEZONE
+
+# Кнопка настроек → часовой пояс
+TIMEZONE_CHOICES = {
+    "Калининград (UTC+2)": "Europe/Kaliningrad",
+    "Москва (UTC+3)": "Europe/Moscow",
+    "Самара (UTC+4)": "Europe/Samara",
+    "Екатеринбург (UTC+5)": "Asia/Yekaterinburg",
+    "Омск (UTC+6)": "Asia/Omsk",
+    "Новосибирск (UTC+7)": "Asia/Novosibirsk",
+    "Красноярск (UTC+7)": "Asia/Krasnoyarsk",
+    "Иркутск (UTC+8)": "Asia/Irkutsk",
+    "Якутск (UTC+9)": "Asia/Yakutsk",
+    "Владивосток (UTC+10)": "Asia/Vladivostok",
+    "Магадан (UTC+11)": "Asia/Magadan",
+    "Камчатка (UTC+12)": "Asia/Kamchatka",
+}
+
+
+@lru_cache(maxsize=None)
+def _load_zone(name: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """ZoneInfo пользователя; пустой или неизвестный пояс — DEFAULT_TIMEZONE."""
+    return (name and _load_zone(name)) or _load_zone(DEFAULT_TIMEZONE)
+
+
+def normalize_timezone(name: Optional[str]) -> str:
+    """Имя пояса, по которому пользователь получает уведомления."""
+    return name if name and _load_zone(name) else DEFAULT_TIMEZONE
+
+
+def parse_timezone_input(text: str) -> Optional[str]:
+    """Кнопка из TIMEZONE_CHOICES или IANA-имя (Europe/Berlin) → имя пояса; иначе None."""
+    text = (text or "").strip()
+    if text in TIMEZONE_CHOICES:
+        return TIMEZONE_CHOICES[text]
+    if "/" in text and _load_zone(text):
+        return text
+    return None
+
+
+def timezone_label(name: Optional[str]) -> str:
+    """Подпись пояса для сообщений."""
+    name = normalize_timezone(name)
+    for label, zone_name in TIMEZONE_CHOICES.items():
+        if zone_name == name:
+            return label
+    return name
@@ -29,6 +29,16 @@ def parse_weight(weight_str: str) -> float | None:
         return None
 
 
+def safe_float(value) -> float:
+    """Приводит значение к float; None и нечисловые значения дают 0.0."""
+    try:
+        if value is None:
+            return 0.0
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
 def parse_date(date_str: str) -> datetime | None:
     """Парсит строку даты в datetime."""
     try:
@@ -1,10 +1,13 @@
 """Утилиты для работы с тренировками."""
 import logging
-from typing import Optional
-from database.repositories import WeightRepository
+from datetime import date
+from typing import Optional, Sequence
 
 logger = logging.getLogger(__name__)
 
+# Вес по умолчанию, если пользователь его не указал
+DEFAULT_WEIGHT_KG = 70.0
+
 
 def estimate_met_for_exercise(exercise: str) -> float:
     """
@@ -55,6 +58,7 @@ def calculate_workout_calories(
     exercise: str,
     variant: Optional[str],
     count: int,
+    weight: float,
 ) -> float:
     """
     Вычисляет примерные калории, сожжённые на тренировке (старая формула).
@@ -65,8 +69,10 @@ def calculate_workout_calories(
     - Если variant указывает на секунды/минуты — переводим в часы и считаем по времени.
     - Иначе (включая шаги и повторы) — старая грубая оценка по количеству:
       duration_hours = (count / 100) * 0.1  (≈ 0.1 часа на 100 повторений/условных единиц)
+
+    weight — вес пользователя в кг; его загружает вызывающий (DEFAULT_WEIGHT_KG,
+    если веса нет). Для списка тренировок используйте calculate_workouts_calories.
     """
-    weight = WeightRepository.get_last_weight(user_id) or 70.0
     met = estimate_met_for_exercise(exercise)
 
     try:
@@ -139,17 +145,31 @@ def calculate_workout_calories(
     return max(met * weight * duration_hours, 0.0)
 
 
-def get_daily_workout_calories(user_id: str, entry_date) -> float:
-    """Получает суммарные калории, сожжённые на тренировках за день."""
-    from database.repositories import WorkoutRepository
-    
-    workouts = WorkoutRepository.get_workouts_for_day(user_id, entry_date)
-    total = 0.0
-    
-    for w in workouts:
-        if w.calories:
-            total += w.calories
-        else:
-            total += calculate_workout_calories(user_id, w.exercise, w.variant, w.count)
-    
-    return total
+def workout_dates_without_calories(workouts: Sequence) -> set[date]:
+    """Даты тренировок без сохранённых калорий — для них нужен вес."""
+    return {w.date for w in workouts if not w.calories}
+
+
+def calculate_workouts_calories(
+    user_id: str,
+    workouts: Sequence,
+    weights_by_date: dict[date, float],
+) -> list[float]:
+    """
+    Калории для списка тренировок за один проход (в порядке workouts).
+
+    Сохранённые Workout.calories берутся как есть. Для остальных считается
+    calculate_workout_calories с весом на дату тренировки; weights_by_date —
+    результат WeightRepository.get_weights_as_of по workout_dates_without_calories.
+    """
+    return [
+        w.calories
+        or calculate_workout_calories(
+            user_id,
+            w.exercise,
+            w.variant,
+            w.count,
+            weight=weights_by_date.get(w.date) or DEFAULT_WEIGHT_KG,
+        )
+        for w in workouts
+    ]